@@ -0,0 +1,106 @@
+"""
+Import-time benchmark for the sales agent modules.
+
+Imports each module in a fresh interpreter with `python -X importtime`, reports the
+cumulative import time and the slowest direct dependencies, and fails (exit code 1) when a
+module pulls in one of the lazily loaded client libraries at import or exceeds its budget.
+
+Usage:
+    python -m backend.benchmarks.import_time [--repeat 3] [--budget-ms 1500] [module ...]
+"""
+import argparse
+from dataclasses import dataclass, field
+import os
+from pathlib import Path
+import subprocess
+import sys
+from typing import List, Optional, Sequence, Tuple
+
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+DEFAULT_MODULES = ("backend.sales_agent.tools", "backend.sales_agent.graph")
+
+# Heavy client libraries that must only be imported when first used
+LAZY_PACKAGES = ("pinecone", "langchain_openai", "openai", "langfuse", "selenium")
+
+# graph.py copies these into os.environ at import; placeholders keep the import working without a .env
+PLACEHOLDER_ENV = ("OPENAI_API_KEY", "PINECONE_API_KEY", "LANGFUSE_SECRET_KEY", "LANGFUSE_PUBLIC_KEY", "LANGFUSE_HOST")
+
+
+@dataclass
+class ImportProfile:
+    """Import timings of one module, in microseconds."""
+
+    module: str
+    cumulative_us: int
+    children: List[Tuple[str, int]] = field(default_factory=list)
+    imported: List[str] = field(default_factory=list)
+
+    @property
+    def lazy_violations(self) -> List[str]:
+        return sorted({name for name in self.imported if name in LAZY_PACKAGES})
+
+
+def profile_import(module: str) -> ImportProfile:
+    """Imports `module` in a fresh interpreter and parses its `-X importtime` report."""
+    env = dict(os.environ)
+    for name in PLACEHOLDER_ENV:
+        env.setdefault(name, "benchmark")
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [str(REPO_ROOT), env.get("PYTHONPATH")]))
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    # Lines look like "import time:  self [us] | cumulative | <indent>name"; the last one is the root
+    rows: List[Tuple[int, int, str]] = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        rows.append((depth, int(cumulative), name.strip()))
+
+    root_depth = next(depth for depth, _, name in reversed(rows) if name == module)
+    profile = ImportProfile(module=module, cumulative_us=0)
+    for depth, cumulative, name in rows:
+        profile.imported.append(name)
+        if name == module and depth == root_depth:
+            profile.cumulative_us = cumulative
+        elif depth == root_depth + 1:
+            profile.children.append((name, cumulative))
+    profile.children.sort(key=lambda child: -child[1])
+    return profile
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("modules", nargs="*", default=list(DEFAULT_MODULES), help="Modules to import")
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per module; the fastest one is reported")
+    parser.add_argument("--budget-ms", type=float, default=None, help="Fail when a module takes longer to import")
+    parser.add_argument("--top", type=int, default=8, help="Number of slowest direct imports to list")
+    args = parser.parse_args(argv)
+
+    failed = False
+    for module in args.modules:
+        profile = min((profile_import(module) for _ in range(args.repeat)), key=lambda p: p.cumulative_us)
+        print(f"{module}: {profile.cumulative_us / 1000:.0f} ms")
+        for name, cumulative in profile.children[: args.top]:
+            print(f"    {cumulative / 1000:8.1f} ms  {name}")
+
+        if profile.lazy_violations:
+            failed = True
+            print(f"  FAIL: imports {', '.join(profile.lazy_violations)} eagerly")
+        if args.budget_ms is not None and profile.cumulative_us / 1000 > args.budget_ms:
+            failed = True
+            print(f"  FAIL: over the {args.budget_ms:.0f} ms budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+import threading
+from typing import Tuple
+
+import sqlite3
+
+# In-process counter bumped by writers in this process (e.g. the products router)
+# so local catalog snapshots notice their own writes without polling the database.
+_local_version = 0
+_lock = threading.Lock()
+
+
+def notify_catalog_changed() -> int:
+    """
+    Signals that the product catalog was written by this process.
+
+    Returns:
+        int: The new in-process catalog version.
+    """
+    global _local_version
+    with _lock:
+        _local_version += 1
+        return _local_version
+
+
+def local_catalog_version() -> int:
+    """Returns the in-process catalog version."""
+    return _local_version
+
+
+def read_catalog_version(conn: sqlite3.Connection) -> Tuple[int, int]:
+    """
+    Reads the database-wide catalog version from the catalog_changes log.
+
+    Returns:
+        Tuple[int, int]: The latest version and the oldest version still retained
+        in the log. Readers older than the retained window must reload in full.
+    """
+    row = conn.execute("SELECT MAX(Version), MIN(Version) FROM catalog_changes").fetchone()
+    return row[0] or 0, row[1] or 0
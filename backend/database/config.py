@@ -11,10 +11,27 @@ class DatabaseConfig:
     db_path: str
     schema_path: Optional[str] = None
     products_path: Optional[str] = None
+    migrations_path: Optional[str] = None
+
+    # Connection pool settings
+    pool_size: int = 8
+    pool_timeout: float = 5.0
+
+    # Persistent journal mode, switched by the explicit setup steps (create_database and the
+    # cache stores creating their schema) rather than by every connection, so read-only
+    # use never rewrites the database file
+    journal_mode: str = "WAL"
+
+    # Pragmas applied once to every pooled connection
+    synchronous: str = "NORMAL"
+    mmap_size: int = 256 * 1024 * 1024
+    cache_size: int = -16000  # negative values are KiB, so roughly 16 MB per connection
+    busy_timeout_ms: int = 5000
 
 DEFAULT_CONFIG = DatabaseConfig(
     db_name="store.db",
     db_path=str(BASE_DIR / "database" / "db" / "store.db"),
     schema_path=str(BASE_DIR / "database" / "db" / "schemas.sql"),
     products_path=str(BASE_DIR / "database" / "db" / "products.json"),
+    migrations_path=str(BASE_DIR / "database" / "db" / "migrations"),
 )
\ No newline at end of file
@@ -0,0 +1,23 @@
+-- Secondary indexes for the queries issued by the sales agent tools and the REST routes.
+
+-- check_order_status: a customer's orders, newest first
+CREATE INDEX IF NOT EXISTS idx_orders_customer_date
+    ON orders (CustomerId, OrderDate DESC, Status);
+
+-- orders -> orders_details joins; covers the columns aggregated per order
+CREATE INDEX IF NOT EXISTS idx_orders_details_order
+    ON orders_details (OrderId, ProductId, Quantity, UnitPrice);
+
+-- search_products / get_available_categories: in-stock products by category and price
+CREATE INDEX IF NOT EXISTS idx_products_in_stock_category_price
+    ON products (Category, Price)
+    WHERE Quantity > 0;
+
+-- search_products price range filters without a category
+CREATE INDEX IF NOT EXISTS idx_products_in_stock_price
+    ON products (Price)
+    WHERE Quantity > 0;
+
+-- case-insensitive product lookups by name (create_order)
+CREATE INDEX IF NOT EXISTS idx_products_lower_name
+    ON products (LOWER(ProductName));
@@ -0,0 +1,34 @@
+-- Full-text index over the product catalog for search_products.
+-- External-content table: the text lives in products, the index is kept in sync by triggers.
+
+CREATE VIRTUAL TABLE IF NOT EXISTS products_fts USING fts5(
+    ProductName,
+    Description,
+    Category,
+    content = 'products',
+    content_rowid = 'ProductId',
+    tokenize = 'unicode61 remove_diacritics 2',
+    prefix = '2 3'
+);
+
+CREATE TRIGGER IF NOT EXISTS products_fts_after_insert AFTER INSERT ON products BEGIN
+    INSERT INTO products_fts (rowid, ProductName, Description, Category)
+    VALUES (new.ProductId, new.ProductName, new.Description, new.Category);
+END;
+
+CREATE TRIGGER IF NOT EXISTS products_fts_after_delete AFTER DELETE ON products BEGIN
+    INSERT INTO products_fts (products_fts, rowid, ProductName, Description, Category)
+    VALUES ('delete', old.ProductId, old.ProductName, old.Description, old.Category);
+END;
+
+-- Stock and price changes do not touch the index.
+CREATE TRIGGER IF NOT EXISTS products_fts_after_update
+AFTER UPDATE OF ProductName, Description, Category ON products BEGIN
+    INSERT INTO products_fts (products_fts, rowid, ProductName, Description, Category)
+    VALUES ('delete', old.ProductId, old.ProductName, old.Description, old.Category);
+    INSERT INTO products_fts (rowid, ProductName, Description, Category)
+    VALUES (new.ProductId, new.ProductName, new.Description, new.Category);
+END;
+
+-- Index the rows that existed before this migration.
+INSERT INTO products_fts (products_fts) VALUES ('rebuild');
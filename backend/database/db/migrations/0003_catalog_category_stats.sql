@@ -0,0 +1,67 @@
+-- Per-category statistics for in-stock products, maintained incrementally by triggers.
+-- search_products and get_available_categories read this table instead of aggregating products.
+
+CREATE TABLE IF NOT EXISTS catalog_category_stats (
+    Category TEXT PRIMARY KEY,
+    ProductCount INTEGER NOT NULL,
+    PriceSum REAL NOT NULL,
+    MinPrice REAL NOT NULL,
+    MaxPrice REAL NOT NULL
+) WITHOUT ROWID;
+
+-- A product entering the in-stock set: O(1) count/sum/extreme update.
+CREATE TRIGGER IF NOT EXISTS catalog_stats_after_insert
+AFTER INSERT ON products WHEN new.Quantity > 0 BEGIN
+    INSERT INTO catalog_category_stats (Category, ProductCount, PriceSum, MinPrice, MaxPrice)
+    VALUES (new.Category, 1, new.Price, new.Price, new.Price)
+    ON CONFLICT (Category) DO UPDATE SET
+        ProductCount = ProductCount + 1,
+        PriceSum = PriceSum + excluded.PriceSum,
+        MinPrice = MIN(MinPrice, excluded.MinPrice),
+        MaxPrice = MAX(MaxPrice, excluded.MaxPrice);
+END;
+
+-- A product leaving the in-stock set: extremes are re-read through
+-- idx_products_in_stock_category_price, which is a single index seek each.
+CREATE TRIGGER IF NOT EXISTS catalog_stats_after_delete
+AFTER DELETE ON products WHEN old.Quantity > 0 BEGIN
+    UPDATE catalog_category_stats SET
+        ProductCount = ProductCount - 1,
+        PriceSum = PriceSum - old.Price,
+        MinPrice = COALESCE((SELECT MIN(Price) FROM products WHERE Quantity > 0 AND Category = old.Category), MinPrice),
+        MaxPrice = COALESCE((SELECT MAX(Price) FROM products WHERE Quantity > 0 AND Category = old.Category), MaxPrice)
+    WHERE Category = old.Category;
+    DELETE FROM catalog_category_stats WHERE Category = old.Category AND ProductCount <= 0;
+END;
+
+-- Updates are a removal of the old row followed by an addition of the new one.
+-- Both steps commute, so the firing order of the two triggers does not matter.
+CREATE TRIGGER IF NOT EXISTS catalog_stats_after_update_remove
+AFTER UPDATE OF Category, Price, Quantity ON products WHEN old.Quantity > 0 BEGIN
+    UPDATE catalog_category_stats SET
+        ProductCount = ProductCount - 1,
+        PriceSum = PriceSum - old.Price,
+        MinPrice = COALESCE((SELECT MIN(Price) FROM products WHERE Quantity > 0 AND Category = old.Category), MinPrice),
+        MaxPrice = COALESCE((SELECT MAX(Price) FROM products WHERE Quantity > 0 AND Category = old.Category), MaxPrice)
+    WHERE Category = old.Category;
+    DELETE FROM catalog_category_stats WHERE Category = old.Category AND ProductCount <= 0;
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_stats_after_update_add
+AFTER UPDATE OF Category, Price, Quantity ON products WHEN new.Quantity > 0 BEGIN
+    INSERT INTO catalog_category_stats (Category, ProductCount, PriceSum, MinPrice, MaxPrice)
+    VALUES (new.Category, 1, new.Price, new.Price, new.Price)
+    ON CONFLICT (Category) DO UPDATE SET
+        ProductCount = ProductCount + 1,
+        PriceSum = PriceSum + excluded.PriceSum,
+        MinPrice = MIN(MinPrice, excluded.MinPrice),
+        MaxPrice = MAX(MaxPrice, excluded.MaxPrice);
+END;
+
+-- Seed from the rows that existed before this migration.
+DELETE FROM catalog_category_stats;
+INSERT INTO catalog_category_stats (Category, ProductCount, PriceSum, MinPrice, MaxPrice)
+SELECT Category, COUNT(*), SUM(Price), MIN(Price), MAX(Price)
+FROM products
+WHERE Quantity > 0
+GROUP BY Category;
@@ -0,0 +1,29 @@
+-- Change log of product rows. Its highest Version is the catalog version counter that
+-- in-process catalog snapshots poll to refresh only the products that changed.
+
+CREATE TABLE IF NOT EXISTS catalog_changes (
+    Version INTEGER PRIMARY KEY AUTOINCREMENT,
+    ProductId INTEGER NOT NULL
+);
+
+CREATE TRIGGER IF NOT EXISTS catalog_changes_after_insert AFTER INSERT ON products BEGIN
+    INSERT INTO catalog_changes (ProductId) VALUES (new.ProductId);
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_changes_after_update AFTER UPDATE ON products BEGIN
+    INSERT INTO catalog_changes (ProductId) VALUES (old.ProductId);
+    INSERT INTO catalog_changes (ProductId) SELECT new.ProductId WHERE new.ProductId != old.ProductId;
+END;
+
+CREATE TRIGGER IF NOT EXISTS catalog_changes_after_delete AFTER DELETE ON products BEGIN
+    INSERT INTO catalog_changes (ProductId) VALUES (old.ProductId);
+END;
+
+-- Keep the log bounded. Readers that fall behind the retained window reload in full.
+CREATE TRIGGER IF NOT EXISTS catalog_changes_prune
+AFTER INSERT ON catalog_changes WHEN new.Version % 1000 = 0 BEGIN
+    DELETE FROM catalog_changes WHERE Version <= new.Version - 10000;
+END;
+
+-- Start the counter above zero so existing rows are covered by a first full load.
+INSERT INTO catalog_changes (ProductId) VALUES (0);
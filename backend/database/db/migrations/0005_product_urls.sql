@@ -0,0 +1,19 @@
+-- Canonical storefront page of each product, so cart automation can open the product
+-- page directly instead of searching the storefront. Rows come from the catalog sync
+-- (Source = 'sync') or are learned from storefront searches that found an exact name match
+-- (Source = 'search'); synced rows take precedence.
+
+CREATE TABLE IF NOT EXISTS product_urls (
+    ProductName TEXT PRIMARY KEY,          -- lowercased, like products.ProductName
+    ProductId INTEGER,
+    Url TEXT NOT NULL,
+    StoreProductId TEXT,
+    Source TEXT NOT NULL CHECK(Source IN ('sync', 'search')),
+    UpdatedAt TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_product_urls_product ON product_urls (ProductId);
+
+CREATE TRIGGER IF NOT EXISTS product_urls_after_product_delete AFTER DELETE ON products BEGIN
+    DELETE FROM product_urls WHERE ProductId = old.ProductId;
+END;
@@ -1,13 +1,19 @@
 from contextlib import contextmanager
+from dataclasses import dataclass
+from itertools import islice
+import json
 import logging
 import os
 from pathlib import Path
-from typing import Generator, Optional
+import time
+from typing import Any, Dict, Generator, Iterable, Iterator, List, Optional, Tuple
 
 import sqlite3
-import pandas as pd
 
 from backend.database.config import DEFAULT_CONFIG, DatabaseConfig
+from backend.database.migrations import MigrationRunner
+from backend.database.pool import ConnectionPool, PoolStats, get_pool, release_pool
+from backend.database.product_urls import UPSERT_PRODUCT_URL, product_url_params
 
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
@@ -19,6 +25,15 @@ class DatabaseManager:
 
     def __init__(self, config: DatabaseConfig = DEFAULT_CONFIG):
         self.config = config
+        self._pool: Optional[ConnectionPool] = None
+
+    @property
+    def pool(self) -> ConnectionPool:
+        """The shared connection pool for this database file, created on first use."""
+        if self._pool is None or self._pool.closed:
+            self._ensure_db_directory()
+            self._pool = get_pool(self.config)
+        return self._pool
 
     def _ensure_db_directory(self) -> None:
         """Ensures that the database directory exists."""
@@ -36,32 +51,85 @@ class DatabaseManager:
             # create db
             with self.get_connection() as conn:
                 logger.info(f"Created database at: {self.config.db_path}")
-            
+            self.set_journal_mode()
+
             # create and execute schema if provided
-            if self.config.schema_path:
-                return self.execute_sql_file(self.config.schema_path)
-            return True
+            if self.config.schema_path and not self.execute_sql_file(self.config.schema_path):
+                return False
+
+            # bring the schema up to date with the versioned migrations
+            return self.apply_migrations()
 
         except Exception as e:
             logger.error(f"Error creating database: {str(e)}")
             return False
 
+    def apply_migrations(self) -> bool:
+        """
+        Applies any pending schema migrations from the configured migrations directory.
+
+        Returns:
+            bool: True if the schema is up to date, False if a migration failed.
+        """
+        if not self.config.migrations_path:
+            return True
+
+        try:
+            with self.get_connection() as conn:
+                runner = MigrationRunner(self.config.migrations_path)
+                applied = runner.apply(conn)
+                version = runner.current_version(conn)
+            logger.info(f"Database schema at version {version} ({len(applied)} migration(s) applied)")
+            return True
+        except Exception as e:
+            logger.error(f"Error applying migrations: {str(e)}")
+            return False
+
+    def set_journal_mode(self) -> str:
+        """
+        Switches the database file to the configured journal mode.
+
+        Connections do not change the journal mode themselves, so call this from steps that
+        create or migrate the database.
+
+        Returns:
+            str: The journal mode now in effect.
+        """
+        return self.pool.set_journal_mode()
+
     @contextmanager
     def get_connection(self) -> Generator[sqlite3.Connection, None, None]:
         """
         Context manager for database connections.
 
+        Connections are borrowed from a bounded pool and returned on exit.
+        Uncommitted changes are rolled back when the connection is returned.
+
         Yields:
             sqlite3.Connection: Database connection object.
         """
-        conn = None
-        try:
-            conn = sqlite3.connect(self.config.db_path)
-            conn.row_factory = sqlite3.Row
+        with self.pool.connection() as conn:
             yield conn
-        finally:
-            if conn:
-                conn.close()
+
+    def pool_stats(self) -> PoolStats:
+        """
+        Returns the connection pool counters.
+
+        Returns:
+            PoolStats: Pool size, wait time and reuse counts.
+        """
+        return self.pool.stats()
+
+    def close(self) -> None:
+        """
+        Releases this manager's hold on the shared connection pool.
+
+        The pool, and its connections, are closed once no other manager for the same
+        database file holds it.
+        """
+        if self._pool is not None:
+            release_pool(self._pool)
+            self._pool = None
 
     def execute_sql_file(self, file_path: str) -> bool:
         """
@@ -118,12 +186,23 @@ class DatabaseManager:
             logger.error(f"Error inserting product {product_name}: {e}")
             return False
 
-    def insert_products_from_json(self, file_path: Optional[str] = None) -> bool:
+    def insert_products_from_json(
+        self,
+        file_path: Optional[str] = None,
+        chunk_size: int = 1000,
+        upsert: bool = True,
+    ) -> bool:
         """
         Inserts products from a JSON file into the database.
 
+        The file is streamed and written in chunks inside a single transaction
+        (see `bulk_load_products`). With `upsert` enabled, products that already
+        exist are updated by name, so re-running the setup is idempotent.
+
         Args:
             file_path (str): Path to the JSON file containing product data.
+            chunk_size (int): Number of rows written per executemany batch.
+            upsert (bool): Update existing products with the same name instead of inserting duplicates.
 
         Returns:
             bool: True if all products were inserted successfully, False otherwise.
@@ -135,26 +214,215 @@ class DatabaseManager:
             return False
 
         try:
-            df = pd.read_json(file_path)
-        except Exception as e:
-            logger.error(f"Failed to load JSON file: {str(e)}")
+            stats = self.bulk_load_products(file_path, chunk_size=chunk_size, upsert=upsert)
+        except (OSError, ValueError, sqlite3.Error) as e:
+            logger.error(f"Failed to load products from {file_path}: {str(e)}")
+            return False
+
+        if stats.skipped:
+            logger.error(f"Failed to insert {stats.skipped} product(s)")
             return False
-        
-        success = True
-        for _, row in df.iterrows():
-            product_success = self.insert_product(
-                product_name=row["product_name"],
-                description=row["description"],
-                category=row["category"],
-                price=row["price"],
-                quantity=row["quantity"],
-            )
-            success = product_success and success
-        
-        if success:
-            logger.info("Inserted all products")
-        else:
-            logger.error("Failed to insert one or more products")
-        
-        return success
-    
\ No newline at end of file
+
+        logger.info("Inserted all products")
+        return True
+
+    def bulk_load_products(
+        self,
+        file_path: str,
+        chunk_size: int = 1000,
+        upsert: bool = True,
+    ) -> "BulkLoadStats":
+        """
+        Streams products from a JSON array file into the products table.
+
+        Rows are written with executemany in chunks of `chunk_size`, all inside
+        one transaction, so a failure leaves the catalog untouched. Malformed rows
+        are skipped and counted. Products carrying a storefront `url` (and optionally
+        `store_id`) also update the product_urls table.
+
+        Args:
+            file_path (str): Path to the JSON file containing product data.
+            chunk_size (int): Number of rows written per executemany batch.
+            upsert (bool): Update existing products with the same name instead of inserting duplicates.
+
+        Returns:
+            BulkLoadStats: Row counts and throughput of the load.
+        """
+        insert_query = """
+            INSERT INTO products (ProductName, Category, Description, Price, Quantity)
+            VALUES (?, ?, ?, ?, ?);
+        """
+        update_query = """
+            UPDATE products
+            SET Category = ?, Description = ?, Price = ?, Quantity = ?
+            WHERE ProductId = ?;
+        """
+        stats = BulkLoadStats()
+        start = time.perf_counter()
+
+        with self.get_connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                existing: Dict[str, int] = {}
+                last_id = conn.execute("SELECT COALESCE(MAX(ProductId), 0) FROM products").fetchone()[0]
+                if upsert:
+                    existing = {
+                        row["ProductName"]: row["ProductId"]
+                        for row in conn.execute("SELECT ProductId, ProductName FROM products")
+                    }
+
+                for chunk in _chunked(iter_json_array(file_path), chunk_size):
+                    inserts: List[Tuple] = []
+                    updates: List[Tuple] = []
+                    pending: Dict[str, int] = {}
+                    urls: List[Tuple] = []
+                    for item in chunk:
+                        row = _product_row(item)
+                        if row is None:
+                            stats.skipped += 1
+                            continue
+                        name = row[0]
+                        if item.get("url"):
+                            urls.append(product_url_params(name, str(item["url"]), item.get("store_id"), "sync"))
+                        if upsert and name in existing:
+                            updates.append((*row[1:], existing[name]))
+                        elif upsert and name in pending:
+                            # Repeated within the chunk: the last occurrence wins.
+                            inserts[pending[name]] = row
+                            stats.updated += 1
+                        else:
+                            pending[name] = len(inserts)
+                            inserts.append(row)
+
+                    if updates:
+                        conn.executemany(update_query, updates)
+                        stats.updated += len(updates)
+                    if inserts:
+                        conn.executemany(insert_query, inserts)
+                        stats.inserted += len(inserts)
+                        # New ids are allocated in increasing order, so the rows
+                        # added by this chunk are exactly those above `last_id`.
+                        for row in conn.execute(
+                            "SELECT ProductId, ProductName FROM products WHERE ProductId > ?",
+                            (last_id,),
+                        ):
+                            last_id = max(last_id, row["ProductId"])
+                            if upsert:
+                                existing[row["ProductName"]] = row["ProductId"]
+                    if urls:
+                        conn.executemany(UPSERT_PRODUCT_URL, urls)
+                        stats.urls += len(urls)
+                    logger.debug(f"Loaded {stats.rows} products so far")
+
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+
+        stats.seconds = time.perf_counter() - start
+        logger.info(
+            f"Loaded {stats.rows} products from {file_path} "
+            f"({stats.inserted} inserted, {stats.updated} updated, {stats.skipped} skipped, {stats.urls} URLs) "
+            f"in {stats.seconds:.3f}s, {stats.rows_per_second:,.0f} rows/s"
+        )
+        return stats
+
+
+@dataclass
+class BulkLoadStats:
+    """Counters reported by `DatabaseManager.bulk_load_products`."""
+
+    inserted: int = 0
+    updated: int = 0
+    skipped: int = 0
+    urls: int = 0
+    seconds: float = 0.0
+
+    @property
+    def rows(self) -> int:
+        return self.inserted + self.updated
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def _product_row(item: Any) -> Optional[Tuple[str, str, Optional[str], float, int]]:
+    """Normalizes one JSON product into an insert tuple, or None if it is malformed."""
+    try:
+        return (
+            str(item["product_name"]).lower(),
+            str(item["category"]).lower(),
+            item.get("description"),
+            float(item["price"]),
+            int(item["quantity"]),
+        )
+    except (AttributeError, KeyError, TypeError, ValueError) as e:
+        logger.warning(f"Skipping malformed product {item!r}: {e}")
+        return None
+
+
+def _chunked(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    """Groups an iterable into lists of at most `size` items."""
+    iterator = iter(items)
+    while chunk := list(islice(iterator, max(1, size))):
+        yield chunk
+
+
+def iter_json_array(file_path: str, read_size: int = 64 * 1024) -> Iterator[Any]:
+    """
+    Yields the elements of a top-level JSON array without loading the whole file.
+
+    Args:
+        file_path (str): Path to a file containing a JSON array.
+        read_size (int): Number of characters read from the file at a time.
+
+    Yields:
+        Any: Each decoded array element in order.
+    """
+    decoder = json.JSONDecoder()
+    with open(file_path, "r", encoding="utf-8") as file:
+        buffer = ""
+        pos = 0
+        eof = False
+
+        def fill() -> bool:
+            nonlocal buffer, pos, eof
+            data = file.read(read_size)
+            if not data:
+                eof = True
+                return False
+            buffer = buffer[pos:] + data
+            pos = 0
+            return True
+
+        def skip(chars: str) -> None:
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in chars:
+                    pos += 1
+                if pos < len(buffer) or not fill():
+                    return
+
+        skip(" \t\r\n")
+        if pos >= len(buffer) or buffer[pos] != "[":
+            raise ValueError(f"Expected a JSON array in {file_path}")
+        pos += 1
+
+        while True:
+            skip(" \t\r\n,")
+            if pos >= len(buffer):
+                raise ValueError(f"Unterminated JSON array in {file_path}")
+            if buffer[pos] == "]":
+                return
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof or not fill():
+                    raise
+                continue
+            # A value that runs to the end of the buffer may be a truncated number.
+            if end == len(buffer) and not eof and fill():
+                continue
+            pos = end
+            yield item
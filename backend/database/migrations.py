@@ -0,0 +1,118 @@
+from dataclasses import dataclass
+from datetime import datetime
+import logging
+from pathlib import Path
+import re
+from typing import List, Optional
+
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+MIGRATION_FILE_PATTERN = re.compile(r"^(?P<version>\d+)_(?P<name>[\w-]+)\.sql$")
+
+SCHEMA_VERSION_TABLE = """
+    CREATE TABLE IF NOT EXISTS schema_migrations (
+        Version INTEGER PRIMARY KEY,
+        Name TEXT NOT NULL,
+        AppliedAt TEXT NOT NULL
+    );
+"""
+
+
+@dataclass(frozen=True)
+class Migration:
+    """A single versioned SQL migration file."""
+
+    version: int
+    name: str
+    path: Path
+
+    def read(self) -> str:
+        return self.path.read_text(encoding="utf-8")
+
+
+def discover_migrations(directory: str) -> List[Migration]:
+    """
+    Lists the migration files in a directory, ordered by version.
+
+    Files must be named `<version>_<name>.sql`, e.g. `0001_hot_query_indexes.sql`.
+
+    Args:
+        directory (str): Directory containing the migration files.
+
+    Returns:
+        List[Migration]: Migrations sorted by ascending version.
+
+    Raises:
+        ValueError: If two files share the same version number.
+    """
+    migrations = {}
+    for path in sorted(Path(directory).glob("*.sql")):
+        match = MIGRATION_FILE_PATTERN.match(path.name)
+        if not match:
+            logger.warning(f"Ignoring migration file with unexpected name: {path.name}")
+            continue
+        version = int(match.group("version"))
+        if version in migrations:
+            raise ValueError(
+                f"Duplicate migration version {version}: {migrations[version].path.name} and {path.name}"
+            )
+        migrations[version] = Migration(version, match.group("name"), path)
+    return [migrations[version] for version in sorted(migrations)]
+
+
+class MigrationRunner:
+    """Applies pending migrations in version order and records them in `schema_migrations`."""
+
+    def __init__(self, migrations_path: str):
+        self.migrations_path = migrations_path
+
+    def current_version(self, conn: sqlite3.Connection) -> int:
+        """Returns the highest applied migration version, or 0 for a fresh database."""
+        conn.executescript(SCHEMA_VERSION_TABLE)
+        row = conn.execute("SELECT MAX(Version) FROM schema_migrations").fetchone()
+        return row[0] or 0
+
+    def pending(self, conn: sqlite3.Connection) -> List[Migration]:
+        """Returns the migrations that have not been applied yet."""
+        version = self.current_version(conn)
+        return [m for m in discover_migrations(self.migrations_path) if m.version > version]
+
+    def apply(self, conn: sqlite3.Connection, target: Optional[int] = None) -> List[Migration]:
+        """
+        Applies pending migrations, each in its own transaction.
+
+        Args:
+            conn (sqlite3.Connection): Connection to the database to migrate.
+            target (Optional[int]): Stop after this version. Applies everything when None.
+
+        Returns:
+            List[Migration]: The migrations that were applied.
+        """
+        applied = []
+        for migration in self.pending(conn):
+            if target is not None and migration.version > target:
+                break
+            # executescript commits any open transaction first, so the migration
+            # and its bookkeeping row are wrapped in an explicit one.
+            script = (
+                "BEGIN;\n"
+                f"{migration.read()}\n;\n"
+                "INSERT INTO schema_migrations (Version, Name, AppliedAt) "
+                f"VALUES ({migration.version}, '{migration.name}', '{datetime.now().isoformat()}');\n"
+                "COMMIT;"
+            )
+            try:
+                conn.executescript(script)
+            except sqlite3.Error:
+                if conn.in_transaction:
+                    conn.rollback()
+                logger.error(f"Migration {migration.version} ({migration.name}) failed")
+                raise
+            logger.info(f"Applied migration {migration.version}: {migration.name}")
+            applied.append(migration)
+
+        if applied:
+            conn.execute("PRAGMA optimize")
+        return applied
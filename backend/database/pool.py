@@ -0,0 +1,261 @@
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+import logging
+import threading
+import time
+from typing import Deque, Dict, Generator, Optional
+
+import sqlite3
+
+from backend.database.config import DatabaseConfig
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes available within the pool timeout."""
+
+
+@dataclass
+class PoolStats:
+    """Point-in-time counters for a connection pool."""
+
+    db_path: str
+    max_size: int
+    open_connections: int
+    idle_connections: int
+    in_use_connections: int
+    created: int
+    acquisitions: int
+    reuses: int
+    waits: int
+    total_wait_seconds: float
+    max_wait_seconds: float
+
+
+class ConnectionPool:
+    """
+    Bounded, thread-aware pool of pragma-tuned SQLite connections.
+
+    Connections are configured once when they are opened and then handed out
+    again on later acquisitions, so the page cache and memory map stay warm.
+    A thread that already holds a connection gets the same connection back
+    for nested acquisitions instead of taking a second slot from the pool.
+    """
+
+    def __init__(self, config: DatabaseConfig):
+        self.config = config
+        self.max_size = max(1, config.pool_size)
+        self.timeout = config.pool_timeout
+
+        self._idle: Deque[sqlite3.Connection] = deque()
+        self._open = 0
+        self._closed = False
+        self._condition = threading.Condition(threading.Lock())
+        self._local = threading.local()
+
+        self._created = 0
+        self._acquisitions = 0
+        self._reuses = 0
+        self._waits = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _connect(self) -> sqlite3.Connection:
+        """Opens a new connection and applies the configured pragmas."""
+        conn = sqlite3.connect(
+            self.config.db_path,
+            timeout=self.config.busy_timeout_ms / 1000,
+            check_same_thread=False,
+        )
+        conn.row_factory = sqlite3.Row
+        # Only read here: setting the journal mode changes the file, see `set_journal_mode`
+        journal_mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        if journal_mode.lower() != self.config.journal_mode.lower():
+            logger.debug(f"{self.config.db_path} uses journal mode {journal_mode}, not {self.config.journal_mode}")
+        conn.execute(f"PRAGMA synchronous = {self.config.synchronous}")
+        conn.execute(f"PRAGMA mmap_size = {int(self.config.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = {int(self.config.cache_size)}")
+        conn.execute(f"PRAGMA busy_timeout = {int(self.config.busy_timeout_ms)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        return conn
+
+    def set_journal_mode(self) -> str:
+        """
+        Switches the database file to the configured journal mode.
+
+        The journal mode is stored in the file itself (WAL also adds -wal and -shm files
+        next to it), so this belongs to setup steps that write the database anyway.
+
+        Returns:
+            str: The journal mode now in effect.
+        """
+        with self.connection() as conn:
+            journal_mode = conn.execute(f"PRAGMA journal_mode = {self.config.journal_mode}").fetchone()[0]
+        logger.info(f"{self.config.db_path} uses journal mode {journal_mode}")
+        return journal_mode
+
+    def acquire(self) -> sqlite3.Connection:
+        """
+        Takes a connection from the pool, opening one if the pool is not yet full.
+
+        Returns:
+            sqlite3.Connection: A configured connection owned by the calling thread.
+
+        Raises:
+            PoolTimeoutError: If the pool is exhausted for longer than the pool timeout.
+        """
+        held = getattr(self._local, "conn", None)
+        if held is not None:
+            self._local.depth += 1
+            return held
+
+        waited = 0.0
+        with self._condition:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Connection pool is closed")
+            start = time.perf_counter()
+            while not self._idle and self._open >= self.max_size:
+                remaining = self.timeout - (time.perf_counter() - start)
+                if remaining <= 0:
+                    raise PoolTimeoutError(
+                        f"Timed out after {self.timeout}s waiting for a connection to {self.config.db_path}"
+                    )
+                self._condition.wait(remaining)
+            waited = time.perf_counter() - start
+
+            self._acquisitions += 1
+            if waited > 0.001:
+                self._waits += 1
+                self._total_wait += waited
+                self._max_wait = max(self._max_wait, waited)
+
+            if self._idle:
+                conn = self._idle.pop()
+                self._reuses += 1
+            else:
+                conn = None
+                self._open += 1
+
+        if conn is None:
+            try:
+                conn = self._connect()
+            except Exception:
+                with self._condition:
+                    self._open -= 1
+                    self._condition.notify()
+                raise
+            with self._condition:
+                self._created += 1
+
+        self._local.conn = conn
+        self._local.depth = 1
+        return conn
+
+    def release(self, conn: sqlite3.Connection) -> None:
+        """
+        Returns a connection to the pool.
+
+        Any transaction the caller left open is rolled back, matching the old
+        behaviour where uncommitted work was discarded when the connection closed.
+        """
+        if getattr(self._local, "conn", None) is conn:
+            self._local.depth -= 1
+            if self._local.depth > 0:
+                return
+            self._local.conn = None
+
+        healthy = True
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error as e:
+            logger.warning(f"Discarding pooled connection after failed rollback: {e}")
+            healthy = False
+
+        with self._condition:
+            if healthy and not self._closed:
+                self._idle.append(conn)
+            else:
+                self._open -= 1
+                conn.close()
+            self._condition.notify()
+
+    @contextmanager
+    def connection(self) -> Generator[sqlite3.Connection, None, None]:
+        """Context manager that acquires a connection and always releases it."""
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def stats(self) -> PoolStats:
+        """Returns a snapshot of the pool size, wait time and reuse counters."""
+        with self._condition:
+            return PoolStats(
+                db_path=self.config.db_path,
+                max_size=self.max_size,
+                open_connections=self._open,
+                idle_connections=len(self._idle),
+                in_use_connections=self._open - len(self._idle),
+                created=self._created,
+                acquisitions=self._acquisitions,
+                reuses=self._reuses,
+                waits=self._waits,
+                total_wait_seconds=round(self._total_wait, 6),
+                max_wait_seconds=round(self._max_wait, 6),
+            )
+
+    def close(self) -> None:
+        """Closes idle connections; connections still in use are closed when released."""
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                self._idle.pop().close()
+                self._open -= 1
+            self._condition.notify_all()
+
+
+_pools: Dict[str, ConnectionPool] = {}
+# Holders of each shared pool; the pool is closed when the last one releases it
+_pool_refs: Dict[str, int] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(config: DatabaseConfig) -> ConnectionPool:
+    """
+    Returns the process-wide pool for a database file, creating it on first use.
+
+    Every DatabaseManager pointing at the same file shares one pool, so the
+    routers and the agent tools do not each hold their own set of connections.
+    Each call counts as one holder of the pool; hand it back with `release_pool`
+    instead of closing it, so other holders keep working.
+    """
+    with _pools_lock:
+        pool: Optional[ConnectionPool] = _pools.get(config.db_path)
+        if pool is None or pool.closed:
+            pool = ConnectionPool(config)
+            _pools[config.db_path] = pool
+            _pool_refs[config.db_path] = 0
+        _pool_refs[config.db_path] += 1
+        return pool
+
+
+def release_pool(pool: ConnectionPool) -> None:
+    """Drops one holder of a shared pool, closing the pool when it was the last one."""
+    db_path = pool.config.db_path
+    with _pools_lock:
+        if _pools.get(db_path) is not pool:
+            return
+        _pool_refs[db_path] -= 1
+        if _pool_refs[db_path] > 0:
+            return
+        del _pools[db_path]
+        del _pool_refs[db_path]
+    pool.close()
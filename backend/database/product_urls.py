@@ -0,0 +1,76 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+import sqlite3
+
+# Synced URLs are only replaced by another sync; learned ones by anything newer.
+UPSERT_PRODUCT_URL = """
+    INSERT INTO product_urls (ProductName, ProductId, Url, StoreProductId, Source, UpdatedAt)
+    VALUES (?, (SELECT MAX(ProductId) FROM products WHERE ProductName = ?), ?, ?, ?, ?)
+    ON CONFLICT (ProductName) DO UPDATE SET
+        ProductId = COALESCE(excluded.ProductId, product_urls.ProductId),
+        Url = excluded.Url,
+        StoreProductId = COALESCE(excluded.StoreProductId, product_urls.StoreProductId),
+        Source = excluded.Source,
+        UpdatedAt = excluded.UpdatedAt
+    WHERE excluded.Source = 'sync' OR product_urls.Source = 'search';
+"""
+
+
+@dataclass(frozen=True)
+class ProductUrl:
+    """Where a product lives on the storefront."""
+
+    product_name: str
+    url: str
+    store_product_id: Optional[str]
+    source: str
+
+
+def product_url_key(product_name: str) -> str:
+    """Normalizes a product name the way the products table stores it."""
+    return product_name.strip().lower()
+
+
+def product_url_params(product_name: str, url: str, store_product_id: Optional[str], source: str) -> tuple:
+    """Returns the parameters of UPSERT_PRODUCT_URL for one product."""
+    key = product_url_key(product_name)
+    store_id = None if store_product_id is None else str(store_product_id)
+    return (key, key, url, store_id, source, datetime.now().isoformat())
+
+
+def lookup_product_url(conn: sqlite3.Connection, product_name: str) -> Optional[ProductUrl]:
+    """Returns the known storefront URL of a product, or None."""
+    row = conn.execute(
+        "SELECT ProductName, Url, StoreProductId, Source FROM product_urls WHERE ProductName = ?",
+        (product_url_key(product_name),),
+    ).fetchone()
+    if row is None:
+        return None
+    return ProductUrl(row["ProductName"], row["Url"], row["StoreProductId"], row["Source"])
+
+
+def remember_product_url(
+    conn: sqlite3.Connection,
+    product_name: str,
+    url: str,
+    store_product_id: Optional[str] = None,
+    source: str = "search",
+) -> None:
+    """
+    Records the storefront URL of a product.
+
+    Args:
+        conn (sqlite3.Connection): Connection to write with; the caller commits.
+        product_name (str): The product's catalog name.
+        url (str): Canonical product page URL.
+        store_product_id (Optional[str]): The storefront's own product id, when known.
+        source (str): 'sync' for catalog data, 'search' for URLs learned from searches.
+    """
+    conn.execute(UPSERT_PRODUCT_URL, product_url_params(product_name, url, store_product_id, source))
+
+
+def forget_product_url(conn: sqlite3.Connection, product_name: str) -> None:
+    """Removes a URL that turned out to be stale; the caller commits."""
+    conn.execute("DELETE FROM product_urls WHERE ProductName = ?", (product_url_key(product_name),))
@@ -2,6 +2,7 @@ from fastapi import APIRouter, HTTPException
 from models import Product
 from backend.database.db_manager import DatabaseManager
 from backend.database.config import DEFAULT_CONFIG
+from backend.database.catalog_version import notify_catalog_changed
 
 router = APIRouter()
 
@@ -44,6 +45,7 @@ def add_product(product: Product):
                 product.Quantity,
             ))
             conn.commit()
+            notify_catalog_changed()
             product_id = cursor.lastrowid
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error adding product: {e}")
@@ -71,6 +73,7 @@ def update_product(product_id: int, product: Product):
                 product_id,
             ))
             conn.commit()
+            notify_catalog_changed()
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error updating product: {e}")
     return {"message": "Product updated successfully", "ProductId": product_id}
@@ -85,6 +88,7 @@ def delete_product(product_id: int):
         try:
             cursor.execute("DELETE FROM products WHERE ProductId = ?", (product_id,))
             conn.commit()
+            notify_catalog_changed()
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Error deleting product: {e}")
     return {"message": "Product deleted successfully", "ProductId": product_id}
@@ -0,0 +1,348 @@
+import atexit
+from contextlib import contextmanager
+from dataclasses import dataclass
+import logging
+import threading
+import time
+from typing import Any, Callable, Iterator, List, Optional, Sequence
+
+from backend.sales_agent.page_load import DEFAULT_BLOCKED_HOSTS, apply_lightweight_options, block_asset_urls
+
+logger = logging.getLogger(__name__)
+
+# Chrome keeps a lock on its user-data-dir, so a profile can back at most one driver at a time
+NO_PROFILE = ""
+
+
+class BrowserPoolTimeoutError(TimeoutError):
+    """Raised when no browser session becomes available within the borrow timeout."""
+
+
+@dataclass
+class BrowserPoolStats:
+    """Counters and current occupancy of a BrowserPool."""
+
+    max_drivers: int
+    in_use: int
+    idle: int
+    launched: int
+    borrows: int
+    recycled: int
+    evicted: int
+    unhealthy: int
+
+
+@dataclass
+class _PooledDriver:
+    driver: Any
+    profile: str
+    uses: int = 0
+    last_used: float = 0.0
+
+
+def chrome_driver_factory(
+    headless: bool = True,
+    lightweight: bool = False,
+    blocked_hosts: Sequence[str] = DEFAULT_BLOCKED_HOSTS,
+) -> Callable[[Optional[str]], Any]:
+    """
+    Returns a factory launching Chrome on the given profile directory.
+
+    Args:
+        headless (bool): Run without a window.
+        lightweight (bool): Skip images, fonts and `blocked_hosts`, and return from page
+            loads once the DOM is ready (see page_load.py).
+        blocked_hosts (Sequence[str]): Host patterns blocked in lightweight mode.
+    """
+
+    def launch(profile_dir: Optional[str]) -> Any:
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+
+        chrome_options = Options()
+        if headless:
+            chrome_options.add_argument("--headless=new")
+        chrome_options.add_argument("--disable-dev-shm-usage")
+        chrome_options.add_argument("--window-size=1280,1024")
+        if lightweight:
+            apply_lightweight_options(chrome_options, blocked_hosts)
+        if profile_dir:
+            chrome_options.add_argument(f"--user-data-dir={profile_dir}")
+        driver = webdriver.Chrome(options=chrome_options)
+        if lightweight:
+            block_asset_urls(driver)
+        return driver
+
+    return launch
+
+
+class BrowserPool:
+    """
+    Bounded pool of reusable WebDriver sessions.
+
+    At most `max_drivers` browsers run at once. A borrowed session is returned to the pool
+    instead of being quit, health-checked before it is handed out again, recycled after
+    `max_uses` borrows and quit once it has been idle for `idle_timeout` seconds. Sessions
+    are keyed by Chrome profile directory, since Chrome allows one browser per profile.
+    """
+
+    def __init__(
+        self,
+        max_drivers: int = 2,
+        max_uses: int = 50,
+        idle_timeout: float = 300.0,
+        borrow_timeout: float = 60.0,
+        driver_factory: Optional[Callable[[Optional[str]], Any]] = None,
+        headless: bool = True,
+    ):
+        self.max_drivers = max_drivers
+        self.max_uses = max_uses
+        self.idle_timeout = idle_timeout
+        self.borrow_timeout = borrow_timeout
+        self.driver_factory = driver_factory or chrome_driver_factory(headless)
+
+        self._idle: List[_PooledDriver] = []
+        self._in_use: List[_PooledDriver] = []
+        self._condition = threading.Condition()
+        self._closed = False
+        self._reaper: Optional[threading.Thread] = None
+
+        self._launched = 0
+        self._borrows = 0
+        self._recycled = 0
+        self._evicted = 0
+        self._unhealthy = 0
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+    def _profile_busy(self, profile: str) -> bool:
+        return profile != NO_PROFILE and any(pooled.profile == profile for pooled in self._in_use)
+
+    def acquire(self, profile_dir: Optional[str] = None) -> Any:
+        """
+        Borrows a browser session for `profile_dir`, launching one if needed.
+
+        Args:
+            profile_dir (Optional[str]): Chrome user-data-dir the session must use. None for
+                a throwaway profile.
+
+        Returns:
+            Any: A WebDriver; hand it back with `release`.
+
+        Raises:
+            BrowserPoolTimeoutError: If no session is available within `borrow_timeout` seconds.
+        """
+        profile = profile_dir or NO_PROFILE
+        deadline = time.monotonic() + self.borrow_timeout
+        while True:
+            victims: List[_PooledDriver] = []
+            with self._condition:
+                while True:
+                    if self._closed:
+                        raise RuntimeError("Browser pool is closed")
+                    self._start_reaper()
+                    pooled = self._take_idle(profile)
+                    if pooled is not None:
+                        break
+                    if not self._profile_busy(profile):
+                        if len(self._idle) + len(self._in_use) >= self.max_drivers and self._idle:
+                            # Make room by quitting the least recently used idle session of another profile
+                            victim = min(self._idle, key=lambda p: p.last_used)
+                            self._idle.remove(victim)
+                            self._evicted += 1
+                            victims.append(victim)
+                        if len(self._idle) + len(self._in_use) < self.max_drivers:
+                            pooled = _PooledDriver(driver=None, profile=profile)
+                            self._in_use.append(pooled)
+                            break
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise BrowserPoolTimeoutError(
+                            f"No browser session available within {self.borrow_timeout}s "
+                            f"({len(self._in_use)}/{self.max_drivers} in use)"
+                        )
+                    self._condition.wait(remaining)
+
+            # WebDriver round trips can take seconds (or hang on a wedged Chrome), so health
+            # checks and quits run outside the lock; the taken session is already reserved
+            for victim in victims:
+                self._quit(victim)
+            if pooled.driver is None or self._healthy(pooled.driver):
+                break
+            with self._condition:
+                self._in_use.remove(pooled)
+                self._unhealthy += 1
+                self._condition.notify_all()
+            self._quit(pooled)
+
+        with self._condition:
+            self._borrows += 1
+
+        if pooled.driver is None:
+            # Launch outside the lock; the reserved slot already counts against max_drivers
+            try:
+                pooled.driver = self.driver_factory(profile_dir)
+            except Exception:
+                with self._condition:
+                    self._in_use.remove(pooled)
+                    self._condition.notify_all()
+                raise
+            with self._condition:
+                self._launched += 1
+            logger.info(f"Launched browser session ({profile or 'no profile'})")
+        return pooled.driver
+
+    def _take_idle(self, profile: str) -> Optional[_PooledDriver]:
+        """Moves an idle session of `profile` to the borrowed list; the caller health-checks it."""
+        pooled = next((p for p in self._idle if p.profile == profile), None)
+        if pooled is not None:
+            self._idle.remove(pooled)
+            self._in_use.append(pooled)
+        return pooled
+
+    @staticmethod
+    def _healthy(driver: Any) -> bool:
+        try:
+            driver.execute_script("return 1")
+            return True
+        except Exception:
+            return False
+
+    def release(self, driver: Any, discard: bool = False) -> None:
+        """
+        Returns a borrowed session to the pool.
+
+        Args:
+            driver (Any): The WebDriver returned by `acquire`.
+            discard (bool): Quit the session instead of keeping it, e.g. after an error left
+                it in an unknown state.
+        """
+        with self._condition:
+            pooled = next((p for p in self._in_use if p.driver is driver), None)
+            if pooled is None:
+                return
+            self._in_use.remove(pooled)
+            pooled.uses += 1
+            pooled.last_used = time.monotonic()
+            retire = discard or self._closed or pooled.uses >= self.max_uses
+            if retire:
+                if not discard and not self._closed:
+                    self._recycled += 1
+            else:
+                self._idle.append(pooled)
+            self._condition.notify_all()
+        if retire:
+            self._quit(pooled)
+
+    @contextmanager
+    def session(self, profile_dir: Optional[str] = None) -> Iterator[Any]:
+        """Borrows a session for the duration of a `with` block."""
+        driver = self.acquire(profile_dir)
+        discard = False
+        try:
+            yield driver
+        except Exception:
+            # Keep the session only if the browser itself survived the failure
+            discard = not self._healthy(driver)
+            raise
+        finally:
+            self.release(driver, discard=discard)
+
+    def has_session(self, profile_dir: str) -> bool:
+        """Whether a pooled session (borrowed or idle) is using `profile_dir`."""
+        with self._condition:
+            return any(pooled.profile == profile_dir for pooled in self._in_use + self._idle)
+
+    def close_profile(self, profile_dir: str, timeout: Optional[float] = None) -> None:
+        """
+        Quits the pooled session using `profile_dir`, waiting for it to be returned if borrowed.
+
+        Needed before another Chrome (e.g. a visible checkout window) opens the same profile.
+        """
+        deadline = time.monotonic() + (self.borrow_timeout if timeout is None else timeout)
+        with self._condition:
+            while self._profile_busy(profile_dir):
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise BrowserPoolTimeoutError(f"Browser session for {profile_dir} was not returned in time")
+                self._condition.wait(remaining)
+            closing = [p for p in self._idle if p.profile == profile_dir]
+            for pooled in closing:
+                self._idle.remove(pooled)
+            self._condition.notify_all()
+        for pooled in closing:
+            self._quit(pooled)
+
+    def evict_idle(self) -> int:
+        """Quits sessions idle for longer than `idle_timeout`. Returns how many were quit."""
+        now = time.monotonic()
+        with self._condition:
+            expired = [p for p in self._idle if now - p.last_used >= self.idle_timeout]
+            for pooled in expired:
+                self._idle.remove(pooled)
+                self._evicted += 1
+            if expired:
+                self._condition.notify_all()
+        for pooled in expired:
+            self._quit(pooled)
+        return len(expired)
+
+    def _start_reaper(self) -> None:
+        if self._reaper is None:
+            self._reaper = threading.Thread(target=self._reap, name="browser-pool-reaper", daemon=True)
+            self._reaper.start()
+
+    def _reap(self) -> None:
+        while not self._closed:
+            time.sleep(max(self.idle_timeout / 2, 1.0))
+            self.evict_idle()
+
+    @staticmethod
+    def _quit(pooled: _PooledDriver) -> None:
+        try:
+            pooled.driver.quit()
+        except Exception as e:
+            logger.warning(f"Error quitting browser session ({pooled.profile or 'no profile'}): {e}")
+
+    def stats(self) -> BrowserPoolStats:
+        """Returns the pool counters and current occupancy."""
+        with self._condition:
+            return BrowserPoolStats(
+                max_drivers=self.max_drivers,
+                in_use=len(self._in_use),
+                idle=len(self._idle),
+                launched=self._launched,
+                borrows=self._borrows,
+                recycled=self._recycled,
+                evicted=self._evicted,
+                unhealthy=self._unhealthy,
+            )
+
+    def close(self) -> None:
+        """Quits all idle sessions; borrowed ones are quit when returned."""
+        with self._condition:
+            self._closed = True
+            closing, self._idle = self._idle, []
+            self._condition.notify_all()
+        for pooled in closing:
+            self._quit(pooled)
+
+
+_pool_lock = threading.Lock()
+_pool: Optional[BrowserPool] = None
+
+
+def get_browser_pool(**kwargs: Any) -> BrowserPool:
+    """
+    Returns the process-wide BrowserPool, creating it with `kwargs` on first use.
+
+    The pool's sessions are quit when the process exits.
+    """
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool.closed:
+            _pool = BrowserPool(**kwargs)
+            atexit.register(_pool.close)
+        return _pool
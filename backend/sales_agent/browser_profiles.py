@@ -0,0 +1,233 @@
+"""
+Isolated Chrome profiles per chat session.
+
+Chrome locks its user-data-dir, so sessions sharing one profile serialize on it. The
+ProfileManager gives every session (LangGraph thread_id) its own profile, cloned from a
+small template, and deletes profiles that have not been used for `ttl_seconds` on a
+background thread. A profile is never deleted while a Chrome holds it open.
+
+Usage:
+    python -m backend.sales_agent.browser_profiles template --from frontend/profile --to <template dir>
+"""
+import argparse
+import hashlib
+import logging
+import os
+from pathlib import Path
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterable, Optional, Sequence
+
+logger = logging.getLogger(__name__)
+
+LAST_USED_MARKER = ".last_used"
+
+# Created by Chrome in its user-data-dir while it runs
+CHROME_LOCK = "SingletonLock"
+
+# How long a pinned profile counts as in use before its Chrome has created CHROME_LOCK
+PIN_GRACE_SECONDS = 120.0
+
+# Profile files worth keeping in a template: settings and first-run state, but no caches,
+# history, cookies or other per-user data.
+TEMPLATE_FILES = (
+    "First Run",
+    "Local State",
+    "Default/Preferences",
+    "Default/Secure Preferences",
+)
+
+
+def build_template(source_profile: str, template_dir: str, files: Iterable[str] = TEMPLATE_FILES) -> None:
+    """
+    Creates a minimal template profile from an existing Chrome profile.
+
+    Args:
+        source_profile (str): A Chrome user-data-dir, e.g. frontend/profile.
+        template_dir (str): Where to write the template. Replaced if it exists.
+        files (Iterable[str]): Paths, relative to the profile, to copy when present.
+    """
+    target = Path(template_dir)
+    tmp = target.with_name(f"{target.name}.tmp-{uuid.uuid4().hex}")
+    tmp.mkdir(parents=True)
+    for relative in files:
+        source = Path(source_profile) / relative
+        if source.is_file():
+            (tmp / relative).parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(source, tmp / relative)
+    (tmp / "First Run").touch()
+    if target.exists():
+        shutil.rmtree(target)
+    os.replace(tmp, target)
+    logger.info(f"Built template profile {template_dir} from {source_profile}")
+
+
+def _clone_tree(source: Path, target: Path) -> None:
+    """Copies a directory tree, sharing blocks copy-on-write where the filesystem supports it."""
+    if sys.platform.startswith("linux") and shutil.which("cp"):
+        subprocess.run(["cp", "-a", "--reflink=auto", str(source), str(target)], check=True)
+    else:
+        shutil.copytree(source, target, symlinks=True)
+
+
+class ProfileManager:
+    """
+    Hands out one Chrome profile directory per session id.
+
+    Profiles are cloned from `template_dir` (an empty profile when it does not exist) on
+    first use. Profiles not used for `ttl_seconds` are garbage-collected on a background
+    thread, at most once per `gc_interval` seconds. A profile is kept while `in_use` reports
+    it busy, while a Chrome holds its lock, or while it is pinned for a browser the pool does
+    not know about (see `pin`).
+    """
+
+    def __init__(
+        self,
+        root_dir: str,
+        template_dir: Optional[str] = None,
+        ttl_seconds: float = 24 * 3600,
+        gc_interval: float = 600.0,
+        in_use: Optional[Callable[[str], bool]] = None,
+    ):
+        self.root = Path(root_dir)
+        self.template = Path(template_dir) if template_dir else None
+        self.ttl_seconds = ttl_seconds
+        self.gc_interval = gc_interval
+        self.in_use = in_use or (lambda profile_dir: False)
+
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._last_gc = 0.0
+        self._gc_thread: Optional[threading.Thread] = None
+        # Profile dir -> when it was pinned
+        self._pinned: Dict[str, float] = {}
+
+    def path_for(self, session_id: str) -> Path:
+        """Returns the profile directory of `session_id` without creating it."""
+        readable = re.sub(r"[^A-Za-z0-9_-]", "", session_id)[:32]
+        digest = hashlib.sha256(session_id.encode("utf-8")).hexdigest()[:12]
+        return self.root / f"{readable}-{digest}"
+
+    def profile_for(self, session_id: str) -> str:
+        """
+        Returns the profile directory for a session, cloning the template on first use.
+
+        Args:
+            session_id (str): The chat session, e.g. the LangGraph thread_id.
+
+        Returns:
+            str: Path to pass as Chrome's --user-data-dir.
+        """
+        path = self.path_for(session_id)
+        # Under the lock, so garbage collection cannot delete the profile between the check and the touch
+        with self._lock:
+            if not path.exists():
+                self._create(path)
+            (path / LAST_USED_MARKER).touch()
+
+        self._schedule_gc()
+        return str(path)
+
+    def pin(self, profile_dir: str) -> None:
+        """
+        Keeps a profile from being collected while a browser outside the pool uses it.
+
+        Meant for detached windows such as the visible checkout Chrome: the pin lasts as
+        long as that Chrome holds the profile lock (after a short grace period for startup).
+        """
+        with self._lock:
+            self._pinned[profile_dir] = time.monotonic()
+
+    def _busy(self, path: Path) -> bool:
+        profile_dir = str(path)
+        if os.path.lexists(path / CHROME_LOCK) or self.in_use(profile_dir):
+            return True
+        pinned_at = self._pinned.get(profile_dir)
+        if pinned_at is None:
+            return False
+        if time.monotonic() - pinned_at < PIN_GRACE_SECONDS:
+            return True
+        # The pinned browser was closed
+        del self._pinned[profile_dir]
+        return False
+
+    def _schedule_gc(self) -> None:
+        """Starts a garbage collection on a background thread when one is due."""
+        with self._lock:
+            if time.monotonic() - self._last_gc < self.gc_interval:
+                return
+            if self._gc_thread is not None and self._gc_thread.is_alive():
+                return
+            self._last_gc = time.monotonic()
+            self._gc_thread = threading.Thread(target=self._collect_in_background, name="profile-gc", daemon=True)
+            self._gc_thread.start()
+
+    def _collect_in_background(self) -> None:
+        try:
+            self.collect_garbage()
+        except Exception:
+            logger.exception(f"Browser profile garbage collection in {self.root} failed")
+
+    def _create(self, path: Path) -> None:
+        tmp = path.with_name(f"{path.name}.tmp-{uuid.uuid4().hex}")
+        if self.template is not None and self.template.is_dir():
+            _clone_tree(self.template, tmp)
+        else:
+            tmp.mkdir(parents=True)
+            (tmp / "First Run").touch()
+        (tmp / LAST_USED_MARKER).touch()
+        os.replace(tmp, path)
+        logger.info(f"Created browser profile {path}")
+
+    def collect_garbage(self, now: Optional[float] = None) -> int:
+        """
+        Deletes profiles unused for longer than `ttl_seconds`, and leftovers of interrupted clones.
+
+        Returns:
+            int: The number of profiles deleted.
+        """
+        now = time.time() if now is None else now
+        self._last_gc = time.monotonic()
+        removed = 0
+        for path in list(self.root.iterdir()):
+            # The check and the delete happen under one lock hold, so a concurrent
+            # profile_for either refreshes the profile first or recreates it afterwards
+            with self._lock:
+                if not path.is_dir():
+                    continue
+                marker = path / LAST_USED_MARKER
+                last_used = marker.stat().st_mtime if marker.exists() else path.stat().st_mtime
+                if now - last_used < self.ttl_seconds or self._busy(path):
+                    continue
+                shutil.rmtree(path, ignore_errors=True)
+            removed += 1
+        if removed:
+            logger.info(f"Removed {removed} stale browser profile(s) from {self.root}")
+        return removed
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    template = subcommands.add_parser("template", help="Build a minimal template profile")
+    template.add_argument("--from", dest="source", required=True, help="Existing Chrome profile directory")
+    template.add_argument("--to", dest="target", required=True, help="Template directory to write")
+    gc = subcommands.add_parser("gc", help="Delete stale session profiles")
+    gc.add_argument("--root", required=True, help="Directory holding the session profiles")
+    gc.add_argument("--ttl", type=float, default=24 * 3600, help="Maximum idle age in seconds")
+    args = parser.parse_args(argv)
+
+    if args.command == "template":
+        build_template(args.source, args.target)
+    else:
+        ProfileManager(args.root, ttl_seconds=args.ttl).collect_garbage()
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
@@ -0,0 +1,215 @@
+"""
+HTTP-level storefront cart client.
+
+Adding a product to the cart through the storefront's JSON endpoints takes one search and
+one add request, instead of several page loads in a browser. Every chat session keeps its
+own cookie jar (and therefore its own storefront cart), persisted next to its Chrome
+profile so the cart can be handed over to a browser for checkout, and taken back from one
+after a Selenium fallback. All sessions share one HTTP connection pool.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+import json
+import logging
+import os
+from pathlib import Path
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+COOKIE_FILE = "http_cookies.json"
+
+NO_FREE_SHIPPING_INFO = "No free shipping information available."
+
+
+class CartClientError(Exception):
+    """Raised when the HTTP cart flow cannot complete; callers fall back to the browser."""
+
+    def __init__(self, message: str, status: Optional[int] = None):
+        super().__init__(message)
+        self.status = status
+
+
+@dataclass(frozen=True)
+class StoreEndpoints:
+    """
+    Storefront URLs used by the HTTP cart flow.
+
+    search_path answers `GET ?q=<text>` with `{"products": [{"id", "name", "url"}]}`.
+    add_path accepts `POST {"productId", "quantity"}` and answers with the cart,
+    `{"items": [...], "shipping": {"remaining_text"}}`.
+    """
+
+    base_url: str = "https://tershine.com"
+    search_path: str = "/api/search"
+    add_path: str = "/api/cart/add"
+    checkout_path: str = "/sv/checkout"
+
+    @classmethod
+    def from_env(cls) -> "StoreEndpoints":
+        return cls(
+            base_url=os.getenv("STORE_BASE_URL", cls.base_url),
+            search_path=os.getenv("STORE_SEARCH_PATH", cls.search_path),
+            add_path=os.getenv("STORE_CART_ADD_PATH", cls.add_path),
+            checkout_path=os.getenv("STORE_CHECKOUT_PATH", cls.checkout_path),
+        )
+
+    def url(self, path: str) -> str:
+        return urljoin(self.base_url, path)
+
+
+# One connection pool shared by every session's requests.Session
+_shared_adapter = HTTPAdapter(
+    pool_connections=4,
+    pool_maxsize=16,
+    max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=(502, 503, 504), allowed_methods=("GET",)),
+)
+
+
+class HttpCartClient:
+    """
+    Storefront cart of one chat session, driven over HTTP.
+
+    Args:
+        endpoints (StoreEndpoints): Storefront URLs.
+        cookie_path (Optional[str]): JSON file the session's cookies are persisted to.
+        timeout (float): Per-request timeout in seconds.
+    """
+
+    def __init__(self, endpoints: StoreEndpoints, cookie_path: Optional[str] = None, timeout: float = 5.0):
+        self.endpoints = endpoints
+        self.cookie_path = Path(cookie_path) if cookie_path else None
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.session.mount("https://", _shared_adapter)
+        self.session.mount("http://", _shared_adapter)
+        self.session.headers.update({"Accept": "application/json"})
+        self._lock = threading.Lock()
+        self._load_cookies()
+
+    def _load_cookies(self) -> None:
+        if self.cookie_path is None or not self.cookie_path.exists():
+            return
+        try:
+            cookies = json.loads(self.cookie_path.read_text(encoding="utf-8"))
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable cookie jar {self.cookie_path}: {e}")
+            return
+        self.import_cookies(cookies, save=False)
+
+    def _save_cookies(self) -> None:
+        if self.cookie_path is None:
+            return
+        self.cookie_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.cookie_path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(self.export_cookies()), encoding="utf-8")
+        os.replace(tmp, self.cookie_path)
+
+    def export_cookies(self) -> List[Dict[str, Any]]:
+        """Returns the session cookies in the format of Selenium's `get_cookies`/`add_cookie`."""
+        exported = []
+        for cookie in self.session.cookies:
+            entry = {
+                "name": cookie.name,
+                "value": cookie.value,
+                "domain": cookie.domain,
+                "path": cookie.path,
+                "secure": bool(cookie.secure),
+            }
+            if cookie.expires:
+                entry["expiry"] = int(cookie.expires)
+            exported.append(entry)
+        return exported
+
+    def import_cookies(self, cookies: List[Dict[str, Any]], save: bool = True) -> None:
+        """Replaces the session cookies with `cookies`, e.g. taken from a browser after a fallback."""
+        with self._lock:
+            self.session.cookies.clear()
+            for cookie in cookies:
+                self.session.cookies.set(
+                    cookie["name"],
+                    cookie["value"],
+                    domain=cookie.get("domain") or urlparse(self.endpoints.base_url).hostname,
+                    path=cookie.get("path", "/"),
+                    secure=cookie.get("secure", False),
+                    expires=cookie.get("expiry"),
+                )
+            if save:
+                self._save_cookies()
+
+    def _request(self, method: str, path: str, **kwargs: Any) -> Dict[str, Any]:
+        try:
+            response = self.session.request(method, self.endpoints.url(path), timeout=self.timeout, **kwargs)
+            response.raise_for_status()
+            return response.json()
+        except requests.HTTPError as e:
+            raise CartClientError(f"{method} {path} failed: {e}", status=e.response.status_code) from e
+        except (requests.RequestException, ValueError) as e:
+            raise CartClientError(f"{method} {path} failed: {e}") from e
+
+    def find_product(self, product_name: str) -> Dict[str, Any]:
+        """Returns the storefront product best matching `product_name`: an exact name match, else the first hit."""
+        products = self._request("GET", self.endpoints.search_path, params={"q": product_name}).get("products") or []
+        if not products:
+            raise CartClientError(f"No storefront product found for {product_name!r}")
+        wanted = product_name.strip().lower()
+        return next((p for p in products if str(p.get("name", "")).strip().lower() == wanted), products[0])
+
+    def add_to_cart(self, product_name: str, quantity: int = 1, product_id: Optional[str] = None) -> Tuple[str, str]:
+        """
+        Adds a product to the session's cart.
+
+        Args:
+            product_name (str): Product to add; looked up with the storefront search unless
+                `product_id` is given.
+            quantity (int): Number of items to add.
+            product_id (Optional[str]): Storefront product id, skipping the search.
+
+        Returns:
+            Tuple[str, str]: The free shipping information and the checkout URL, like the
+            browser flow.
+
+        Raises:
+            CartClientError: If a request fails or the storefront answers unexpectedly.
+        """
+        with self._lock:
+            if product_id is None:
+                product_id = self.find_product(product_name).get("id")
+                if product_id is None:
+                    raise CartClientError(f"Storefront search result for {product_name!r} has no id")
+            cart = self._request("POST", self.endpoints.add_path, json={"productId": product_id, "quantity": quantity})
+            if "items" not in cart:
+                raise CartClientError("Unexpected add-to-cart response: no items")
+            self._save_cookies()
+
+        shipping = (cart.get("shipping") or {}).get("remaining_text") or NO_FREE_SHIPPING_INFO
+        return shipping, self.endpoints.url(self.endpoints.checkout_path)
+
+
+_clients_lock = threading.Lock()
+_clients: "OrderedDict[str, HttpCartClient]" = OrderedDict()
+MAX_CLIENTS = 256
+
+
+def get_cart_client(profile_dir: str, endpoints: Optional[StoreEndpoints] = None) -> HttpCartClient:
+    """
+    Returns the HTTP cart client of the session whose Chrome profile is `profile_dir`.
+
+    Its cookies live in that profile directory, so they share the profile's lifetime.
+    """
+    with _clients_lock:
+        client = _clients.get(profile_dir)
+        if client is None:
+            client = HttpCartClient(endpoints or StoreEndpoints.from_env(), cookie_path=str(Path(profile_dir) / COOKIE_FILE))
+            _clients[profile_dir] = client
+            while len(_clients) > MAX_CLIENTS:
+                _clients.popitem(last=False)
+        else:
+            _clients.move_to_end(profile_dir)
+        return client
@@ -0,0 +1,268 @@
+from dataclasses import dataclass
+from functools import cached_property
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from backend.database.catalog_version import local_catalog_version, read_catalog_version
+from backend.database.db_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+PRODUCT_COLUMNS = "ProductId, ProductName, Category, Description, Price, Quantity"
+
+# Changed-id lists longer than this are fetched in several IN (...) queries
+MAX_SQL_PARAMS = 500
+
+
+class StringTable:
+    """Interns strings and maps each distinct value to a stable integer code."""
+
+    def __init__(self):
+        self._codes: Dict[str, int] = {}
+        self.strings: List[str] = []
+        self._lock = threading.Lock()
+
+    def code(self, value: str) -> int:
+        """Returns the code for `value`, assigning a new one on first sight."""
+        code = self._codes.get(value)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(value)
+                if code is None:
+                    code = len(self.strings)
+                    self.strings.append(value)
+                    self._codes[value] = code
+        return code
+
+    def lookup(self, value: str) -> Optional[int]:
+        """Returns the code for `value` without assigning one."""
+        return self._codes.get(value)
+
+    def __getitem__(self, code: int) -> str:
+        return self.strings[code]
+
+
+@dataclass(frozen=True)
+class CatalogSnapshot:
+    """Immutable columnar copy of the products table, ordered by ProductId."""
+
+    version: int
+    product_ids: np.ndarray
+    prices: np.ndarray
+    stock: np.ndarray
+    category_codes: np.ndarray
+    names: np.ndarray
+    descriptions: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.product_ids)
+
+    @cached_property
+    def in_stock(self) -> np.ndarray:
+        return self.stock > 0
+
+    @cached_property
+    def category_counts(self) -> np.ndarray:
+        """In-stock product count per category code."""
+        return np.bincount(self.category_codes[self.in_stock], minlength=1)
+
+
+class CatalogEngine:
+    """
+    In-process, vectorized catalog for agent product lookups.
+
+    Products are held as NumPy columns (price, stock, category codes) plus an
+    interned category string table, and filters are answered with boolean masks.
+    The snapshot tracks the catalog_changes version counter: writes in this process
+    (see `notify_catalog_changed`) are picked up on the next query, writes from other
+    processes within `refresh_interval` seconds, and only changed rows are re-read.
+    """
+
+    def __init__(self, db_manager: DatabaseManager, refresh_interval: float = 1.0):
+        self.db_manager = db_manager
+        self.refresh_interval = refresh_interval
+        self.categories = StringTable()
+
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._local_version = -1
+        self._checked_at = 0.0
+        self._refresh_lock = threading.Lock()
+
+    @property
+    def snapshot(self) -> CatalogSnapshot:
+        """The current snapshot, refreshed first if the catalog version may have moved."""
+        snapshot = self._snapshot
+        stale = (
+            snapshot is None
+            or self._local_version != local_catalog_version()
+            or time.monotonic() - self._checked_at >= self.refresh_interval
+        )
+        if stale:
+            # Only one thread refreshes; the others keep serving the current snapshot.
+            if self._refresh_lock.acquire(blocking=snapshot is None):
+                try:
+                    self.refresh()
+                finally:
+                    self._refresh_lock.release()
+        return self._snapshot
+
+    def refresh(self) -> CatalogSnapshot:
+        """
+        Brings the snapshot up to date with the database.
+
+        Returns:
+            CatalogSnapshot: The refreshed snapshot.
+        """
+        local_version = local_catalog_version()
+        with self.db_manager.get_connection() as conn:
+            # One read transaction, so the rows and the version are consistent.
+            conn.execute("BEGIN")
+            version, oldest = read_catalog_version(conn)
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.version < oldest - 1:
+                snapshot = self._load_full(conn, version)
+            elif version != snapshot.version:
+                snapshot = self._load_changes(conn, snapshot, version)
+            conn.rollback()
+
+        self._snapshot = snapshot
+        self._local_version = local_version
+        self._checked_at = time.monotonic()
+        return snapshot
+
+    def _build(self, version: int, rows: Iterable[Any]) -> CatalogSnapshot:
+        rows = list(rows)
+        return CatalogSnapshot(
+            version=version,
+            product_ids=np.fromiter((row["ProductId"] for row in rows), dtype=np.int64, count=len(rows)),
+            prices=np.fromiter((row["Price"] for row in rows), dtype=np.float64, count=len(rows)),
+            stock=np.fromiter((row["Quantity"] for row in rows), dtype=np.int64, count=len(rows)),
+            category_codes=np.fromiter(
+                (self.categories.code(row["Category"]) for row in rows), dtype=np.int32, count=len(rows)
+            ),
+            names=np.array([row["ProductName"] for row in rows], dtype=object),
+            descriptions=np.array([row["Description"] for row in rows], dtype=object),
+        )
+
+    def _load_full(self, conn, version: int) -> CatalogSnapshot:
+        rows = conn.execute(f"SELECT {PRODUCT_COLUMNS} FROM products ORDER BY ProductId").fetchall()
+        logger.info(f"Loaded {len(rows)} products into the catalog engine at version {version}")
+        return self._build(version, rows)
+
+    def _load_changes(self, conn, snapshot: CatalogSnapshot, version: int) -> CatalogSnapshot:
+        changed_ids = [
+            row[0]
+            for row in conn.execute(
+                "SELECT DISTINCT ProductId FROM catalog_changes WHERE Version > ?", (snapshot.version,)
+            )
+        ]
+        if len(changed_ids) > max(len(snapshot) // 2, MAX_SQL_PARAMS):
+            return self._load_full(conn, version)
+
+        rows = []
+        for start in range(0, len(changed_ids), MAX_SQL_PARAMS):
+            batch = changed_ids[start:start + MAX_SQL_PARAMS]
+            placeholders = ", ".join("?" * len(batch))
+            rows.extend(
+                conn.execute(f"SELECT {PRODUCT_COLUMNS} FROM products WHERE ProductId IN ({placeholders})", batch)
+            )
+        changes = self._build(version, rows)
+
+        # Drop every changed id (deleted rows simply do not come back), then merge in the fresh rows.
+        keep = ~np.isin(snapshot.product_ids, np.asarray(changed_ids, dtype=np.int64))
+        product_ids = np.concatenate([snapshot.product_ids[keep], changes.product_ids])
+        order = np.argsort(product_ids, kind="stable")
+        logger.debug(f"Applied {len(changed_ids)} product changes to the catalog engine (version {version})")
+        return CatalogSnapshot(
+            version=version,
+            product_ids=product_ids[order],
+            prices=np.concatenate([snapshot.prices[keep], changes.prices])[order],
+            stock=np.concatenate([snapshot.stock[keep], changes.stock])[order],
+            category_codes=np.concatenate([snapshot.category_codes[keep], changes.category_codes])[order],
+            names=np.concatenate([snapshot.names[keep], changes.names])[order],
+            descriptions=np.concatenate([snapshot.descriptions[keep], changes.descriptions])[order],
+        )
+
+    def search(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: bool = True,
+    ) -> List[Dict[str, Any]]:
+        """
+        Returns the products matching the filters, in ProductId order.
+
+        The filters have the same meaning as in `search_products`.
+        """
+        products, _ = self.search_page(category, min_price, max_price, in_stock=in_stock)
+        return products
+
+    def search_page(
+        self,
+        category: Optional[str] = None,
+        min_price: Optional[float] = None,
+        max_price: Optional[float] = None,
+        in_stock: bool = True,
+        limit: Optional[int] = None,
+        offset: int = 0,
+    ) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        Returns one page of matching products, in ProductId order, and the total match count.
+
+        Only the products on the page are materialized as dicts.
+        """
+        snapshot = self.snapshot
+        mask = snapshot.in_stock.copy() if in_stock else np.ones(len(snapshot), dtype=bool)
+        if category:
+            code = self.categories.lookup(category)
+            if code is None:
+                return [], 0
+            mask &= snapshot.category_codes == code
+        if min_price:
+            mask &= snapshot.prices >= min_price
+        if max_price:
+            mask &= snapshot.prices <= max_price
+
+        matches = np.flatnonzero(mask)
+        page = matches[offset:] if limit is None else matches[offset:offset + limit]
+        products = [
+            {
+                "product_id": str(snapshot.product_ids[i]),
+                "name": snapshot.names[i],
+                "category": self.categories[snapshot.category_codes[i]],
+                "description": snapshot.descriptions[i],
+                "price": float(snapshot.prices[i]),
+                "stock": int(snapshot.stock[i]),
+            }
+            for i in page
+        ]
+        return products, len(matches)
+
+    def category_counts(self) -> List[Dict[str, Any]]:
+        """Returns the in-stock product count per category, ordered by category name."""
+        counts = self.snapshot.category_counts
+        return sorted(
+            (
+                {"name": self.categories[code], "product_count": int(count)}
+                for code, count in enumerate(counts)
+                if count
+            ),
+            key=lambda category: category["name"],
+        )
+
+    def price_range(self) -> Dict[str, float]:
+        """Returns the min, max and average price over in-stock products."""
+        snapshot = self.snapshot
+        prices = snapshot.prices[snapshot.in_stock]
+        if not len(prices):
+            return {"min": 0.0, "max": 0.0, "average": 0.0}
+        return {
+            "min": float(prices.min()),
+            "max": float(prices.max()),
+            "average": round(float(prices.mean()), 2),
+        }
@@ -0,0 +1,599 @@
+"""
+Durable LangGraph checkpointer on SQLite.
+
+Checkpoints survive restarts and are shared by every agent process using the same
+database file (WAL mode, pooled connections). Storage stays proportional to the
+conversations rather than to the number of graph steps:
+
+- Channel values are stored per version, so a checkpoint only adds rows for the
+  channels that changed since its parent.
+- Message lists are stored as references into a per-thread message table, so each
+  message is written once instead of once per checkpoint.
+- A background compaction keeps the last `keep_last` checkpoints per thread, drops
+  blobs and messages no kept checkpoint references, and deletes threads idle for
+  longer than `ttl_seconds`.
+
+Usage:
+    python -m backend.sales_agent.checkpointer compact --db <path> [--keep-last 10] [--ttl 604800]
+"""
+import argparse
+from dataclasses import dataclass
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+from typing import Any, AsyncIterator, Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+import sqlite3
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import (
+    WRITES_IDX_MAP,
+    BaseCheckpointSaver,
+    ChannelVersions,
+    Checkpoint,
+    CheckpointMetadata,
+    CheckpointTuple,
+    SerializerProtocol,
+    get_checkpoint_id,
+    get_checkpoint_metadata,
+    writes_sort_key,
+)
+
+from backend.database.config import DatabaseConfig
+from backend.database.pool import ConnectionPool, get_pool
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS checkpoint_threads (
+        ThreadId TEXT PRIMARY KEY,
+        UpdatedAt REAL NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_checkpoint_threads_updated ON checkpoint_threads (UpdatedAt);
+
+    CREATE TABLE IF NOT EXISTS checkpoints (
+        ThreadId TEXT NOT NULL,
+        CheckpointNs TEXT NOT NULL,
+        CheckpointId TEXT NOT NULL,
+        ParentCheckpointId TEXT,
+        Type TEXT NOT NULL,
+        Checkpoint BLOB NOT NULL,
+        MetadataType TEXT NOT NULL,
+        Metadata BLOB NOT NULL,
+        ChannelVersions TEXT NOT NULL,
+        PRIMARY KEY (ThreadId, CheckpointNs, CheckpointId)
+    );
+
+    CREATE TABLE IF NOT EXISTS checkpoint_blobs (
+        ThreadId TEXT NOT NULL,
+        CheckpointNs TEXT NOT NULL,
+        Channel TEXT NOT NULL,
+        Version TEXT NOT NULL,
+        Type TEXT NOT NULL,
+        Value BLOB,
+        PRIMARY KEY (ThreadId, CheckpointNs, Channel, Version)
+    );
+
+    CREATE TABLE IF NOT EXISTS checkpoint_messages (
+        ThreadId TEXT NOT NULL,
+        CheckpointNs TEXT NOT NULL,
+        Digest TEXT NOT NULL,
+        Type TEXT NOT NULL,
+        Value BLOB NOT NULL,
+        PRIMARY KEY (ThreadId, CheckpointNs, Digest)
+    );
+
+    CREATE TABLE IF NOT EXISTS checkpoint_writes (
+        ThreadId TEXT NOT NULL,
+        CheckpointNs TEXT NOT NULL,
+        CheckpointId TEXT NOT NULL,
+        TaskId TEXT NOT NULL,
+        Idx INTEGER NOT NULL,
+        Channel TEXT NOT NULL,
+        Type TEXT NOT NULL,
+        Value BLOB,
+        TaskPath TEXT NOT NULL DEFAULT '',
+        PRIMARY KEY (ThreadId, CheckpointNs, CheckpointId, TaskId, Idx)
+    );
+"""
+
+# Blob type of a message list stored as digests into checkpoint_messages
+MESSAGE_REFS = "msgrefs"
+EMPTY = "empty"
+
+# Keeps `IN (...)` lists well below SQLite's parameter limit
+_IN_CHUNK = 500
+
+
+@dataclass
+class CompactionStats:
+    """What one compaction pass removed."""
+
+    threads_expired: int = 0
+    checkpoints_pruned: int = 0
+    blobs_removed: int = 0
+    messages_removed: int = 0
+    seconds: float = 0.0
+
+
+def _chunks(items: Sequence[Any], size: int = _IN_CHUNK) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(items), size):
+        yield items[start : start + size]
+
+
+def _is_message_list(value: Any) -> bool:
+    return isinstance(value, list) and bool(value) and all(isinstance(item, BaseMessage) for item in value)
+
+
+class SqliteCheckpointSaver(BaseCheckpointSaver[str]):
+    """
+    LangGraph checkpoint saver storing checkpoints in a SQLite database.
+
+    Args:
+        db_path (str): Database file; created with its schema if missing.
+        keep_last (int): Checkpoints kept per thread and namespace by compaction. At least 1.
+        ttl_seconds (Optional[float]): Threads not updated for this long are deleted by
+            compaction. None keeps threads forever.
+        compact_interval (Optional[float]): Seconds between background compactions of the
+            threads this process wrote to. None disables the background thread; call
+            `compact` yourself.
+        pool_size (int): Pooled connections to the database.
+        serde (Optional[SerializerProtocol]): Serializer for checkpoint values.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        keep_last: int = 10,
+        ttl_seconds: Optional[float] = 7 * 24 * 3600,
+        compact_interval: Optional[float] = 300.0,
+        pool_size: int = 4,
+        serde: Optional[SerializerProtocol] = None,
+    ):
+        super().__init__(serde=serde)
+        self.keep_last = max(1, keep_last)
+        self.ttl_seconds = ttl_seconds
+        self.compact_interval = compact_interval
+        self.pool: ConnectionPool = get_pool(DatabaseConfig(db_name="checkpoints", db_path=db_path, pool_size=pool_size))
+
+        self._dirty: Set[str] = set()
+        self._dirty_lock = threading.Lock()
+        self._compactor: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+
+        with self.pool.connection() as conn:
+            conn.executescript(CHECKPOINT_SCHEMA)
+        self.pool.set_journal_mode()
+
+    # -- writing -----------------------------------------------------------------------
+
+    def _message_refs(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, messages: List[BaseMessage]) -> Tuple[str, bytes]:
+        """Stores the messages not stored yet and returns the list as digests."""
+        digests = []
+        rows = []
+        for message in messages:
+            type_, value = self.serde.dumps_typed(message)
+            digest = hashlib.sha256(type_.encode("utf-8") + b"\0" + value).hexdigest()[:32]
+            digests.append(digest)
+            rows.append((thread_id, checkpoint_ns, digest, type_, value))
+        conn.executemany(
+            "INSERT OR IGNORE INTO checkpoint_messages (ThreadId, CheckpointNs, Digest, Type, Value) VALUES (?, ?, ?, ?, ?)",
+            rows,
+        )
+        return MESSAGE_REFS, json.dumps(digests).encode("utf-8")
+
+    def put(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        """Saves a checkpoint, writing only the channels with new versions."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        parent_id = config["configurable"].get("checkpoint_id")
+        stored = checkpoint.copy()
+        values: Dict[str, Any] = stored.pop("channel_values")  # type: ignore[misc]
+        checkpoint_type, checkpoint_value = self.serde.dumps_typed(stored)
+        metadata_type, metadata_value = self.serde.dumps_typed(get_checkpoint_metadata(config, metadata))
+
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for channel, version in new_versions.items():
+                if channel not in values:
+                    blob = (EMPTY, None)
+                elif _is_message_list(values[channel]):
+                    blob = self._message_refs(conn, thread_id, checkpoint_ns, values[channel])
+                else:
+                    blob = self.serde.dumps_typed(values[channel])
+                conn.execute(
+                    "INSERT OR REPLACE INTO checkpoint_blobs (ThreadId, CheckpointNs, Channel, Version, Type, Value) VALUES (?, ?, ?, ?, ?, ?)",
+                    (thread_id, checkpoint_ns, channel, str(version), *blob),
+                )
+            conn.execute(
+                """
+                INSERT OR REPLACE INTO checkpoints
+                    (ThreadId, CheckpointNs, CheckpointId, ParentCheckpointId, Type, Checkpoint, MetadataType, Metadata, ChannelVersions)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    thread_id,
+                    checkpoint_ns,
+                    checkpoint["id"],
+                    parent_id,
+                    checkpoint_type,
+                    checkpoint_value,
+                    metadata_type,
+                    metadata_value,
+                    json.dumps({channel: str(version) for channel, version in checkpoint["channel_versions"].items()}),
+                ),
+            )
+            self._touch(conn, thread_id)
+            conn.commit()
+
+        with self._dirty_lock:
+            self._dirty.add(thread_id)
+        self._start_compactor()
+        return {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint["id"]}}
+
+    def put_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Saves the pending writes of a task against a checkpoint."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = config["configurable"]["checkpoint_id"]
+        rows = []
+        for idx, (channel, value) in enumerate(writes):
+            type_, blob = self.serde.dumps_typed(value)
+            rows.append((thread_id, checkpoint_ns, checkpoint_id, task_id, WRITES_IDX_MAP.get(channel, idx), channel, type_, blob, task_path))
+
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            for row in rows:
+                # Regular writes are kept from the first attempt; special ones (errors, interrupts) are replaced
+                verb = "INSERT OR IGNORE" if row[4] >= 0 else "INSERT OR REPLACE"
+                conn.execute(
+                    f"""
+                    {verb} INTO checkpoint_writes
+                        (ThreadId, CheckpointNs, CheckpointId, TaskId, Idx, Channel, Type, Value, TaskPath)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    row,
+                )
+            self._touch(conn, thread_id)
+            conn.commit()
+
+    @staticmethod
+    def _touch(conn: sqlite3.Connection, thread_id: str) -> None:
+        conn.execute(
+            "INSERT INTO checkpoint_threads (ThreadId, UpdatedAt) VALUES (?, ?) "
+            "ON CONFLICT (ThreadId) DO UPDATE SET UpdatedAt = excluded.UpdatedAt",
+            (thread_id, time.time()),
+        )
+
+    def get_next_version(self, current: Optional[str], channel: None) -> str:
+        if current is None:
+            current_v = 0
+        elif isinstance(current, int):
+            current_v = current
+        else:
+            current_v = int(current.split(".")[0])
+        return f"{current_v + 1:032}.{random.random():016}"
+
+    # -- reading -----------------------------------------------------------------------
+
+    def _load_values(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, versions: Dict[str, Any]) -> Dict[str, Any]:
+        values: Dict[str, Any] = {}
+        for channel, version in versions.items():
+            row = conn.execute(
+                "SELECT Type, Value FROM checkpoint_blobs WHERE ThreadId = ? AND CheckpointNs = ? AND Channel = ? AND Version = ?",
+                (thread_id, checkpoint_ns, channel, str(version)),
+            ).fetchone()
+            if row is None or row["Type"] == EMPTY:
+                continue
+            if row["Type"] == MESSAGE_REFS:
+                values[channel] = self._load_messages(conn, thread_id, checkpoint_ns, json.loads(row["Value"]))
+            else:
+                values[channel] = self.serde.loads_typed((row["Type"], row["Value"]))
+        return values
+
+    def _load_messages(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, digests: List[str]) -> List[BaseMessage]:
+        by_digest: Dict[str, BaseMessage] = {}
+        unique = list(dict.fromkeys(digests))
+        for chunk in _chunks(unique):
+            rows = conn.execute(
+                f"SELECT Digest, Type, Value FROM checkpoint_messages WHERE ThreadId = ? AND CheckpointNs = ? "
+                f"AND Digest IN ({', '.join('?' * len(chunk))})",
+                (thread_id, checkpoint_ns, *chunk),
+            ).fetchall()
+            for row in rows:
+                by_digest[row["Digest"]] = self.serde.loads_typed((row["Type"], row["Value"]))
+        missing = len(unique) - len(by_digest)
+        if missing:
+            logger.warning(f"{missing} stored message(s) of thread {thread_id} are missing")
+        return [by_digest[digest] for digest in digests if digest in by_digest]
+
+    def _pending_writes(self, conn: sqlite3.Connection, thread_id: str, checkpoint_ns: str, checkpoint_id: str) -> List[Tuple[str, str, Any]]:
+        rows = conn.execute(
+            "SELECT TaskId, Idx, Channel, Type, Value, TaskPath FROM checkpoint_writes "
+            "WHERE ThreadId = ? AND CheckpointNs = ? AND CheckpointId = ?",
+            (thread_id, checkpoint_ns, checkpoint_id),
+        ).fetchall()
+        rows = sorted(rows, key=lambda row: writes_sort_key(row["TaskPath"], row["TaskId"], row["Idx"]))
+        return [(row["TaskId"], row["Channel"], self.serde.loads_typed((row["Type"], row["Value"]))) for row in rows]
+
+    def _to_tuple(self, conn: sqlite3.Connection, row: sqlite3.Row, metadata: Optional[CheckpointMetadata] = None) -> CheckpointTuple:
+        thread_id, checkpoint_ns, checkpoint_id = row["ThreadId"], row["CheckpointNs"], row["CheckpointId"]
+        checkpoint: Checkpoint = self.serde.loads_typed((row["Type"], row["Checkpoint"]))
+        parent_id = row["ParentCheckpointId"]
+        return CheckpointTuple(
+            config={"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": checkpoint_id}},
+            checkpoint={
+                **checkpoint,
+                "channel_values": self._load_values(conn, thread_id, checkpoint_ns, checkpoint["channel_versions"]),
+            },
+            metadata=metadata if metadata is not None else self.serde.loads_typed((row["MetadataType"], row["Metadata"])),
+            parent_config=(
+                {"configurable": {"thread_id": thread_id, "checkpoint_ns": checkpoint_ns, "checkpoint_id": parent_id}}
+                if parent_id
+                else None
+            ),
+            pending_writes=self._pending_writes(conn, thread_id, checkpoint_ns, checkpoint_id),
+        )
+
+    def get_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        """Returns the checkpoint named in `config`, or the thread's latest one."""
+        thread_id = config["configurable"]["thread_id"]
+        checkpoint_ns = config["configurable"].get("checkpoint_ns", "")
+        checkpoint_id = get_checkpoint_id(config)
+        with self.pool.connection() as conn:
+            if checkpoint_id:
+                row = conn.execute(
+                    "SELECT * FROM checkpoints WHERE ThreadId = ? AND CheckpointNs = ? AND CheckpointId = ?",
+                    (thread_id, checkpoint_ns, checkpoint_id),
+                ).fetchone()
+            else:
+                row = conn.execute(
+                    "SELECT * FROM checkpoints WHERE ThreadId = ? AND CheckpointNs = ? ORDER BY CheckpointId DESC LIMIT 1",
+                    (thread_id, checkpoint_ns),
+                ).fetchone()
+            return self._to_tuple(conn, row) if row is not None else None
+
+    def list(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> Iterator[CheckpointTuple]:
+        """Lists checkpoints, newest first, optionally filtered by thread, metadata and `before`."""
+        clauses, params = [], []
+        if config is not None:
+            clauses.append("ThreadId = ?")
+            params.append(config["configurable"]["thread_id"])
+            checkpoint_ns = config["configurable"].get("checkpoint_ns")
+            if checkpoint_ns is not None:
+                clauses.append("CheckpointNs = ?")
+                params.append(checkpoint_ns)
+            if checkpoint_id := get_checkpoint_id(config):
+                clauses.append("CheckpointId = ?")
+                params.append(checkpoint_id)
+        if before is not None and (before_id := get_checkpoint_id(before)):
+            clauses.append("CheckpointId < ?")
+            params.append(before_id)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+
+        with self.pool.connection() as conn:
+            rows = conn.execute(f"SELECT * FROM checkpoints {where} ORDER BY CheckpointId DESC", params).fetchall()
+            results = []
+            for row in rows:
+                if limit is not None and len(results) >= limit:
+                    break
+                metadata = self.serde.loads_typed((row["MetadataType"], row["Metadata"]))
+                if filter and not all(metadata.get(key) == value for key, value in filter.items()):
+                    continue
+                results.append(self._to_tuple(conn, row, metadata))
+        yield from results
+
+    # -- deleting ----------------------------------------------------------------------
+
+    def delete_thread(self, thread_id: str) -> None:
+        """Deletes every checkpoint, write, blob and message of a thread."""
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            self._delete_thread(conn, thread_id)
+            conn.commit()
+
+    @staticmethod
+    def _delete_thread(conn: sqlite3.Connection, thread_id: str) -> None:
+        for table in ("checkpoints", "checkpoint_writes", "checkpoint_blobs", "checkpoint_messages", "checkpoint_threads"):
+            conn.execute(f"DELETE FROM {table} WHERE ThreadId = ?", (thread_id,))
+
+    def prune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        """Keeps only the latest checkpoint of each thread ("keep_latest"), or deletes the threads ("delete")."""
+        for thread_id in thread_ids:
+            if strategy == "delete":
+                self.delete_thread(thread_id)
+            elif strategy == "keep_latest":
+                self._prune_thread(thread_id, keep=1)
+            else:
+                raise ValueError(f"Unknown prune strategy {strategy!r}")
+
+    def _prune_thread(self, thread_id: str, keep: int, stats: Optional[CompactionStats] = None) -> CompactionStats:
+        """Drops all but the newest `keep` checkpoints of a thread, and what only they referenced."""
+        stats = stats or CompactionStats()
+        with self.pool.connection() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            namespaces = [row[0] for row in conn.execute("SELECT DISTINCT CheckpointNs FROM checkpoints WHERE ThreadId = ?", (thread_id,))]
+            for checkpoint_ns in namespaces:
+                key = (thread_id, checkpoint_ns)
+                stale = [
+                    row[0]
+                    for row in conn.execute(
+                        "SELECT CheckpointId FROM checkpoints WHERE ThreadId = ? AND CheckpointNs = ? ORDER BY CheckpointId DESC LIMIT -1 OFFSET ?",
+                        (*key, keep),
+                    )
+                ]
+                for chunk in _chunks(stale):
+                    placeholders = ", ".join("?" * len(chunk))
+                    for table in ("checkpoints", "checkpoint_writes"):
+                        conn.execute(f"DELETE FROM {table} WHERE ThreadId = ? AND CheckpointNs = ? AND CheckpointId IN ({placeholders})", (*key, *chunk))
+                stats.checkpoints_pruned += len(stale)
+
+                # Blobs and messages still referenced by a kept checkpoint
+                referenced: Set[Tuple[str, str]] = set()
+                for (versions,) in conn.execute("SELECT ChannelVersions FROM checkpoints WHERE ThreadId = ? AND CheckpointNs = ?", key):
+                    referenced.update(json.loads(versions).items())
+                unreferenced, digests = [], set()
+                for row in conn.execute("SELECT Channel, Version, Type, Value FROM checkpoint_blobs WHERE ThreadId = ? AND CheckpointNs = ?", key):
+                    if (row["Channel"], row["Version"]) not in referenced:
+                        unreferenced.append((row["Channel"], row["Version"]))
+                    elif row["Type"] == MESSAGE_REFS:
+                        digests.update(json.loads(row["Value"]))
+                conn.executemany(
+                    "DELETE FROM checkpoint_blobs WHERE ThreadId = ? AND CheckpointNs = ? AND Channel = ? AND Version = ?",
+                    [(*key, channel, version) for channel, version in unreferenced],
+                )
+                stats.blobs_removed += len(unreferenced)
+                orphans = [
+                    row[0]
+                    for row in conn.execute("SELECT Digest FROM checkpoint_messages WHERE ThreadId = ? AND CheckpointNs = ?", key)
+                    if row[0] not in digests
+                ]
+                conn.executemany(
+                    "DELETE FROM checkpoint_messages WHERE ThreadId = ? AND CheckpointNs = ? AND Digest = ?",
+                    [(*key, digest) for digest in orphans],
+                )
+                stats.messages_removed += len(orphans)
+            conn.commit()
+        return stats
+
+    def compact(self, all_threads: bool = False, now: Optional[float] = None) -> CompactionStats:
+        """
+        Expires idle threads and prunes the threads written to since the last compaction.
+
+        Args:
+            all_threads (bool): Prune every thread in the database, not just this process's.
+            now (Optional[float]): Current time, for expiry; defaults to time.time().
+
+        Returns:
+            CompactionStats: What was removed.
+        """
+        start = time.perf_counter()
+        stats = CompactionStats()
+        now = time.time() if now is None else now
+        if self.ttl_seconds is not None:
+            with self.pool.connection() as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                expired = [
+                    row[0]
+                    for row in conn.execute("SELECT ThreadId FROM checkpoint_threads WHERE UpdatedAt < ?", (now - self.ttl_seconds,))
+                ]
+                for thread_id in expired:
+                    self._delete_thread(conn, thread_id)
+                conn.commit()
+            stats.threads_expired = len(expired)
+
+        with self._dirty_lock:
+            dirty, self._dirty = self._dirty, set()
+        if all_threads:
+            with self.pool.connection() as conn:
+                dirty = {row[0] for row in conn.execute("SELECT DISTINCT ThreadId FROM checkpoints")}
+        for thread_id in dirty:
+            self._prune_thread(thread_id, self.keep_last, stats)
+
+        with self.pool.connection() as conn:
+            # Fold the WAL back into the database file so it does not grow between checkpoints
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        stats.seconds = round(time.perf_counter() - start, 3)
+        if stats.threads_expired or stats.checkpoints_pruned:
+            logger.info(f"Checkpoint compaction: {stats}")
+        return stats
+
+    def _start_compactor(self) -> None:
+        if self._compactor is not None or self.compact_interval is None:
+            return
+        with self._dirty_lock:
+            if self._compactor is None:
+                self._compactor = threading.Thread(target=self._compact_periodically, name="checkpoint-compactor", daemon=True)
+                self._compactor.start()
+
+    def _compact_periodically(self) -> None:
+        while not self._stopped.wait(self.compact_interval):
+            try:
+                self.compact()
+            except sqlite3.Error as e:
+                logger.warning(f"Checkpoint compaction failed: {e}")
+
+    def close(self) -> None:
+        """Stops the background compaction."""
+        self._stopped.set()
+
+    # -- async wrappers; the SQLite calls are short and run inline -----------------------
+
+    async def aget_tuple(self, config: RunnableConfig) -> Optional[CheckpointTuple]:
+        return self.get_tuple(config)
+
+    async def alist(
+        self,
+        config: Optional[RunnableConfig],
+        *,
+        filter: Optional[Dict[str, Any]] = None,
+        before: Optional[RunnableConfig] = None,
+        limit: Optional[int] = None,
+    ) -> AsyncIterator[CheckpointTuple]:
+        for item in self.list(config, filter=filter, before=before, limit=limit):
+            yield item
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        return self.put(config, checkpoint, metadata, new_versions)
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[Tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        self.put_writes(config, writes, task_id, task_path)
+
+    async def adelete_thread(self, thread_id: str) -> None:
+        self.delete_thread(thread_id)
+
+    async def aprune(self, thread_ids: Sequence[str], *, strategy: str = "keep_latest") -> None:
+        self.prune(thread_ids, strategy=strategy)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    compact = subcommands.add_parser("compact", help="Prune old checkpoints and expire idle threads")
+    compact.add_argument("--db", required=True, help="Checkpoint database file")
+    compact.add_argument("--keep-last", type=int, default=10, help="Checkpoints kept per thread")
+    compact.add_argument("--ttl", type=float, default=7 * 24 * 3600, help="Maximum idle age of a thread in seconds")
+    args = parser.parse_args(argv)
+
+    saver = SqliteCheckpointSaver(args.db, keep_last=args.keep_last, ttl_seconds=args.ttl, compact_interval=None)
+    print(saver.compact(all_threads=True))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
@@ -0,0 +1,95 @@
+"""
+Token-budgeted conversation window.
+
+The graph folds turns that fall out of the recent window into a running summary (see
+the summarize node in graph.py), so the prompt sent to the LLM stays roughly the same
+size however long the conversation gets. The window never starts in the middle of a
+tool exchange: an AI message with tool calls and the ToolMessages answering it are
+kept or folded together.
+"""
+from typing import List, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, AnyMessage, ToolMessage
+
+from backend.sales_agent.output_budget import estimate_tokens
+
+DEFAULT_WINDOW_MAX_TOKENS = 3000
+DEFAULT_WINDOW_KEEP_TOKENS = 1500
+
+# Per-message overhead of the chat format (role, separators)
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def message_tokens(message: AnyMessage) -> int:
+    """Estimates the prompt tokens of one message, including its tool calls."""
+    tokens = estimate_tokens(message.content) + MESSAGE_OVERHEAD_TOKENS
+    if isinstance(message, AIMessage) and message.tool_calls:
+        tokens += estimate_tokens([{"name": call["name"], "args": call["args"]} for call in message.tool_calls])
+    return tokens
+
+
+def conversation_tokens(messages: Sequence[AnyMessage]) -> int:
+    return sum(message_tokens(message) for message in messages)
+
+
+def window_start(messages: Sequence[AnyMessage], keep_tokens: int) -> int:
+    """
+    Returns the index where the recent window begins.
+
+    The window is the longest suffix of `messages` within `keep_tokens` that does not
+    start with a ToolMessage, so no tool result is separated from its call. The last
+    exchange is always kept, even when it alone exceeds the budget.
+
+    Args:
+        messages (Sequence[AnyMessage]): The conversation, oldest first.
+        keep_tokens (int): Token budget of the recent window.
+
+    Returns:
+        int: Index of the first message to keep; 0 keeps everything.
+    """
+    start = len(messages)
+    used = 0
+    for index in range(len(messages) - 1, -1, -1):
+        used += message_tokens(messages[index])
+        if used > keep_tokens and start < len(messages):
+            break
+        if not isinstance(messages[index], ToolMessage):
+            start = index
+    return start
+
+
+def split_conversation(
+    messages: Sequence[AnyMessage],
+    max_tokens: int = DEFAULT_WINDOW_MAX_TOKENS,
+    keep_tokens: int = DEFAULT_WINDOW_KEEP_TOKENS,
+) -> Tuple[List[AnyMessage], List[AnyMessage]]:
+    """
+    Splits a conversation into turns to summarize and the recent window.
+
+    Nothing is split off until the conversation exceeds `max_tokens`; then the window
+    shrinks to `keep_tokens`, so summarization runs once per `max_tokens - keep_tokens`
+    of new conversation rather than on every turn.
+
+    Returns:
+        Tuple[List[AnyMessage], List[AnyMessage]]: The older messages and the recent window.
+    """
+    if conversation_tokens(messages) <= max_tokens:
+        return [], list(messages)
+    start = window_start(messages, keep_tokens)
+    return list(messages[:start]), list(messages[start:])
+
+
+def render_transcript(messages: Sequence[AnyMessage]) -> str:
+    """Formats messages as a plain transcript for the summarization prompt."""
+    lines = []
+    for message in messages:
+        if isinstance(message, ToolMessage):
+            lines.append(f"Tool result: {message.content}")
+        elif isinstance(message, AIMessage):
+            if message.content:
+                lines.append(f"Assistant: {message.content}")
+            for call in message.tool_calls:
+                lines.append(f"Assistant called {call['name']} with {call['args']}")
+        else:
+            lines.append(f"{message.type.capitalize()}: {message.content}")
+    return "\n".join(lines)
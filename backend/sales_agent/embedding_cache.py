@@ -0,0 +1,186 @@
+from array import array
+from collections import OrderedDict
+from dataclasses import dataclass
+import logging
+import re
+import threading
+import time
+from typing import Any, List, Optional, Tuple
+
+from backend.database.config import DatabaseConfig
+from backend.database.db_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+EMBEDDING_CACHE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS embeddings (
+        Model TEXT NOT NULL,
+        QueryKey TEXT NOT NULL,
+        Vector BLOB NOT NULL,
+        Size INTEGER NOT NULL,
+        LastUsed REAL NOT NULL,
+        PRIMARY KEY (Model, QueryKey)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_embeddings_last_used ON embeddings (LastUsed);
+"""
+
+
+def normalize_query(text: str) -> str:
+    """Normalizes query text so trivially different spellings share a cache entry."""
+    return re.sub(r"\s+", " ", text).strip().lower().rstrip("?!. ")
+
+
+@dataclass
+class EmbeddingCacheStats:
+    """Hit/miss counters and sizes of an EmbeddingCache."""
+
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    memory_entries: int
+    disk_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+
+class EmbeddingCache:
+    """
+    Two-tier cache of query embeddings keyed by model name and normalized query text.
+
+    The first tier is an in-process LRU. The second is a SQLite file storing float32
+    vectors, evicted least-recently-used once it grows past `max_disk_bytes`.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str],
+        max_memory_entries: int = 1024,
+        max_disk_bytes: int = 64 * 1024 * 1024,
+    ):
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[Tuple[str, str], List[float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+
+        self.db_manager: Optional[DatabaseManager] = None
+        self._disk_bytes = 0
+        if db_path:
+            self.db_manager = DatabaseManager(
+                DatabaseConfig(db_name="embedding_cache.db", db_path=db_path, pool_size=2)
+            )
+            with self.db_manager.get_connection() as conn:
+                conn.executescript(EMBEDDING_CACHE_SCHEMA)
+                self._disk_bytes = conn.execute("SELECT COALESCE(SUM(Size), 0) FROM embeddings").fetchone()[0]
+            self.db_manager.set_journal_mode()
+
+    def get(self, model: str, text: str) -> Optional[List[float]]:
+        """Returns the cached embedding for `text` under `model`, or None on a miss."""
+        key = (model, normalize_query(text))
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self._memory_hits += 1
+                return vector
+
+        if self.db_manager is not None:
+            with self.db_manager.get_connection() as conn:
+                row = conn.execute(
+                    "SELECT Vector FROM embeddings WHERE Model = ? AND QueryKey = ?", key
+                ).fetchone()
+                if row is not None:
+                    conn.execute(
+                        "UPDATE embeddings SET LastUsed = ? WHERE Model = ? AND QueryKey = ?",
+                        (time.time(), *key),
+                    )
+                    conn.commit()
+            if row is not None:
+                vector = array("f", row["Vector"]).tolist()
+                with self._lock:
+                    self._disk_hits += 1
+                    self._remember(key, vector)
+                return vector
+
+        with self._lock:
+            self._misses += 1
+        return None
+
+    def put(self, model: str, text: str, vector: List[float]) -> None:
+        """Stores an embedding in both tiers."""
+        key = (model, normalize_query(text))
+        with self._lock:
+            self._remember(key, vector)
+
+        if self.db_manager is None:
+            return
+        blob = array("f", vector).tobytes()
+        with self._disk_lock, self.db_manager.get_connection() as conn:
+            previous = conn.execute(
+                "SELECT Size FROM embeddings WHERE Model = ? AND QueryKey = ?", key
+            ).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO embeddings (Model, QueryKey, Vector, Size, LastUsed) VALUES (?, ?, ?, ?, ?)",
+                (*key, blob, len(blob), time.time()),
+            )
+            self._disk_bytes += len(blob) - (previous["Size"] if previous else 0)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict(conn)
+            conn.commit()
+
+    def _remember(self, key: Tuple[str, str], vector: List[float]) -> None:
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, conn) -> None:
+        """Deletes least recently used entries until the store is back under 90% of its size limit."""
+        target = int(self.max_disk_bytes * 0.9)
+        freed = 0
+        victims = []
+        for row in conn.execute("SELECT Model, QueryKey, Size FROM embeddings ORDER BY LastUsed"):
+            if self._disk_bytes - freed <= target:
+                break
+            victims.append((row["Model"], row["QueryKey"]))
+            freed += row["Size"]
+        conn.executemany("DELETE FROM embeddings WHERE Model = ? AND QueryKey = ?", victims)
+        self._disk_bytes -= freed
+        logger.info(f"Evicted {len(victims)} cached embeddings ({freed} bytes)")
+
+    def stats(self) -> EmbeddingCacheStats:
+        """Returns the hit/miss counters and current sizes."""
+        with self._lock:
+            return EmbeddingCacheStats(
+                memory_hits=self._memory_hits,
+                disk_hits=self._disk_hits,
+                misses=self._misses,
+                memory_entries=len(self._memory),
+                disk_bytes=self._disk_bytes,
+            )
+
+
+class CachedQueryEmbeddings:
+    """Wraps a LangChain embeddings model so `embed_query` goes through an EmbeddingCache."""
+
+    def __init__(self, embeddings: Any, cache: EmbeddingCache, model_name: Optional[str] = None):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model_name = model_name or getattr(embeddings, "model", type(embeddings).__name__)
+
+    def embed_query(self, text: str) -> List[float]:
+        vector = self.cache.get(self.model_name, text)
+        if vector is None:
+            vector = self.embeddings.embed_query(text)
+            self.cache.put(self.model_name, text, vector)
+        return vector
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
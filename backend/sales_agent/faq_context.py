@@ -0,0 +1,169 @@
+from dataclasses import dataclass
+import re
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+from backend.sales_agent.output_budget import CHARS_PER_TOKEN, estimate_tokens, truncate_text
+
+DEFAULT_CONTEXT_MAX_TOKENS = 800
+DEFAULT_MMR_LAMBDA = 0.7
+
+# Chunks at least this similar to an already selected chunk are treated as duplicates
+DUPLICATE_SIMILARITY = 0.95
+
+# A chunk cut to fit the budget must keep at least this many characters to be worth including
+MIN_PARTIAL_CHARS = 200
+
+
+@dataclass
+class RetrievedChunk:
+    """One FAQ match: its text, where it came from, and its embedding when returned."""
+
+    chunk_id: str
+    score: float
+    text: str
+    source: str
+    vector: Optional[np.ndarray] = None
+
+
+def _normalize_text(text: str) -> str:
+    return re.sub(r"\W+", " ", text).strip().lower()
+
+
+def chunks_from_matches(matches: Sequence[Any]) -> List[RetrievedChunk]:
+    """Converts the `matches` of a vector index query into RetrievedChunks."""
+    chunks = []
+    for match in matches:
+        metadata = match["metadata"] or {}
+        values = match.get("values")
+        chunks.append(
+            RetrievedChunk(
+                chunk_id=match["id"],
+                score=float(match["score"] or 0.0),
+                text=(metadata.get("content") or "").strip(),
+                source=metadata.get("source") or match["id"],
+                vector=np.asarray(values, dtype=np.float32) if values else None,
+            )
+        )
+    return chunks
+
+
+def _unit_rows(vectors: Sequence[np.ndarray]) -> np.ndarray:
+    matrix = np.vstack(vectors).astype(np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def mmr_order(query_vector: Sequence[float], vectors: Sequence[np.ndarray], k: int, lambda_mult: float = DEFAULT_MMR_LAMBDA) -> List[int]:
+    """
+    Orders candidates by maximal marginal relevance.
+
+    Each step picks the candidate maximizing
+    `lambda_mult * sim(query, c) - (1 - lambda_mult) * max(sim(c, selected))`.
+
+    Returns:
+        List[int]: Indices of up to `k` selected candidates, in selection order.
+    """
+    if not len(vectors) or k <= 0:
+        return []
+    matrix = _unit_rows(vectors)
+    query = np.asarray(query_vector, dtype=np.float32)
+    query = query / (np.linalg.norm(query) or 1.0)
+    relevance = matrix @ query
+    pairwise = matrix @ matrix.T
+
+    selected = [int(np.argmax(relevance))]
+    redundancy = pairwise[selected[0]].copy()
+    remaining = np.ones(len(matrix), dtype=bool)
+    remaining[selected[0]] = False
+    while len(selected) < min(k, len(matrix)):
+        scores = lambda_mult * relevance - (1 - lambda_mult) * redundancy
+        scores[~remaining] = -np.inf
+        best = int(np.argmax(scores))
+        selected.append(best)
+        remaining[best] = False
+        redundancy = np.maximum(redundancy, pairwise[best])
+    return selected
+
+
+def drop_duplicates(chunks: List[RetrievedChunk], threshold: float = DUPLICATE_SIMILARITY) -> List[RetrievedChunk]:
+    """
+    Removes chunks that repeat an earlier (better ranked) chunk.
+
+    A chunk is a duplicate when its normalized text is contained in a kept chunk's text
+    (or the other way round, in which case the longer one is kept in its place), or when
+    the embeddings of both are at least `threshold` cosine-similar.
+    """
+    kept: List[RetrievedChunk] = []
+    kept_texts: List[str] = []
+    for chunk in chunks:
+        text = _normalize_text(chunk.text)
+        if not text:
+            continue
+        duplicate = False
+        for position, (other, other_text) in enumerate(zip(kept, kept_texts)):
+            if text in other_text:
+                duplicate = True
+            elif other_text in text:
+                kept[position], kept_texts[position] = chunk, text
+                duplicate = True
+            elif chunk.vector is not None and other.vector is not None:
+                pair = _unit_rows([chunk.vector, other.vector])
+                duplicate = float(pair[0] @ pair[1]) >= threshold
+            if duplicate:
+                break
+        if not duplicate:
+            kept.append(chunk)
+            kept_texts.append(text)
+    return kept
+
+
+def assemble_context(
+    query_vector: Sequence[float],
+    matches: Sequence[Any],
+    k: int,
+    max_tokens: int = DEFAULT_CONTEXT_MAX_TOKENS,
+    lambda_mult: float = DEFAULT_MMR_LAMBDA,
+) -> str:
+    """
+    Builds the FAQ context handed to the LLM from vector index matches.
+
+    Near-duplicates are dropped, the rest is reranked with MMR (when the matches carry
+    their vectors; otherwise the index order is kept), and up to `k` chunks are packed
+    into `max_tokens`, each prefixed with a `[n] (source)` marker. A chunk that does not
+    fit whole is cut on a word boundary if enough of it fits, and packing stops there.
+
+    Args:
+        query_vector (Sequence[float]): The query embedding.
+        matches (Sequence[Any]): `matches` of a query made with include_metadata (and
+            ideally include_values), best first.
+        k (int): Maximum number of chunks in the context.
+        max_tokens (int): Token budget of the returned text.
+        lambda_mult (float): MMR trade-off between relevance (1.0) and diversity (0.0).
+
+    Returns:
+        str: The assembled context, one chunk per paragraph.
+    """
+    chunks = drop_duplicates(chunks_from_matches(matches))
+    if chunks and all(chunk.vector is not None for chunk in chunks):
+        order = mmr_order(query_vector, [chunk.vector for chunk in chunks], k, lambda_mult)
+        chunks = [chunks[i] for i in order]
+    else:
+        chunks = chunks[:k]
+
+    parts: List[str] = []
+    used = 0
+    for number, chunk in enumerate(chunks, start=1):
+        marker = f"[{number}] ({chunk.source}) "
+        part = marker + chunk.text
+        cost = estimate_tokens(part)
+        if used + cost > max_tokens:
+            remaining_chars = (max_tokens - used) * CHARS_PER_TOKEN - len(marker)
+            if remaining_chars >= MIN_PARTIAL_CHARS or not parts:
+                parts.append(marker + truncate_text(chunk.text, max(remaining_chars, MIN_PARTIAL_CHARS)))
+            break
+        parts.append(part)
+        used += cost
+    return "\n\n".join(parts)
@@ -0,0 +1,340 @@
+"""
+Local, memory-mapped replica of the Pinecone FAQ index.
+
+`sync_faq_index` exports every vector and its metadata from a Pinecone index into a
+directory holding a float32 matrix (`vectors.f32`, L2-normalized so cosine similarity is a
+dot product) and a sidecar `metadata.json`. Each export goes to its own generation
+subdirectory, and the `CURRENT` pointer file is switched to it in one atomic rename.
+`LocalFaqIndex` serves `query` calls from the current generation with the same response
+shape as `pinecone_index.query`, using a batched NumPy top-k, optionally narrowed by an
+IVF (k-means) partitioning for larger corpora.
+
+Usage:
+    python -m backend.sales_agent.faq_index sync --dir backend/sales_agent/.cache/faq_index [--nlist 64]
+"""
+import argparse
+from datetime import datetime
+import json
+import logging
+import os
+from pathlib import Path
+import shutil
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+VECTORS_FILE = "vectors.f32"
+METADATA_FILE = "metadata.json"
+IVF_FILE = "ivf.npz"
+CURRENT_FILE = "CURRENT"
+
+# Generations kept besides the current one, for readers still loading the previous export
+KEEP_PREVIOUS_GENERATIONS = 1
+# Times a reader re-reads CURRENT when the generation it pointed to was removed while loading
+LOAD_ATTEMPTS = 3
+
+
+def _field(obj: Any, name: str, default: Any = None) -> Any:
+    """Reads a field from a Pinecone response object or a plain dict."""
+    if isinstance(obj, dict):
+        return obj.get(name, default)
+    return getattr(obj, name, default)
+
+
+def _normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+def _iter_index_ids(index: Any, namespace: str) -> Iterator[str]:
+    for page in index.list(namespace=namespace):
+        yield from page
+
+
+def resolve_replica(directory: str) -> Path:
+    """Returns the generation directory `CURRENT` points to, or `directory` itself for a flat replica."""
+    path = Path(directory)
+    pointer = path / CURRENT_FILE
+    if pointer.exists():
+        return path / pointer.read_text(encoding="utf-8").strip()
+    return path
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def write_faq_index(
+    directory: str,
+    ids: Sequence[str],
+    vectors: np.ndarray,
+    metadata: Sequence[Dict[str, Any]],
+    nlist: Optional[int] = None,
+    source: str = "",
+) -> None:
+    """
+    Writes vectors and metadata in the local replica format.
+
+    The files go to a new generation subdirectory, and the CURRENT pointer is switched to
+    it with a single os.replace, so a LocalFaqIndex loading meanwhile sees either the
+    previous or the new set of files, never a mix. An export without vectors writes an
+    empty replica.
+
+    Args:
+        directory (str): Target directory.
+        ids (Sequence[str]): Vector ids, one per row of `vectors`.
+        vectors (np.ndarray): Matrix of shape (count, dimension).
+        metadata (Sequence[Dict[str, Any]]): Metadata, one entry per row of `vectors`.
+        nlist (Optional[int]): Number of IVF partitions to build. No IVF when None.
+        source (str): Description of where the vectors came from, for the sidecar.
+
+    Raises:
+        ValueError: If `vectors` or `metadata` do not have one entry per id.
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if len(vectors) != len(ids) or len(metadata) != len(ids):
+        raise ValueError(f"Got {len(ids)} ids, {len(vectors)} vectors and {len(metadata)} metadata entries")
+
+    path = Path(directory)
+    generation = f"gen-{datetime.now():%Y%m%d%H%M%S%f}-{os.getpid()}"
+    target = path / generation
+    target.mkdir(parents=True)
+
+    if len(ids):
+        matrix = _normalize(vectors.reshape(len(ids), -1))
+        mapped = np.memmap(target / VECTORS_FILE, dtype=np.float32, mode="w+", shape=matrix.shape)
+        mapped[:] = matrix
+        mapped.flush()
+        del mapped
+    else:
+        # np.memmap cannot map an empty file; readers skip the vectors file when count is 0
+        matrix = np.zeros((0, vectors.shape[1] if vectors.ndim == 2 else 0), dtype=np.float32)
+        (target / VECTORS_FILE).touch()
+
+    sidecar = {
+        "count": len(ids),
+        "dimension": int(matrix.shape[1]),
+        "normalized": True,
+        "source": source,
+        "synced_at": datetime.now().isoformat(),
+        "ids": list(ids),
+        "metadata": list(metadata),
+    }
+    (target / METADATA_FILE).write_text(json.dumps(sidecar, ensure_ascii=False), encoding="utf-8")
+
+    if nlist and len(ids) > nlist:
+        centroids, assignments = build_ivf(matrix, nlist)
+        np.savez(target / IVF_FILE, centroids=centroids, assignments=assignments)
+
+    tmp_pointer = path / f"{CURRENT_FILE}.tmp"
+    tmp_pointer.write_text(generation, encoding="utf-8")
+    os.replace(tmp_pointer, path / CURRENT_FILE)
+    _remove_old_generations(path, generation)
+    logger.info(f"Wrote {len(ids)} FAQ vectors to {target}")
+
+
+def _remove_old_generations(path: Path, current: str) -> None:
+    generations = sorted(child for child in path.glob("gen-*") if child.is_dir() and child.name != current)
+    for old in generations[: max(len(generations) - KEEP_PREVIOUS_GENERATIONS, 0)]:
+        shutil.rmtree(old, ignore_errors=True)
+
+
+def sync_faq_index(
+    index: Any,
+    directory: str,
+    namespace: str = "",
+    batch_size: int = 100,
+    nlist: Optional[int] = None,
+) -> int:
+    """
+    Exports all vectors and metadata of a Pinecone index into a local replica.
+
+    Args:
+        index (Any): A Pinecone Index, e.g. `pc.Index("tershine")`.
+        directory (str): Target directory for the replica.
+        namespace (str): Pinecone namespace to export.
+        batch_size (int): Number of ids fetched per request.
+        nlist (Optional[int]): Number of IVF partitions to build. No IVF when None.
+
+    Returns:
+        int: The number of vectors exported.
+    """
+    ids: List[str] = []
+    vectors: List[List[float]] = []
+    metadata: List[Dict[str, Any]] = []
+    for batch in _batched(_iter_index_ids(index, namespace), batch_size):
+        fetched = _field(index.fetch(ids=batch, namespace=namespace), "vectors", {})
+        for vector_id in batch:
+            vector = fetched.get(vector_id)
+            if vector is None:
+                continue
+            ids.append(vector_id)
+            vectors.append(list(_field(vector, "values")))
+            metadata.append(dict(_field(vector, "metadata") or {}))
+
+    write_faq_index(directory, ids, np.asarray(vectors, dtype=np.float32), metadata, nlist=nlist, source="pinecone")
+    return len(ids)
+
+
+def build_ivf(matrix: np.ndarray, nlist: int, iterations: int = 20, seed: int = 0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Partitions normalized vectors with spherical k-means.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: Centroids of shape (nlist, dimension) and the
+        partition of every row.
+    """
+    rng = np.random.default_rng(seed)
+    centroids = matrix[rng.choice(len(matrix), size=nlist, replace=False)].copy()
+    assignments = np.zeros(len(matrix), dtype=np.int32)
+    for _ in range(iterations):
+        assignments = np.argmax(matrix @ centroids.T, axis=1).astype(np.int32)
+        for partition in range(nlist):
+            members = matrix[assignments == partition]
+            if len(members):
+                centroids[partition] = members.sum(axis=0)
+        centroids = _normalize(centroids)
+    return centroids.astype(np.float32), assignments
+
+
+class LocalFaqIndex:
+    """
+    Query-compatible stand-in for `pinecone_index` backed by a local replica.
+
+    `query` returns `{"matches": [{"id", "score", "metadata", "values"?}]}` with cosine
+    similarity scores, like a Pinecone cosine index. When the replica has IVF partitions,
+    only the `nprobe` partitions closest to the query are scanned.
+    """
+
+    def __init__(self, directory: str, nprobe: int = 8):
+        self.nprobe = nprobe
+        for attempt in range(LOAD_ATTEMPTS):
+            self.directory = resolve_replica(directory)
+            try:
+                self._load()
+                return
+            except FileNotFoundError:
+                # Several exports in a row may have removed the generation; CURRENT moved on
+                if self.directory == Path(directory) or attempt == LOAD_ATTEMPTS - 1:
+                    raise
+                logger.info(f"FAQ replica {self.directory} was replaced while loading, retrying")
+
+    def _load(self) -> None:
+        sidecar = json.loads((self.directory / METADATA_FILE).read_text(encoding="utf-8"))
+        self.ids: List[str] = sidecar["ids"]
+        self.metadata: List[Dict[str, Any]] = sidecar["metadata"]
+        self.dimension: int = sidecar["dimension"]
+        if sidecar["count"] != len(self.ids) or len(self.metadata) != len(self.ids):
+            raise ValueError(f"Inconsistent FAQ replica in {self.directory}: count does not match ids and metadata")
+        self.vectors = (
+            np.memmap(self.directory / VECTORS_FILE, dtype=np.float32, mode="r", shape=(len(self.ids), self.dimension))
+            if self.ids
+            else np.zeros((0, self.dimension), dtype=np.float32)
+        )
+
+        self.centroids: Optional[np.ndarray] = None
+        self.partitions: List[np.ndarray] = []
+        ivf_path = self.directory / IVF_FILE
+        if ivf_path.exists():
+            with np.load(ivf_path) as ivf:
+                self.centroids = ivf["centroids"]
+                assignments = ivf["assignments"]
+            self.partitions = [np.flatnonzero(assignments == p) for p in range(len(self.centroids))]
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def query(
+        self,
+        vector: Sequence[float],
+        top_k: int = 10,
+        include_metadata: bool = False,
+        include_values: bool = False,
+        **_: Any,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        """Returns the `top_k` most similar vectors to `vector`."""
+        return self.query_batch([vector], top_k, include_metadata, include_values)[0]
+
+    def query_batch(
+        self,
+        vectors: Sequence[Sequence[float]],
+        top_k: int = 10,
+        include_metadata: bool = False,
+        include_values: bool = False,
+    ) -> List[Dict[str, List[Dict[str, Any]]]]:
+        """Runs several queries with one matrix product per candidate set."""
+        queries = _normalize(np.asarray(vectors, dtype=np.float32).reshape(len(vectors), -1))
+        if not len(self):
+            return [{"matches": []} for _ in range(len(queries))]
+
+        results = []
+        if self.centroids is None:
+            scores = queries @ self.vectors.T
+            for row in scores:
+                results.append(self._matches(np.arange(len(self)), row, top_k, include_metadata, include_values))
+            return results
+
+        probes = np.argsort(-(queries @ self.centroids.T), axis=1)[:, : self.nprobe]
+        for query, partitions in zip(queries, probes):
+            candidates = np.concatenate([self.partitions[p] for p in partitions])
+            scores = self.vectors[candidates] @ query
+            results.append(self._matches(candidates, scores, top_k, include_metadata, include_values))
+        return results
+
+    def _matches(
+        self,
+        candidates: np.ndarray,
+        scores: np.ndarray,
+        top_k: int,
+        include_metadata: bool,
+        include_values: bool,
+    ) -> Dict[str, List[Dict[str, Any]]]:
+        k = min(top_k, len(candidates))
+        if k <= 0:
+            return {"matches": []}
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        matches = []
+        for position in top:
+            row = int(candidates[position])
+            match: Dict[str, Any] = {"id": self.ids[row], "score": float(scores[position])}
+            if include_metadata:
+                match["metadata"] = self.metadata[row]
+            if include_values:
+                match["values"] = self.vectors[row].tolist()
+            matches.append(match)
+        return {"matches": matches}
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    from dotenv import load_dotenv
+    from pinecone import Pinecone
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subcommands = parser.add_subparsers(dest="command", required=True)
+    sync = subcommands.add_parser("sync", help="Export the Pinecone index into a local replica")
+    sync.add_argument("--index", default="tershine", help="Pinecone index name")
+    sync.add_argument("--namespace", default="", help="Pinecone namespace")
+    sync.add_argument("--dir", required=True, help="Directory to write the replica to")
+    sync.add_argument("--nlist", type=int, default=None, help="Build an IVF with this many partitions")
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    index = Pinecone(api_key=os.getenv("PINECONE_API_KEY")).Index(args.index)
+    count = sync_faq_index(index, args.dir, namespace=args.namespace, nlist=args.nlist)
+    logger.info(f"Synced {count} vectors from {args.index} to {args.dir}")
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
@@ -0,0 +1,349 @@
+"""
+Incremental ingestion of the washing-guide documents into the FAQ vector index.
+
+Documents are chunked, every chunk gets a content-addressed id, and only chunks that are
+not yet recorded in the local manifest are embedded (in large `embed_documents` batches)
+and upserted (in parallel batches). Chunks that disappeared from the documents are deleted
+from the index. Each stage is a generator, so the corpus is never held in memory at once.
+
+The manifest only knows about vectors this pipeline wrote. The first run against an index
+that was filled some other way must pass --rebuild, which clears the namespace and the
+manifest before ingesting; otherwise the old vectors would stay next to the new ones and
+every passage would be retrieved twice. A run with an empty manifest and a non-empty
+namespace refuses to start for that reason.
+
+Usage:
+    python -m backend.sales_agent.faq_ingest --docs path/to/guides [--index tershine] [--rebuild]
+"""
+import argparse
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from datetime import datetime
+import hashlib
+import logging
+import os
+from pathlib import Path
+import re
+import time
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+from backend.database.config import DatabaseConfig
+from backend.database.db_manager import DatabaseManager
+
+logger = logging.getLogger(__name__)
+
+DOCUMENT_PATTERNS = ("*.md", "*.txt")
+
+# On average every third piece ends a chunk, if the chunk is long enough already
+BOUNDARY_MODULUS = 3
+
+MANIFEST_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS faq_chunks (
+        ChunkId TEXT PRIMARY KEY,
+        Source TEXT NOT NULL,
+        ContentHash TEXT NOT NULL,
+        IndexedAt TEXT NOT NULL
+    ) WITHOUT ROWID;
+"""
+
+
+@dataclass(frozen=True)
+class Chunk:
+    """A piece of a guide document, identified by its source and content."""
+
+    source: str
+    position: int
+    text: str
+    content_hash: str
+
+    @property
+    def chunk_id(self) -> str:
+        return hashlib.sha256(f"{self.source}\0{self.content_hash}".encode("utf-8")).hexdigest()[:32]
+
+    def metadata(self) -> Dict[str, Any]:
+        return {
+            "content": self.text,
+            "source": self.source,
+            "chunk": self.position,
+            "content_hash": self.content_hash,
+        }
+
+
+@dataclass
+class IngestStats:
+    """Counters reported by `FaqIngestionPipeline.run`."""
+
+    chunks: int = 0
+    unchanged: int = 0
+    embedded: int = 0
+    upserted: int = 0
+    deleted: int = 0
+    seconds: float = 0.0
+
+
+def iter_documents(directory: str, patterns: Sequence[str] = DOCUMENT_PATTERNS) -> Iterator[Tuple[str, str]]:
+    """Yields (source, text) for every guide document under `directory`."""
+    root = Path(directory)
+    paths = sorted({path for pattern in patterns for path in root.rglob(pattern)})
+    for path in paths:
+        yield path.relative_to(root).as_posix(), path.read_text(encoding="utf-8")
+
+
+def chunk_document(source: str, text: str, chunk_chars: int = 1200, overlap_chars: int = 150) -> Iterator[Chunk]:
+    """
+    Splits a document into chunks of at most about `chunk_chars` characters on paragraph boundaries.
+
+    Paragraphs longer than a chunk are split on sentence boundaries. Besides the size limit,
+    a chunk also ends after any piece whose hash picks it as a boundary, so boundaries depend
+    on the content around them rather than on everything before them: editing one paragraph
+    only changes the chunks near it. When a chunk is cut for size, its tail is repeated at the
+    start of the next one so answers spanning the cut stay retrievable.
+    """
+    pieces: List[str] = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        if len(paragraph) <= chunk_chars:
+            pieces.append(paragraph)
+        else:
+            pieces.extend(sentence for sentence in re.split(r"(?<=[.!?])\s+", paragraph) if sentence)
+
+    min_chars = chunk_chars // 3
+    position = 0
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 1 > chunk_chars:
+            yield _make_chunk(source, position, current)
+            position += 1
+            current = _overlap(current, overlap_chars)
+        current = f"{current} {piece}".strip()
+        if len(current) >= min_chars and hashlib.sha256(piece.encode("utf-8")).digest()[0] % BOUNDARY_MODULUS == 0:
+            yield _make_chunk(source, position, current)
+            position += 1
+            current = ""
+    if current:
+        yield _make_chunk(source, position, current)
+
+
+def _overlap(text: str, overlap_chars: int) -> str:
+    if not overlap_chars:
+        return ""
+    return text[-overlap_chars:].split(" ", 1)[-1]
+
+
+def _make_chunk(source: str, position: int, text: str) -> Chunk:
+    return Chunk(source, position, text, hashlib.sha256(text.encode("utf-8")).hexdigest())
+
+
+def _batched(items: Iterable[Any], size: int) -> Iterator[List[Any]]:
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class FaqIngestionPipeline:
+    """
+    Streams guide documents into a vector index, re-embedding only new or changed chunks.
+
+    The manifest (a small SQLite file) records which chunk ids are in the index, so
+    unchanged chunks cost neither embedding calls nor upserts on later runs.
+    """
+
+    def __init__(
+        self,
+        index: Any,
+        embeddings: Any,
+        manifest_path: str,
+        namespace: str = "",
+        embed_batch_size: int = 256,
+        upsert_batch_size: int = 100,
+        upsert_workers: int = 4,
+    ):
+        self.index = index
+        self.embeddings = embeddings
+        self.namespace = namespace
+        self.embed_batch_size = embed_batch_size
+        self.upsert_batch_size = upsert_batch_size
+        self.upsert_workers = upsert_workers
+
+        self.manifest = DatabaseManager(
+            DatabaseConfig(db_name="faq_ingest.db", db_path=manifest_path, pool_size=2)
+        )
+        with self.manifest.get_connection() as conn:
+            conn.executescript(MANIFEST_SCHEMA)
+        self.manifest.set_journal_mode()
+
+    def indexed_ids(self) -> Set[str]:
+        """Returns the chunk ids currently recorded as present in the index."""
+        with self.manifest.get_connection() as conn:
+            return {row["ChunkId"] for row in conn.execute("SELECT ChunkId FROM faq_chunks")}
+
+    def index_vector_count(self) -> int:
+        """Returns the number of vectors in the pipeline's namespace of the index."""
+        namespaces = getattr(self.index.describe_index_stats(), "namespaces", None) or {}
+        # Newer Pinecone versions report the default namespace as "__default__"
+        summary = namespaces.get(self.namespace) or (namespaces.get("__default__") if not self.namespace else None) or {}
+        count = summary.get("vector_count", 0) if isinstance(summary, dict) else getattr(summary, "vector_count", 0)
+        return int(count or 0)
+
+    def reset(self) -> None:
+        """Deletes every vector in the namespace and forgets the manifest."""
+        self.index.delete(delete_all=True, namespace=self.namespace)
+        with self.manifest.get_connection() as conn:
+            conn.execute("DELETE FROM faq_chunks")
+            conn.commit()
+        logger.info(f"Cleared namespace {self.namespace!r} and the chunk manifest")
+
+    def iter_chunks(self, documents: Iterable[Tuple[str, str]]) -> Iterator[Chunk]:
+        for source, text in documents:
+            yield from chunk_document(source, text)
+
+    def iter_new_chunks(self, chunks: Iterable[Chunk], indexed: Set[str], seen: Set[str], stats: IngestStats) -> Iterator[Chunk]:
+        """Drops chunks that are already indexed or repeated within this run."""
+        for chunk in chunks:
+            stats.chunks += 1
+            if chunk.chunk_id in seen:
+                continue
+            seen.add(chunk.chunk_id)
+            if chunk.chunk_id in indexed:
+                stats.unchanged += 1
+                continue
+            yield chunk
+
+    def iter_embedded(self, chunks: Iterable[Chunk], stats: IngestStats) -> Iterator[List[Tuple[Chunk, List[float]]]]:
+        """Embeds chunks in batches of `embed_batch_size`."""
+        for batch in _batched(chunks, self.embed_batch_size):
+            vectors = self.embeddings.embed_documents([chunk.text for chunk in batch])
+            stats.embedded += len(batch)
+            yield list(zip(batch, vectors))
+
+    def _upsert(self, batch: List[Tuple[Chunk, List[float]]]) -> List[Chunk]:
+        self.index.upsert(
+            vectors=[
+                {"id": chunk.chunk_id, "values": list(vector), "metadata": chunk.metadata()}
+                for chunk, vector in batch
+            ],
+            namespace=self.namespace,
+        )
+        return [chunk for chunk, _ in batch]
+
+    def _record(self, chunks: List[Chunk]) -> None:
+        now = datetime.now().isoformat()
+        with self.manifest.get_connection() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO faq_chunks (ChunkId, Source, ContentHash, IndexedAt) VALUES (?, ?, ?, ?)",
+                [(chunk.chunk_id, chunk.source, chunk.content_hash, now) for chunk in chunks],
+            )
+            conn.commit()
+
+    def run(self, documents: Iterable[Tuple[str, str]], prune: bool = True, rebuild: bool = False) -> IngestStats:
+        """
+        Ingests documents into the index.
+
+        Args:
+            documents (Iterable[Tuple[str, str]]): (source, text) pairs, e.g. from `iter_documents`.
+            prune (bool): Delete indexed chunks that no longer occur in `documents`. Only
+                meaningful when `documents` is the whole corpus.
+            rebuild (bool): Clear the namespace and the manifest first, then ingest everything.
+
+        Returns:
+            IngestStats: What was embedded, upserted and deleted.
+
+        Raises:
+            RuntimeError: If the manifest is empty but the namespace already holds vectors
+                that this pipeline cannot account for; rerun with `rebuild=True`.
+        """
+        stats = IngestStats()
+        start = time.perf_counter()
+        if rebuild:
+            self.reset()
+        indexed = self.indexed_ids()
+        if not indexed and not rebuild:
+            existing = self.index_vector_count()
+            if existing:
+                raise RuntimeError(
+                    f"Namespace {self.namespace!r} holds {existing} vectors the chunk manifest does not know; "
+                    "run once with --rebuild to replace them"
+                )
+        seen: Set[str] = set()
+
+        embedded = self.iter_embedded(
+            self.iter_new_chunks(self.iter_chunks(documents), indexed, seen, stats), stats
+        )
+        with ThreadPoolExecutor(max_workers=self.upsert_workers) as executor:
+            in_flight: Set[Future] = set()
+            for embedded_batch in embedded:
+                for batch in _batched(embedded_batch, self.upsert_batch_size):
+                    # Bound the number of pending upserts so embedding does not race ahead.
+                    if len(in_flight) >= self.upsert_workers * 2:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        stats.upserted += self._collect(done)
+                    in_flight.add(executor.submit(self._upsert, batch))
+            stats.upserted += self._collect(in_flight)
+
+        if prune:
+            removed = sorted(indexed - seen)
+            for batch in _batched(removed, self.upsert_batch_size):
+                self.index.delete(ids=batch, namespace=self.namespace)
+                with self.manifest.get_connection() as conn:
+                    conn.executemany("DELETE FROM faq_chunks WHERE ChunkId = ?", [(chunk_id,) for chunk_id in batch])
+                    conn.commit()
+                stats.deleted += len(batch)
+
+        stats.seconds = time.perf_counter() - start
+        logger.info(
+            f"Ingested {stats.chunks} chunks in {stats.seconds:.1f}s: {stats.unchanged} unchanged, "
+            f"{stats.embedded} embedded, {stats.upserted} upserted, {stats.deleted} deleted"
+        )
+        return stats
+
+    def _collect(self, futures: Iterable[Future]) -> int:
+        count = 0
+        for future in futures:
+            chunks = future.result()
+            self._record(chunks)
+            count += len(chunks)
+        return count
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    from dotenv import load_dotenv
+    from langchain_openai.embeddings import OpenAIEmbeddings
+    from pinecone import Pinecone
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--docs", required=True, help="Directory with the guide documents (*.md, *.txt)")
+    parser.add_argument("--index", default="tershine", help="Pinecone index name")
+    parser.add_argument("--namespace", default="", help="Pinecone namespace")
+    parser.add_argument(
+        "--manifest",
+        default=str(Path(os.getenv("SALES_AGENT_CACHE_DIR", str(Path(__file__).resolve().parent / ".cache"))) / "faq_ingest.db"),
+        help="Path of the local chunk manifest",
+    )
+    parser.add_argument("--no-prune", action="store_true", help="Keep indexed chunks missing from --docs")
+    parser.add_argument(
+        "--rebuild",
+        action="store_true",
+        help="Delete every vector in the namespace and the manifest first (needed once for an index not built by this tool)",
+    )
+    args = parser.parse_args(argv)
+
+    load_dotenv()
+    pipeline = FaqIngestionPipeline(
+        index=Pinecone(api_key=os.getenv("PINECONE_API_KEY")).Index(args.index),
+        embeddings=OpenAIEmbeddings(api_key=os.getenv("OPENAI_API_KEY"), model="text-embedding-3-small"),
+        manifest_path=args.manifest,
+        namespace=args.namespace,
+    )
+    pipeline.run(iter_documents(args.docs), prune=not args.no_prune, rebuild=args.rebuild)
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+    main()
@@ -1,30 +1,47 @@
+import json
+import logging
 import os
+import threading
 from datetime import datetime
 from typing import Annotated
 
 from dotenv import load_dotenv
+from langchain_core.messages import RemoveMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.runnables import Runnable, RunnableConfig
 from langgraph.checkpoint.memory import MemorySaver
+from pathlib import Path
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.message import AnyMessage, add_messages
 from langgraph.prebuilt import tools_condition
-from langchain_openai import ChatOpenAI
 
 from typing_extensions import TypedDict
 
 from backend.sales_agent.tools import (
+    CACHE_DIR,
     add_product_to_cart,
+    add_products_to_cart,
+    check_job_status,
     check_order_status,
     create_order,
+    finished_job_updates,
     get_available_categories,
     search_products,
     retrieve_faq_context_from_vectorstore
 )
 
+from backend.sales_agent.checkpointer import SqliteCheckpointSaver
+from backend.sales_agent.conversation_window import (
+    DEFAULT_WINDOW_KEEP_TOKENS,
+    DEFAULT_WINDOW_MAX_TOKENS,
+    render_transcript,
+    split_conversation,
+)
+from backend.sales_agent.intent_router import DEFAULT_MIN_CONFIDENCE, IntentClassifier, IntentRouter
+from backend.sales_agent.llm_cache import CachedChatRunnable, ResponseCache, model_namespace
 from backend.sales_agent.utils import create_tool_node_with_fallback
 
-from langfuse.callback import CallbackHandler
+logger = logging.getLogger(__name__)
 
 load_dotenv()
 
@@ -33,21 +50,51 @@ os.environ["LANGFUSE_SECRET_KEY"] = os.getenv("LANGFUSE_SECRET_KEY")
 os.environ["LANGFUSE_PUBLIC_KEY"] = os.getenv("LANGFUSE_PUBLIC_KEY")
 os.environ["LANGFUSE_HOST"] = os.getenv("LANGFUSE_HOST")
 
-langfuse_handler = CallbackHandler()
+# The OpenAI and Langfuse clients, and the compiled graph that needs them, are created on
+# first use: importing them costs seconds that Streamlit cold starts and tests need not pay.
+_lock = threading.RLock()
+_llm = None
+_langfuse_handler = None
+_graph = None
+
+def get_llm():
+    """Returns the shared chat model, creating it on first use."""
+    global _llm
+    if _llm is None:
+        with _lock:
+            if _llm is None:
+                from langchain_openai import ChatOpenAI
+                _llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+    return _llm
+
+def get_langfuse_handler():
+    """Returns the shared Langfuse callback handler, creating it on first use."""
+    global _langfuse_handler
+    if _langfuse_handler is None:
+        with _lock:
+            if _langfuse_handler is None:
+                from langfuse.callback import CallbackHandler
+                _langfuse_handler = CallbackHandler()
+    return _langfuse_handler
 
 class State(TypedDict):
     messages: Annotated[list[AnyMessage], add_messages]
     user_info: str
+    job_updates: str
+    summary: str
 
 class Assistant:
     def __init__(self, runnable: Runnable):
         self.runnable = runnable
 
     def __call__(self, state: State, config: RunnableConfig):
+        # Background jobs that finished since the last turn are announced exactly once
+        finished_jobs = finished_job_updates(config)
+        job_updates = "\n".join(json.dumps(job, default=str) for job in finished_jobs) or "None"
         while True:
             configuration = config.get("configurable", {})
             customer_id = configuration.get("customer_id", None)
-            state = {**state, "user_info": customer_id}
+            state = {**state, "user_info": customer_id, "job_updates": job_updates, "summary": state.get("summary") or "None"}
             result = self.runnable.invoke(state)
 
             # If the LLM happens to return an empty response, we will re-prompt it again for an actual response.
@@ -62,7 +109,48 @@ class Assistant:
                 break
         return {"messages": result}
 
-llm = ChatOpenAI(model="gpt-4o-mini", temperature=0)
+# The conversation sent to the LLM is capped: past CONVERSATION_MAX_TOKENS, older turns are
+# folded into a running summary until the recent window is down to CONVERSATION_KEEP_TOKENS
+CONVERSATION_MAX_TOKENS = int(os.getenv("CONVERSATION_MAX_TOKENS", str(DEFAULT_WINDOW_MAX_TOKENS)))
+CONVERSATION_KEEP_TOKENS = int(os.getenv("CONVERSATION_KEEP_TOKENS", str(DEFAULT_WINDOW_KEEP_TOKENS)))
+
+summary_prompt = ChatPromptTemplate.from_messages(
+    [
+        (
+            "system",
+            """You keep a running summary of a conversation between a customer and the virtual sales assistant of an online store.
+            Fold the new part of the transcript into the existing summary. Keep the customer's needs and preferences,
+            products discussed or added to the cart (names, prices, quantities), order ids and statuses, and open questions.
+            Leave out small talk. Reply with the updated summary only, in at most 200 words.""",
+        ),
+        ("human", "Existing summary:\n{summary}\n\nNew transcript:\n{transcript}"),
+    ]
+)
+
+class ConversationSummarizer:
+    """Folds turns that no longer fit the conversation window into the state's summary."""
+
+    def __init__(self, runnable: Runnable, max_tokens: int, keep_tokens: int):
+        self.runnable = runnable
+        self.max_tokens = max_tokens
+        self.keep_tokens = keep_tokens
+
+    def __call__(self, state: State, config: RunnableConfig):
+        older, _ = split_conversation(state["messages"], self.max_tokens, self.keep_tokens)
+        if not older:
+            return {}
+        try:
+            result = self.runnable.invoke(
+                {"summary": state.get("summary") or "None", "transcript": render_transcript(older)}, config
+            )
+        except Exception as e:
+            # A longer prompt this turn beats failing the turn; the next turn tries again
+            logger.warning(f"Could not summarize {len(older)} message(s): {e}")
+            return {}
+        return {
+            "summary": result.content,
+            "messages": [RemoveMessage(id=message.id) for message in older],
+        }
 
 assistant_prompt = ChatPromptTemplate.from_messages(
     [
@@ -87,6 +175,8 @@ assistant_prompt = ChatPromptTemplate.from_messages(
 
             When handling orders:
             - Verify product availability before confirming orders
+            - When the customer wants several products, add them with one `add_products_to_cart` call
+            - Cart and checkout steps that need the browser run in the background and return a job_id: tell the customer they are in progress, and use `check_job_status` when asked about them
             - Clearly communicate order details and total costs
             - Provide order tracking information
             - Keep customers informed about their order status
@@ -107,7 +197,9 @@ assistant_prompt = ChatPromptTemplate.from_messages(
 
             If you can't find exactly what the customer is looking for, explore alternatives and provide helpful suggestions before concluding that an item is unavailable.
 
-            \n\nCurrent user:\n<User>\n{user_info}\n</User>
+            \n\nSummary of the earlier conversation:\n<Summary>\n{summary}\n</Summary>
+            \nCurrent user:\n<User>\n{user_info}\n</User>
+            \nBackground jobs finished since the last turn (let the customer know the outcome):\n<Jobs>\n{job_updates}\n</Jobs>
             \nCurrent time: {time}.""",
         ),
         ("placeholder", "{messages}"),
@@ -120,7 +212,9 @@ safe_tools = [
     search_products,
     check_order_status,
     retrieve_faq_context_from_vectorstore,
-    add_product_to_cart
+    add_product_to_cart,
+    add_products_to_cart,
+    check_job_status
 ]
 
 # Sensitive tools (confirmation needed)
@@ -130,14 +224,75 @@ sensitive_tools = [
 
 sensitive_tool_names = {tool.name for tool in sensitive_tools}
 
-assistant_runnable = assistant_prompt | llm.bind_tools(safe_tools + sensitive_tools)
+# "sqlite" keeps conversation checkpoints in a database file shared by every agent process
+# (see checkpointer.py); "memory" keeps them in this process only
+CHECKPOINT_BACKEND = os.getenv("CHECKPOINT_BACKEND", "sqlite").lower()
+CHECKPOINT_DB_PATH = os.getenv("CHECKPOINT_DB_PATH", str(CACHE_DIR / "checkpoints.db"))
+CHECKPOINT_KEEP_LAST = int(os.getenv("CHECKPOINT_KEEP_LAST", "10"))
+CHECKPOINT_TTL_SECONDS = float(os.getenv("CHECKPOINT_TTL_SECONDS", str(7 * 24 * 3600)))
+CHECKPOINT_COMPACT_SECONDS = float(os.getenv("CHECKPOINT_COMPACT_SECONDS", "300"))
+
+def create_checkpointer():
+    """Creates the checkpointer selected by CHECKPOINT_BACKEND."""
+    if CHECKPOINT_BACKEND == "memory":
+        return MemorySaver()
+    Path(CHECKPOINT_DB_PATH).parent.mkdir(parents=True, exist_ok=True)
+    return SqliteCheckpointSaver(
+        CHECKPOINT_DB_PATH,
+        keep_last=CHECKPOINT_KEEP_LAST,
+        ttl_seconds=CHECKPOINT_TTL_SECONDS,
+        compact_interval=CHECKPOINT_COMPACT_SECONDS,
+    )
+
+# Assistant responses are cached across conversations and agent processes (see llm_cache.py).
+# The prompt renders the current customer, so answers are only shared between conversations
+# of the same customer. The current time is bucketed to RESPONSE_CACHE_TIME_BUCKET_SECONDS
+# (0 leaves it out of the key).
+RESPONSE_CACHE_ENABLED = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RESPONSE_CACHE_PATH = os.getenv("RESPONSE_CACHE_PATH", str(CACHE_DIR / "responses.db"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(24 * 3600)))
+RESPONSE_CACHE_TIME_BUCKET_SECONDS = float(os.getenv("RESPONSE_CACHE_TIME_BUCKET_SECONDS", str(24 * 3600)))
+# Every assistant prompt input except the job updates, which bypass the cache
+ASSISTANT_CACHE_KEY_FIELDS = ("messages", "summary", "user_info")
+_response_cache = None
+
+def get_response_cache():
+    """Returns the shared assistant response cache, creating it on first use."""
+    global _response_cache
+    if _response_cache is None:
+        with _lock:
+            if _response_cache is None:
+                _response_cache = ResponseCache(
+                    RESPONSE_CACHE_PATH,
+                    ttl_seconds=RESPONSE_CACHE_TTL_SECONDS,
+                    max_memory_entries=int(os.getenv("RESPONSE_CACHE_MEMORY_ENTRIES", "512")),
+                    max_disk_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+                )
+    return _response_cache
 
-builder = StateGraph(State)
+def has_job_updates(state) -> bool:
+    # Job outcomes are announced once, so there is nothing to reuse in those answers
+    return state.get("job_updates", "None") != "None"
 
-# Define nodes: these do the work
-builder.add_node("assistant", Assistant(assistant_runnable))
-builder.add_node("safe_tools", create_tool_node_with_fallback(safe_tools))
-builder.add_node("sensitive_tools", create_tool_node_with_fallback(sensitive_tools))
+def create_assistant_runnable(tools):
+    """Binds the tools to the chat model behind the assistant prompt, with the response cache in front."""
+    llm = get_llm()
+    runnable = assistant_prompt | llm.bind_tools(tools)
+    if not RESPONSE_CACHE_ENABLED:
+        return runnable
+    return CachedChatRunnable(
+        runnable,
+        get_response_cache(),
+        model_namespace(llm, tools, assistant_prompt),
+        key_fields=ASSISTANT_CACHE_KEY_FIELDS,
+        time_bucket_seconds=RESPONSE_CACHE_TIME_BUCKET_SECONDS,
+        bypass=has_job_updates,
+    )
+
+# Caps how many tool calls of one AI message ToolNode runs in parallel
+TOOL_MAX_CONCURRENCY = int(os.getenv("TOOL_MAX_CONCURRENCY", "4"))
+# The graph pauses before these nodes until the customer approves the tool calls
+INTERRUPT_BEFORE = ["sensitive_tools"]
 
 def route_tools(state: State):
     next_node = tools_condition(state)
@@ -146,21 +301,72 @@ def route_tools(state: State):
         return END
     # If there is a tool to be invoked then...
     ai_message = state["messages"][-1]
-    # This assumes single tool calls. To handle parallel tool calling, you'd want to
-    # use an ANY condition
-    first_tool_call = ai_message.tool_calls[0]
-    if first_tool_call["name"] in sensitive_tool_names:
+    # Parallel tool calls run as one batch: a single sensitive call sends the whole
+    # batch through the confirmation step
+    if any(tool_call["name"] in sensitive_tool_names for tool_call in ai_message.tool_calls):
         return "sensitive_tools"
     return "safe_tools"
 
-# Define edges: these determine how the control flow moves
-builder.add_edge(START, "assistant")
-builder.add_conditional_edges(
-    "assistant", route_tools, ["safe_tools", "sensitive_tools", END]
-)
-builder.add_edge("safe_tools", "assistant")
-builder.add_edge("sensitive_tools", "assistant")
+# Plain category and order lookups are answered from templates without the LLM (see
+# intent_router.py); messages the classifier is less sure about go to the assistant
+FAST_PATH_ENABLED = os.getenv("FAST_PATH_ENABLED", "true").lower() in ("1", "true", "yes")
+FAST_PATH_MIN_CONFIDENCE = float(os.getenv("FAST_PATH_MIN_CONFIDENCE", str(DEFAULT_MIN_CONFIDENCE)))
+fast_path_tools = [get_available_categories, check_order_status]
+
+def route_fast_path(state: State):
+    # The fast path ends the turn with a reply of its own when it answered
+    last_message = state["messages"][-1]
+    if last_message.type == "ai" and not last_message.tool_calls:
+        return END
+    return "summarize"
+
+def build_graph():
+    """Builds and compiles the sales agent graph."""
+    assistant_runnable = create_assistant_runnable(safe_tools + sensitive_tools)
+
+    builder = StateGraph(State)
+
+    # Define nodes: these do the work
+    if FAST_PATH_ENABLED:
+        builder.add_node("fast_path", IntentRouter(fast_path_tools, IntentClassifier(FAST_PATH_MIN_CONFIDENCE)))
+    builder.add_node(
+        "summarize",
+        ConversationSummarizer(summary_prompt | get_llm(), CONVERSATION_MAX_TOKENS, CONVERSATION_KEEP_TOKENS),
+    )
+    builder.add_node("assistant", Assistant(assistant_runnable))
+    builder.add_node("safe_tools", create_tool_node_with_fallback(safe_tools, TOOL_MAX_CONCURRENCY))
+    # Approved batches may mix safe and sensitive calls, so this node knows every tool
+    builder.add_node("sensitive_tools", create_tool_node_with_fallback(safe_tools + sensitive_tools, TOOL_MAX_CONCURRENCY))
+
+    # Define edges: these determine how the control flow moves
+    # Each new customer message first tries the fast path, then passes the conversation window
+    if FAST_PATH_ENABLED:
+        builder.add_edge(START, "fast_path")
+        builder.add_conditional_edges("fast_path", route_fast_path, ["summarize", END])
+    else:
+        builder.add_edge(START, "summarize")
+    builder.add_edge("summarize", "assistant")
+    builder.add_conditional_edges(
+        "assistant", route_tools, ["safe_tools", "sensitive_tools", END]
+    )
+    builder.add_edge("safe_tools", "assistant")
+    builder.add_edge("sensitive_tools", "assistant")
+
+    # Compile the graph
+    checkpointer = create_checkpointer()
+    return builder.compile(checkpointer=checkpointer, interrupt_before=INTERRUPT_BEFORE).with_config({"callbacks": [get_langfuse_handler()]})
+
+def get_graph():
+    """Returns the compiled graph, building it on first use."""
+    global _graph
+    if _graph is None:
+        with _lock:
+            if _graph is None:
+                _graph = build_graph()
+    return _graph
 
-# Compile the graph
-memory = MemorySaver()
-graph = builder.compile(checkpointer=memory, interrupt_before=["sensitive_tools"]).with_config({"callbacks": [langfuse_handler]})
\ No newline at end of file
+def __getattr__(name):
+    # Keeps `graph.graph` working for existing callers while still building it lazily
+    if name == "graph":
+        return get_graph()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,262 @@
+"""
+Fast path for turns that map onto a single tool.
+
+Questions such as "what categories do you have?", "status of order 42" or "list my orders"
+otherwise take two LLM round trips: one to pick the tool and one to phrase its result.
+The IntentRouter node runs ahead of the assistant. A local classifier (patterns for order
+ids plus a small weighted keyword model) recognizes these intents. The router then calls
+the tool directly and answers with a templated reply. When the classifier is unsure, or
+the message asks for anything beyond the plain lookup, the turn goes to the LLM as before.
+
+The router writes the same AI tool call / tool result / AI answer messages the assistant
+would, so later LLM turns see an ordinary conversation.
+"""
+from dataclasses import dataclass
+import json
+import logging
+import re
+import uuid
+from typing import Any, Dict, Optional, Sequence
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+
+logger = logging.getLogger(__name__)
+
+CATEGORIES = "categories"
+ORDER_STATUS = "order_status"
+ORDER_LIST = "order_list"
+# Keyword group shared by ORDER_STATUS and ORDER_LIST
+ORDERS = "orders"
+
+DEFAULT_MIN_CONFIDENCE = 0.75
+
+# Messages longer than this are rarely a plain lookup
+MAX_WORDS = 14
+
+# How much each word speaks for an intent. Orders resolve to ORDER_STATUS when the message
+# names an order id, and to ORDER_LIST otherwise.
+KEYWORD_WEIGHTS: Dict[str, Dict[str, float]] = {
+    CATEGORIES: {
+        "categories": 2.0,
+        "category": 2.0,
+        "departments": 1.5,
+        "kinds": 1.0,
+        "types": 1.0,
+        "sell": 1.0,
+        "carry": 1.0,
+        "offer": 0.5,
+        "have": 0.5,
+        "available": 0.5,
+        "products": 0.5,
+        "product": 0.5,
+        "list": 0.5,
+        "show": 0.5,
+        "all": 0.5,
+    },
+    ORDERS: {
+        "order": 2.0,
+        "orders": 2.0,
+        "status": 1.5,
+        "track": 1.5,
+        "tracking": 1.5,
+        "history": 1.5,
+        "shipped": 1.0,
+        "delivered": 1.0,
+        "arrive": 1.0,
+        "where": 0.5,
+        "list": 0.5,
+        "show": 0.5,
+        "check": 0.5,
+        "all": 0.5,
+        "past": 0.5,
+        "previous": 0.5,
+        "recent": 0.5,
+        "latest": 0.5,
+        "placed": 0.5,
+    },
+}
+
+# Words that carry no intent either way
+STOPWORDS = frozenset(
+    "a an the is are am was were be do does did can could would will you your i me my mine "
+    "we our us what which whats of for to on in at with about please hi hello hey there "
+    "thanks thank it its this that tell give see let know just any some number no id s".split()
+)
+
+# Words asking for more than the lookup (actions, comparisons, complaints): the LLM handles those
+ESCALATION_WORDS = frozenset(
+    "cancel return refund change modify add buy purchase remove delete why wrong damaged broken "
+    "missing late complaint cart checkout recommend best cheapest cheap price prices cost costs "
+    "how compare and or but not instead".split()
+)
+
+ORDER_ID_PATTERN = re.compile(r"(?:\border\b\s*(?:#|no\.?|number|id)?\s*:?\s*|#)(\d+)\b", re.IGNORECASE)
+WORD_PATTERN = re.compile(r"[a-z]+|\d+")
+
+
+@dataclass
+class Intent:
+    """A recognized intent and the tool call that answers it."""
+
+    name: str
+    tool_name: str
+    args: Dict[str, Any]
+    confidence: float
+
+
+class IntentClassifier:
+    """
+    Scores a customer message against the fast-path intents.
+
+    Each intent's score is the weight of its keywords in the message; the confidence is
+    that score relative to the message's other content words, so extra detail
+    ("... for boats under 200") lowers it.
+
+    Args:
+        min_confidence (float): Confidence below which `classify` returns None.
+        unknown_word_weight (float): How much each unrecognized content word counts against an intent.
+    """
+
+    def __init__(self, min_confidence: float = DEFAULT_MIN_CONFIDENCE, unknown_word_weight: float = 0.5):
+        self.min_confidence = min_confidence
+        self.unknown_word_weight = unknown_word_weight
+
+    def classify(self, text: str) -> Optional[Intent]:
+        """
+        Returns the intent of `text`, or None when it should go to the LLM.
+
+        Args:
+            text (str): The customer's message.
+
+        Returns:
+            Optional[Intent]: The intent with the tool call answering it, if confident.
+        """
+        order_ids = ORDER_ID_PATTERN.findall(text)
+        if len(order_ids) > 1:
+            return None
+        words = WORD_PATTERN.findall(ORDER_ID_PATTERN.sub(" order ", text.lower()))
+        if not words or len(words) > MAX_WORDS or ESCALATION_WORDS.intersection(words):
+            return None
+
+        content_words = [word for word in words if word not in STOPWORDS and not word.isdigit()]
+        scores = {
+            name: sum(weights.get(word, 0.0) for word in set(content_words))
+            for name, weights in KEYWORD_WEIGHTS.items()
+        }
+        name, score = max(scores.items(), key=lambda item: item[1])
+        # Both intents being plausible means the message is about something else
+        if not score or any(other and other >= score / 2 for other_name, other in scores.items() if other_name != name):
+            return None
+        unknown = sum(1 for word in content_words if word not in KEYWORD_WEIGHTS[name])
+        confidence = score / (score + self.unknown_word_weight * unknown)
+        if confidence < self.min_confidence:
+            return None
+
+        if name == CATEGORIES:
+            return Intent(CATEGORIES, "get_available_categories", {}, confidence)
+        if order_ids:
+            return Intent(ORDER_STATUS, "check_order_status", {"order_id": order_ids[0]}, confidence)
+        return Intent(ORDER_LIST, "check_order_status", {"order_id": None}, confidence)
+
+
+def _format_amount(amount: Any) -> str:
+    try:
+        return f"{float(amount):.2f}"
+    except (TypeError, ValueError):
+        return str(amount)
+
+
+def render_reply(intent: Intent, result: Dict[str, Any]) -> Optional[str]:
+    """
+    Phrases a tool result for the customer.
+
+    Returns:
+        Optional[str]: The reply, or None when the result needs the LLM to explain it.
+    """
+    if intent.name == CATEGORIES:
+        categories = result.get("categories") or []
+        if not categories:
+            return None
+        lines = "\n".join(f"- {category}" for category in categories)
+        return f"We currently carry products in these categories:\n{lines}\n\nWould you like to see the products in one of them?"
+
+    if result.get("status") != "success":
+        if intent.name == ORDER_STATUS and result.get("message") == "Order not found":
+            return f"I couldn't find order {intent.args['order_id']} on your account. Could you double-check the order number?"
+        return None
+
+    if intent.name == ORDER_STATUS:
+        return (
+            f"Order {result['order_id']} is **{result['order_status']}**.\n"
+            f"- Order date: {result['order_date']}\n"
+            f"- Products: {result['products']}\n"
+            f"- Total: {_format_amount(result['total_amount'])}"
+        )
+
+    orders = result.get("orders") or []
+    if not orders:
+        return "I couldn't find any orders on your account yet."
+    lines = "\n".join(
+        f"- Order {order['order_id']} ({order['order_date']}): **{order['status']}**, "
+        f"{order['item_count']} item(s), total {_format_amount(order['total_amount'])}"
+        for order in orders
+    )
+    reply = f"Here are your most recent orders:\n{lines}"
+    metadata = result.get("metadata") or {}
+    if metadata.get("next_offset") is not None:
+        reply += f"\n\nYou have {metadata['total_results']} orders in total. Ask me if you'd like to see older ones."
+    return reply + "\n\nWould you like the details of one of them?"
+
+
+class IntentRouter:
+    """
+    Graph node answering fast-path intents without the LLM.
+
+    Returns the tool call, its result and the templated reply as new messages, or no update
+    when the turn should go to the assistant (see `route_fast_path`).
+
+    Args:
+        tools (Sequence[BaseTool]): Tools the router may call, looked up by name.
+        classifier (IntentClassifier, optional): Defaults to an IntentClassifier().
+    """
+
+    def __init__(self, tools: Sequence[Any], classifier: Optional[IntentClassifier] = None):
+        self.tools = {tool.name: tool for tool in tools}
+        self.classifier = classifier or IntentClassifier()
+
+    def __call__(self, state: Dict[str, Any], config: RunnableConfig):
+        messages = state["messages"]
+        if not messages or not isinstance(messages[-1], HumanMessage) or not isinstance(messages[-1].content, str):
+            return {}
+        intent = self.classifier.classify(messages[-1].content)
+        if intent is None or intent.tool_name not in self.tools:
+            return {}
+
+        try:
+            result = self.tools[intent.tool_name].invoke(intent.args, config)
+        except Exception as e:
+            # Let the assistant deal with it; it can explain the problem to the customer
+            logger.warning(f"Fast path {intent.name} failed, falling back to the assistant: {e}")
+            return {}
+        reply = render_reply(intent, result)
+        if reply is None:
+            return {}
+
+        logger.info(f"Answered {intent.name} on the fast path (confidence {intent.confidence:.2f})")
+        tool_call_id = f"call_{uuid.uuid4().hex[:24]}"
+        return {
+            "messages": [
+                AIMessage(
+                    content="",
+                    tool_calls=[{"name": intent.tool_name, "args": intent.args, "id": tool_call_id, "type": "tool_call"}],
+                ),
+                ToolMessage(
+                    content=json.dumps(result, ensure_ascii=False, default=str),
+                    name=intent.tool_name,
+                    tool_call_id=tool_call_id,
+                ),
+                AIMessage(content=reply, response_metadata={"fast_path": intent.name}),
+            ]
+        }
+
@@ -0,0 +1,180 @@
+"""
+Background jobs for slow tools.
+
+Browser automation takes seconds, and inside the ToolNode it blocks the whole agent turn.
+Tools hand such work to the JobManager instead and return a job handle right away; the
+customer keeps chatting while a bounded worker pool runs the job. Jobs of one chat
+session run one at a time, in submission order, since they act on the same cart and
+Chrome profile. Finished jobs are reported once through `pop_finished`, which the
+assistant uses to tell the customer in the next turn.
+"""
+import atexit
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+import logging
+import threading
+import time
+import uuid
+from typing import Any, Callable, Deque, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+
+class JobQueueFullError(RuntimeError):
+    """Raised when too many jobs are outstanding to accept another one."""
+
+
+@dataclass
+class Job:
+    """A unit of background work and its outcome."""
+
+    job_id: str
+    session_id: str
+    name: str
+    description: str
+    func: Callable[[], Any] = field(repr=False)
+    status: str = QUEUED
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    reported: bool = False
+
+    @property
+    def done(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def as_dict(self) -> Dict[str, Any]:
+        """Returns the job as the tools report it."""
+        info: Dict[str, Any] = {"job_id": self.job_id, "name": self.name, "description": self.description, "status": self.status}
+        if self.finished_at is not None:
+            info["seconds"] = round(self.finished_at - (self.started_at or self.submitted_at), 1)
+        if self.status == SUCCEEDED:
+            info["result"] = self.result
+        elif self.status == FAILED:
+            info["error"] = self.error
+        return info
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded thread pool, one at a time per session.
+
+    Args:
+        max_workers (int): Jobs running at once across all sessions.
+        max_pending (int): Queued plus running jobs accepted before `submit` refuses more.
+        retention_seconds (float): How long finished jobs stay queryable.
+    """
+
+    def __init__(self, max_workers: int = 2, max_pending: int = 32, retention_seconds: float = 3600.0):
+        self.max_pending = max_pending
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, Job] = {}
+        # Jobs of a session waiting for, or holding, that session's turn
+        self._session_queues: Dict[str, Deque[Job]] = {}
+
+    def submit(self, session_id: str, name: str, func: Callable[[], Any], description: str = "") -> Job:
+        """
+        Queues `func` to run in the background for a chat session.
+
+        Args:
+            session_id (str): The chat session (LangGraph thread_id) the job belongs to.
+            name (str): Short job type, e.g. the tool name.
+            func (Callable[[], Any]): The work. Its return value becomes the job result.
+            description (str): What the job does, in words the assistant can repeat.
+
+        Returns:
+            Job: The queued job.
+
+        Raises:
+            JobQueueFullError: If `max_pending` jobs are already outstanding.
+        """
+        with self._lock:
+            self._prune()
+            outstanding = sum(len(queue) for queue in self._session_queues.values())
+            if outstanding >= self.max_pending:
+                raise JobQueueFullError(f"{outstanding} background jobs are already outstanding")
+            job = Job(uuid.uuid4().hex[:12], session_id, name, description, func)
+            self._jobs[job.job_id] = job
+            queue = self._session_queues.setdefault(session_id, deque())
+            queue.append(job)
+            if len(queue) == 1:
+                self._executor.submit(self._run, job)
+        logger.info(f"Queued job {job.job_id} ({name}) for session {session_id}")
+        return job
+
+    def _run(self, job: Job) -> None:
+        with self._lock:
+            job.status, job.started_at = RUNNING, time.time()
+        try:
+            result, error, status = job.func(), None, SUCCEEDED
+        except Exception as e:
+            logger.exception(f"Job {job.job_id} ({job.name}) failed")
+            result, error, status = None, str(e) or type(e).__name__, FAILED
+
+        with self._lock:
+            job.result, job.error, job.status, job.finished_at = result, error, status, time.time()
+            queue = self._session_queues[job.session_id]
+            queue.popleft()
+            if queue:
+                self._executor.submit(self._run, queue[0])
+            else:
+                del self._session_queues[job.session_id]
+        logger.info(f"Job {job.job_id} ({job.name}) {status} in {job.finished_at - job.started_at:.1f}s")
+
+    def _prune(self) -> None:
+        cutoff = time.time() - self.retention_seconds
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.done and job.finished_at < cutoff]:
+            del self._jobs[job_id]
+
+    def get(self, job_id: str, session_id: Optional[str] = None) -> Optional[Job]:
+        """Returns a job, or None if it is unknown or belongs to another session."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+        if job is None or (session_id is not None and job.session_id != session_id):
+            return None
+        return job
+
+    def jobs_for(self, session_id: str) -> List[Job]:
+        """Returns the session's jobs, oldest first."""
+        with self._lock:
+            return sorted((job for job in self._jobs.values() if job.session_id == session_id), key=lambda job: job.submitted_at)
+
+    def pop_finished(self, session_id: str) -> List[Job]:
+        """Returns the session's finished jobs that were not reported yet, and marks them reported."""
+        with self._lock:
+            finished = [job for job in self._jobs.values() if job.session_id == session_id and job.done and not job.reported]
+            for job in finished:
+                job.reported = True
+        return sorted(finished, key=lambda job: job.finished_at)
+
+    def mark_reported(self, job: Job) -> None:
+        """Marks a job as reported, so `pop_finished` does not return it again."""
+        with self._lock:
+            job.reported = True
+
+    def shutdown(self, wait: bool = False) -> None:
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+
+
+_manager_lock = threading.Lock()
+_manager: Optional[JobManager] = None
+
+
+def get_job_manager(**kwargs: Any) -> JobManager:
+    """Returns the process-wide JobManager, creating it with `kwargs` on first use."""
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = JobManager(**kwargs)
+            atexit.register(_manager.shutdown)
+        return _manager
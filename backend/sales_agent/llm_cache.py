@@ -0,0 +1,365 @@
+"""
+Persistent cache of assistant LLM responses.
+
+The assistant model runs at temperature 0, so the same prompt gets effectively the same
+answer, and the opening turns of many conversations are identical ("what categories do
+you have?"). A response is cached under a hash of the normalized conversation plus a
+namespace identifying the model, its parameters, the bound tool schemas and the prompt
+template, so changing any of them starts a fresh cache. Every prompt input that can
+change the answer, including the customer the prompt is personalized for, must be part of
+the key; the current time only enters it as a coarse bucket.
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+import hashlib
+import json
+import logging
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage, convert_to_messages
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from backend.database.config import DatabaseConfig
+from backend.database.db_manager import DatabaseManager
+from backend.sales_agent.embedding_cache import normalize_query
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS responses (
+        Namespace TEXT NOT NULL,
+        RequestKey TEXT NOT NULL,
+        Response TEXT NOT NULL,
+        Size INTEGER NOT NULL,
+        CreatedAt REAL NOT NULL,
+        LastUsed REAL NOT NULL,
+        PRIMARY KEY (Namespace, RequestKey)
+    ) WITHOUT ROWID;
+    CREATE INDEX IF NOT EXISTS idx_responses_last_used ON responses (LastUsed);
+    CREATE INDEX IF NOT EXISTS idx_responses_created_at ON responses (CreatedAt);
+"""
+
+
+def _digest(value: Any) -> str:
+    payload = json.dumps(value, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def model_namespace(llm: Any, tools: Sequence[Any], prompt: Any = None) -> str:
+    """
+    Identifies everything besides the prompt inputs that shapes a response.
+
+    Args:
+        llm (BaseChatModel): The chat model; its name and sampling parameters are used.
+        tools (Sequence[BaseTool]): The tools bound to the model; their schemas are used.
+        prompt (ChatPromptTemplate, optional): The prompt template; its text is used.
+
+    Returns:
+        str: A hash to use as the cache namespace.
+    """
+    params = {
+        name: getattr(llm, name, None)
+        for name in ("model_name", "temperature", "top_p", "max_tokens", "seed")
+    }
+    return _digest(
+        {
+            "model": type(llm).__name__,
+            "params": params,
+            "tools": [convert_to_openai_tool(tool) for tool in tools],
+            "prompt": prompt.pretty_repr() if prompt is not None else None,
+        }
+    )
+
+
+def _normalize_text(content: Any, casefold: bool = False) -> Any:
+    if not isinstance(content, str):
+        return content
+    return normalize_query(content) if casefold else re.sub(r"\s+", " ", content).strip()
+
+
+def normalize_messages(messages: Sequence[Any]) -> List[Dict[str, Any]]:
+    """
+    Reduces messages to the parts the model sees.
+
+    Message and tool call ids differ between conversations and are dropped; tool results
+    follow their calls in order, so the pairing survives. Customer text is normalized like
+    search queries, so "What categories do you have?" and "what categories do you have"
+    share an entry.
+    """
+    normalized = []
+    for message in convert_to_messages(messages):
+        entry: Dict[str, Any] = {
+            "type": message.type,
+            "content": _normalize_text(message.content, casefold=isinstance(message, HumanMessage)),
+        }
+        if isinstance(message, AIMessage) and message.tool_calls:
+            entry["tool_calls"] = [{"name": call["name"], "args": call["args"]} for call in message.tool_calls]
+        if isinstance(message, ToolMessage):
+            entry["status"] = message.status
+        normalized.append(entry)
+    return normalized
+
+
+@dataclass
+class ResponseCacheStats:
+    """Hit/miss counters and sizes of a ResponseCache."""
+
+    memory_hits: int
+    disk_hits: int
+    misses: int
+    bypassed: int
+    expirations: int
+    evictions: int
+    memory_entries: int
+    disk_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+
+class ResponseCache:
+    """
+    Two-tier cache of LLM responses keyed by namespace and request key.
+
+    The first tier is an in-process LRU. The second is a SQLite file shared by every agent
+    process, evicted least-recently-used once it grows past `max_disk_bytes`. Entries in
+    both tiers expire `ttl_seconds` after they were stored.
+    """
+
+    def __init__(
+        self,
+        db_path: Optional[str],
+        ttl_seconds: float = 24 * 3600.0,
+        max_memory_entries: int = 512,
+        max_disk_bytes: int = 32 * 1024 * 1024,
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory: "OrderedDict[Tuple[str, str], Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._disk_lock = threading.Lock()
+
+        self._memory_hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        self._bypassed = 0
+        self._expirations = 0
+        self._evictions = 0
+
+        self.db_manager: Optional[DatabaseManager] = None
+        self._disk_bytes = 0
+        if db_path:
+            self.db_manager = DatabaseManager(
+                DatabaseConfig(db_name="response_cache.db", db_path=db_path, pool_size=2)
+            )
+            with self.db_manager.get_connection() as conn:
+                conn.executescript(RESPONSE_CACHE_SCHEMA)
+                expired = conn.execute("DELETE FROM responses WHERE CreatedAt < ?", (time.time() - ttl_seconds,)).rowcount
+                conn.commit()
+                self._disk_bytes = conn.execute("SELECT COALESCE(SUM(Size), 0) FROM responses").fetchone()[0]
+            self.db_manager.set_journal_mode()
+            if expired:
+                logger.info(f"Dropped {expired} expired cached responses")
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return now - created_at > self.ttl_seconds
+
+    def get(self, namespace: str, key: str) -> Optional[Dict[str, Any]]:
+        """Returns the cached response, or None on a miss."""
+        cache_key = (namespace, key)
+        now = time.time()
+        expired = False
+        with self._lock:
+            entry = self._memory.get(cache_key)
+            if entry is not None:
+                if not self._expired(entry[0], now):
+                    self._memory.move_to_end(cache_key)
+                    self._memory_hits += 1
+                    return entry[1]
+                del self._memory[cache_key]
+                expired = True
+
+        if self.db_manager is not None:
+            with self._disk_lock, self.db_manager.get_connection() as conn:
+                row = conn.execute(
+                    "SELECT Response, Size, CreatedAt FROM responses WHERE Namespace = ? AND RequestKey = ?", cache_key
+                ).fetchone()
+                if row is not None and self._expired(row["CreatedAt"], now):
+                    conn.execute("DELETE FROM responses WHERE Namespace = ? AND RequestKey = ?", cache_key)
+                    self._disk_bytes -= row["Size"]
+                    expired, row = True, None
+                elif row is not None:
+                    conn.execute(
+                        "UPDATE responses SET LastUsed = ? WHERE Namespace = ? AND RequestKey = ?", (now, *cache_key)
+                    )
+                conn.commit()
+            if row is not None:
+                response = json.loads(row["Response"])
+                with self._lock:
+                    self._disk_hits += 1
+                    self._remember(cache_key, row["CreatedAt"], response)
+                return response
+
+        with self._lock:
+            self._expirations += int(expired)
+            self._misses += 1
+        return None
+
+    def put(self, namespace: str, key: str, response: Dict[str, Any]) -> None:
+        """Stores a response in both tiers."""
+        cache_key = (namespace, key)
+        now = time.time()
+        with self._lock:
+            self._remember(cache_key, now, response)
+
+        if self.db_manager is None:
+            return
+        payload = json.dumps(response, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        with self._disk_lock, self.db_manager.get_connection() as conn:
+            previous = conn.execute(
+                "SELECT Size FROM responses WHERE Namespace = ? AND RequestKey = ?", cache_key
+            ).fetchone()
+            conn.execute(
+                "INSERT OR REPLACE INTO responses (Namespace, RequestKey, Response, Size, CreatedAt, LastUsed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (*cache_key, payload, size, now, now),
+            )
+            self._disk_bytes += size - (previous["Size"] if previous else 0)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._evict(conn)
+            conn.commit()
+
+    def record_bypass(self) -> None:
+        """Counts a request that was not eligible for caching."""
+        with self._lock:
+            self._bypassed += 1
+
+    def _remember(self, cache_key: Tuple[str, str], created_at: float, response: Dict[str, Any]) -> None:
+        self._memory[cache_key] = (created_at, response)
+        self._memory.move_to_end(cache_key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _evict(self, conn) -> None:
+        """Deletes expired, then least recently used entries until the store is under 90% of its size limit."""
+        target = int(self.max_disk_bytes * 0.9)
+        cutoff = time.time() - self.ttl_seconds
+        freed = 0
+        victims = []
+        for row in conn.execute(
+            "SELECT Namespace, RequestKey, Size FROM responses ORDER BY CreatedAt >= ?, LastUsed", (cutoff,)
+        ):
+            if self._disk_bytes - freed <= target:
+                break
+            victims.append((row["Namespace"], row["RequestKey"]))
+            freed += row["Size"]
+        conn.executemany("DELETE FROM responses WHERE Namespace = ? AND RequestKey = ?", victims)
+        self._disk_bytes -= freed
+        with self._lock:
+            self._evictions += len(victims)
+        logger.info(f"Evicted {len(victims)} cached responses ({freed} bytes)")
+
+    def stats(self) -> ResponseCacheStats:
+        """Returns the hit/miss counters and current sizes."""
+        with self._lock:
+            return ResponseCacheStats(
+                memory_hits=self._memory_hits,
+                disk_hits=self._disk_hits,
+                misses=self._misses,
+                bypassed=self._bypassed,
+                expirations=self._expirations,
+                evictions=self._evictions,
+                memory_entries=len(self._memory),
+                disk_bytes=self._disk_bytes,
+            )
+
+
+class CachedChatRunnable(Runnable):
+    """
+    Wraps a prompt | chat model runnable so identical requests are answered from a ResponseCache.
+
+    Only `key_fields` of the input dict and the time bucket make up the request key, so they
+    must cover every input the prompt renders (e.g. the customer id); an input left out lets
+    one customer's answer reach another. Requests for which `bypass(input)` is true go
+    straight to the model.
+
+    Args:
+        runnable (Runnable): The runnable to cache, returning an AIMessage.
+        cache (ResponseCache): Where responses are stored.
+        namespace (str): Identifies the model, tools and prompt, see `model_namespace`.
+        key_fields (Sequence[str]): Input fields that make up the request key.
+        time_bucket_seconds (float): Width of the time window a cached response is reused
+            in, for prompts that show the current time; 0 leaves the time out of the key.
+        bypass (Callable[[dict], bool], optional): Decides which requests skip the cache.
+    """
+
+    def __init__(
+        self,
+        runnable: Runnable,
+        cache: ResponseCache,
+        namespace: str,
+        key_fields: Sequence[str] = ("messages",),
+        time_bucket_seconds: float = 0,
+        bypass: Any = None,
+    ):
+        self.runnable = runnable
+        self.cache = cache
+        self.namespace = namespace
+        self.key_fields = tuple(key_fields)
+        self.time_bucket_seconds = time_bucket_seconds
+        self.bypass = bypass
+
+    def request_key(self, input: Dict[str, Any]) -> str:
+        fields = {
+            name: normalize_messages(input.get(name) or []) if name == "messages" else input.get(name)
+            for name in self.key_fields
+        }
+        if self.time_bucket_seconds:
+            fields["time_bucket"] = int(time.time() // self.time_bucket_seconds)
+        return _digest(fields)
+
+    def invoke(self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs: Any) -> AIMessage:
+        if self.bypass is not None and self.bypass(input):
+            self.cache.record_bypass()
+            return self.runnable.invoke(input, config, **kwargs)
+
+        key = self.request_key(input)
+        cached = self.cache.get(self.namespace, key)
+        if cached is not None:
+            logger.info(f"Answered from the response cache ({len(cached['tool_calls'])} tool call(s))")
+            return self._to_message(cached)
+
+        result = self.runnable.invoke(input, config, **kwargs)
+        # Empty answers are re-prompted by the assistant and must not be served again
+        if result.tool_calls or (isinstance(result.content, str) and result.content.strip()):
+            self.cache.put(self.namespace, key, self._to_response(result))
+        return result
+
+    @staticmethod
+    def _to_response(message: AIMessage) -> Dict[str, Any]:
+        return {
+            "content": message.content,
+            "tool_calls": [{"name": call["name"], "args": call["args"]} for call in message.tool_calls],
+            "model_name": message.response_metadata.get("model_name"),
+        }
+
+    @staticmethod
+    def _to_message(response: Dict[str, Any]) -> AIMessage:
+        # Fresh tool call ids, since a conversation may not reuse the ids of another one
+        return AIMessage(
+            content=response["content"],
+            tool_calls=[
+                {"name": call["name"], "args": call["args"], "id": f"call_{uuid.uuid4().hex[:24]}", "type": "tool_call"}
+                for call in response["tool_calls"]
+            ],
+            response_metadata={"model_name": response.get("model_name"), "cache_hit": True},
+        )
@@ -0,0 +1,106 @@
+import json
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# Rough characters-per-token ratio for English/Swedish JSON with OpenAI tokenizers
+CHARS_PER_TOKEN = 4
+
+DEFAULT_PAGE_SIZE = 10
+DEFAULT_MAX_TOKENS = 1500
+
+# Length long text fields are cut to when a page does not fit its token budget
+TRUNCATED_TEXT_CHARS = 160
+
+
+def estimate_tokens(value: Any) -> int:
+    """Estimates how many LLM tokens `value` costs once serialized as JSON."""
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False, default=str)
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def project(item: Dict[str, Any], fields: Optional[Iterable[str]], always: Sequence[str] = ()) -> Dict[str, Any]:
+    """
+    Keeps only the requested fields of a tool result item.
+
+    Args:
+        item (Dict[str, Any]): The full item.
+        fields (Optional[Iterable[str]]): Field names to keep. Keeps everything when empty.
+        always (Sequence[str]): Identifier fields that are kept regardless of `fields`.
+
+    Returns:
+        Dict[str, Any]: The projected item, in the item's own field order.
+    """
+    if not fields:
+        return item
+    wanted = set(fields) | set(always)
+    return {key: value for key, value in item.items() if key in wanted}
+
+
+def truncate_text(text: Optional[str], max_chars: int) -> Optional[str]:
+    """Shortens `text` to at most `max_chars` characters, ending on a word boundary."""
+    if text is None or len(text) <= max_chars:
+        return text
+    cut = text[:max_chars].rsplit(" ", 1)[0]
+    return f"{cut}…"
+
+
+def fit_to_budget(
+    items: List[Dict[str, Any]],
+    max_tokens: int,
+    text_fields: Sequence[str] = ("description",),
+    max_text_chars: int = TRUNCATED_TEXT_CHARS,
+) -> Tuple[List[Dict[str, Any]], int]:
+    """
+    Fits a page of items into an output token budget.
+
+    Long text fields are truncated first if the page is over budget, then items are
+    dropped from the end until the rest fits. At least one item is always kept.
+
+    Args:
+        items (List[Dict[str, Any]]): The page of items, best first.
+        max_tokens (int): Token budget for the serialized items.
+        text_fields (Sequence[str]): Fields that may be truncated.
+        max_text_chars (int): Length truncated text fields are cut to.
+
+    Returns:
+        Tuple[List[Dict[str, Any]], int]: The items that fit and the number of items dropped.
+    """
+    if not items or estimate_tokens(items) <= max_tokens:
+        return items, 0
+
+    items = [
+        {
+            key: truncate_text(value, max_text_chars) if key in text_fields and isinstance(value, str) else value
+            for key, value in item.items()
+        }
+        for item in items
+    ]
+
+    kept = []
+    used = 0
+    for item in items:
+        cost = estimate_tokens(item)
+        if kept and used + cost > max_tokens:
+            break
+        kept.append(item)
+        used += cost
+    return kept, len(items) - len(kept)
+
+
+def page_metadata(total: int, offset: int, returned: int) -> Dict[str, Any]:
+    """
+    Describes where a page sits in the full result set.
+
+    Returns:
+        Dict[str, Any]: The counts, the offset of the next page (None on the last page)
+        and a short "+N more" note the model can relay or act on.
+    """
+    remaining = max(total - offset - returned, 0)
+    metadata = {
+        "total_results": total,
+        "offset": offset,
+        "returned": returned,
+        "next_offset": offset + returned if remaining else None,
+    }
+    if remaining:
+        metadata["more"] = f"+{remaining} more (call again with offset={offset + returned} to see them)"
+    return metadata
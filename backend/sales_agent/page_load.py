@@ -0,0 +1,116 @@
+"""
+Lightweight page loading for storefront automation.
+
+The cart flows only look at a handful of DOM elements, yet a full page load waits for
+images, web fonts, analytics and other third-party scripts. In lightweight mode Chrome
+returns from `driver.get` once the DOM is parsed (eager page-load strategy), does not
+download images or fonts, and cannot resolve tracking hosts. Waits poll for the element
+a step needs instead of sleeping in half-second increments, and every step's duration
+is recorded with a StepTimer.
+"""
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+import logging
+import time
+from typing import Any, Callable, Dict, Iterator, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Third-party hosts the storefront pages pull in that the automation never needs
+DEFAULT_BLOCKED_HOSTS = (
+    "*.google-analytics.com",
+    "*.googletagmanager.com",
+    "*.doubleclick.net",
+    "*.facebook.net",
+    "*.facebook.com",
+    "*.hotjar.com",
+    "*.klaviyo.com",
+    "*.tiktok.com",
+    "*.clarity.ms",
+)
+
+# Font files are blocked by URL, since Chrome has no content setting for them
+BLOCKED_URL_PATTERNS = ("*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot")
+
+# Chrome content setting value for "block"
+_BLOCK = 2
+
+POLL_SECONDS = 0.05
+
+
+def apply_lightweight_options(chrome_options: Any, blocked_hosts: Sequence[str] = DEFAULT_BLOCKED_HOSTS) -> None:
+    """
+    Configures Chrome options for lightweight page loads.
+
+    Args:
+        chrome_options (selenium.webdriver.chrome.options.Options): Options to modify.
+        blocked_hosts (Sequence[str]): Host patterns that fail to resolve, e.g. "*.hotjar.com".
+    """
+    chrome_options.page_load_strategy = "eager"
+    chrome_options.add_experimental_option(
+        "prefs",
+        {
+            "profile.managed_default_content_settings.images": _BLOCK,
+            "profile.default_content_setting_values.notifications": _BLOCK,
+        },
+    )
+    chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+    if blocked_hosts:
+        rules = ", ".join(f"MAP {host} ~NOTFOUND" for host in blocked_hosts)
+        chrome_options.add_argument(f"--host-resolver-rules={rules}")
+
+
+def block_asset_urls(driver: Any, patterns: Sequence[str] = BLOCKED_URL_PATTERNS) -> None:
+    """Blocks requests matching `patterns` (fonts by default) in the driver's current tab."""
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": list(patterns)})
+    except Exception as e:
+        # Not every driver speaks CDP; images and hosts are still blocked by the launch options
+        logger.warning(f"Could not block asset URLs: {e}")
+
+
+def wait_until(scope: Any, condition: Callable[[Any], Any], timeout: float, poll: float = POLL_SECONDS) -> Any:
+    """
+    Polls `condition` on `scope` (a driver or element) until it returns a truthy value.
+
+    Same as `WebDriverWait(scope, timeout).until(condition)`, but checks every `poll`
+    seconds instead of every half second, so a step finishes as soon as the element is there.
+
+    Raises:
+        selenium.common.exceptions.TimeoutException: If the condition is not met in time.
+    """
+    from selenium.webdriver.support.ui import WebDriverWait
+
+    return WebDriverWait(scope, timeout, poll_frequency=poll).until(condition)
+
+
+@dataclass
+class StepTimer:
+    """Records how long each named step of a browser flow takes."""
+
+    name: str
+    steps: List[Tuple[str, float]] = field(default_factory=list)
+
+    @contextmanager
+    def step(self, step_name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.steps.append((step_name, time.perf_counter() - start))
+
+    @property
+    def total(self) -> float:
+        return sum(duration for _, duration in self.steps)
+
+    def as_dict(self) -> Dict[str, float]:
+        """Returns the durations in milliseconds, summing repeated steps."""
+        timings: Dict[str, float] = {}
+        for step_name, duration in self.steps:
+            timings[step_name] = round(timings.get(step_name, 0.0) + duration * 1000, 1)
+        return timings
+
+    def log(self) -> None:
+        breakdown = ", ".join(f"{step_name}={ms:.0f}ms" for step_name, ms in self.as_dict().items())
+        logger.info(f"{self.name} took {self.total * 1000:.0f}ms ({breakdown})")
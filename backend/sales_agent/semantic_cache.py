@@ -0,0 +1,124 @@
+from dataclasses import dataclass
+import threading
+import time
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+
+@dataclass
+class SemanticCacheStats:
+    """Counters of a SemanticCache, used to tune its similarity threshold."""
+
+    hits: int
+    misses: int
+    entries: int
+    evictions: int
+    expirations: int
+    threshold: float
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class SemanticCache:
+    """
+    Caches results by query embedding and serves them for paraphrased queries.
+
+    A lookup returns the stored result of the most similar cached query when its
+    cosine similarity is at least `threshold`. Entries expire after `ttl_seconds`
+    and the least recently used entry is replaced once `capacity` is reached.
+    `partition` separates results that are not interchangeable (e.g. different top_k).
+    """
+
+    def __init__(self, threshold: float = 0.9, capacity: int = 512, ttl_seconds: float = 3600.0):
+        self.threshold = threshold
+        self.capacity = capacity
+        self.ttl_seconds = ttl_seconds
+
+        self._vectors: Optional[np.ndarray] = None
+        self._partitions = np.zeros(capacity, dtype=np.int64)
+        self._created = np.zeros(capacity, dtype=np.float64)
+        self._last_used = np.zeros(capacity, dtype=np.float64)
+        self._occupied = np.zeros(capacity, dtype=bool)
+        self._values: List[Any] = [None] * capacity
+        self._lock = threading.Lock()
+
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+        self._expirations = 0
+
+    @staticmethod
+    def _unit(embedding: Sequence[float]) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _expire(self, now: float) -> None:
+        expired = self._occupied & (now - self._created > self.ttl_seconds)
+        if expired.any():
+            self._expirations += int(expired.sum())
+            self._occupied &= ~expired
+            for slot in np.flatnonzero(expired):
+                self._values[slot] = None
+
+    def lookup(self, embedding: Sequence[float], partition: int = 0) -> Optional[Any]:
+        """Returns the cached result for the closest stored query, or None on a miss."""
+        query = self._unit(embedding)
+        now = time.monotonic()
+        with self._lock:
+            self._expire(now)
+            candidates = np.flatnonzero(self._occupied & (self._partitions == partition))
+            if self._vectors is None or not len(candidates) or self._vectors.shape[1] != len(query):
+                self._misses += 1
+                return None
+
+            scores = self._vectors[candidates] @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.threshold:
+                self._misses += 1
+                return None
+
+            slot = candidates[best]
+            self._last_used[slot] = now
+            self._hits += 1
+            return self._values[slot]
+
+    def store(self, embedding: Sequence[float], value: Any, partition: int = 0) -> None:
+        """Caches `value` for the query with this embedding."""
+        vector = self._unit(embedding)
+        now = time.monotonic()
+        with self._lock:
+            if self._vectors is None or self._vectors.shape[1] != len(vector):
+                self._vectors = np.zeros((self.capacity, len(vector)), dtype=np.float32)
+                self._occupied[:] = False
+
+            self._expire(now)
+            free = np.flatnonzero(~self._occupied)
+            if len(free):
+                slot = int(free[0])
+            else:
+                slot = int(np.argmin(self._last_used))
+                self._evictions += 1
+
+            self._vectors[slot] = vector
+            self._partitions[slot] = partition
+            self._created[slot] = now
+            self._last_used[slot] = now
+            self._occupied[slot] = True
+            self._values[slot] = value
+
+    def stats(self) -> SemanticCacheStats:
+        """Returns the hit/miss counters and current size."""
+        with self._lock:
+            return SemanticCacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                entries=int(self._occupied.sum()),
+                evictions=self._evictions,
+                expirations=self._expirations,
+                threshold=self.threshold,
+            )
@@ -1,21 +1,37 @@
+import logging
+import re
+import sqlite3
 import time
+from contextlib import ExitStack
 from langchain_core.runnables import RunnableConfig
 from langchain_core.tools import tool
 from datetime import datetime
 from decimal import Decimal
-from typing import Optional, Dict, Any, List, Union
+from typing import Optional, Dict, Any, List, Tuple, Union
 from backend.database.db_manager import DatabaseManager
-from pinecone import Pinecone
-from langchain_openai.embeddings import OpenAIEmbeddings
+from backend.database.product_urls import ProductUrl, forget_product_url, lookup_product_url, remember_product_url
+from backend.sales_agent.browser_pool import BrowserPool, chrome_driver_factory, get_browser_pool
+from backend.sales_agent.browser_profiles import ProfileManager
+from backend.sales_agent.cart_client import CartClientError, HttpCartClient, get_cart_client
+from backend.sales_agent.embedding_cache import CachedQueryEmbeddings, EmbeddingCache
+from backend.sales_agent.jobs import JobManager, JobQueueFullError, get_job_manager
+from backend.sales_agent.faq_context import DEFAULT_CONTEXT_MAX_TOKENS, DEFAULT_MMR_LAMBDA, assemble_context
+from backend.sales_agent.page_load import DEFAULT_BLOCKED_HOSTS, StepTimer, wait_until
+from backend.sales_agent.semantic_cache import SemanticCache
+from backend.sales_agent.output_budget import (
+    DEFAULT_MAX_TOKENS,
+    DEFAULT_PAGE_SIZE,
+    estimate_tokens,
+    fit_to_budget,
+    page_metadata,
+    project,
+)
 from dotenv import load_dotenv
 import os
+from pathlib import Path
+import threading
 
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-import time
+logger = logging.getLogger(__name__)
 
 db_manager = DatabaseManager()
 
@@ -26,108 +42,752 @@ load_dotenv()
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
 
-pc = Pinecone(api_key=PINECONE_API_KEY)
-
 index_name = "tershine"
-pinecone_index = pc.Index(index_name)
 
-embedding_model = OpenAIEmbeddings(api_key=OPENAI_API_KEY, model='text-embedding-3-small')
+# Local caches, replicas and browser profiles live under this directory unless their own
+# variable points elsewhere
+CACHE_DIR = Path(os.getenv("SALES_AGENT_CACHE_DIR", str(Path(__file__).resolve().parent / ".cache")))
+
+# "pinecone" queries the hosted index; "local" queries the memory-mapped replica written by
+# `python -m backend.sales_agent.faq_index sync --dir <FAQ_INDEX_DIR>`
+FAQ_INDEX_BACKEND = os.getenv("FAQ_INDEX_BACKEND", "pinecone").lower()
+FAQ_INDEX_DIR = os.getenv("FAQ_INDEX_DIR", str(CACHE_DIR / "faq_index"))
+
+# External clients (Pinecone, OpenAI embeddings) are created on first use, so importing
+# this module stays cheap for processes and sessions that never retrieve FAQ context.
+EMBEDDING_CACHE_PATH = os.getenv("EMBEDDING_CACHE_PATH", str(CACHE_DIR / "embeddings.db"))
+
+_clients_lock = threading.Lock()
+_faq_index = None
+_embedding_model = None
+
+def get_faq_index():
+    """Returns the FAQ vector index selected by FAQ_INDEX_BACKEND, connecting on first use."""
+    global _faq_index
+    if _faq_index is None:
+        with _clients_lock:
+            if _faq_index is None:
+                if FAQ_INDEX_BACKEND == "local":
+                    from backend.sales_agent.faq_index import LocalFaqIndex
+                    _faq_index = LocalFaqIndex(FAQ_INDEX_DIR, nprobe=int(os.getenv("FAQ_INDEX_NPROBE", "8")))
+                else:
+                    from pinecone import Pinecone
+                    _faq_index = Pinecone(api_key=PINECONE_API_KEY).Index(index_name)
+    return _faq_index
+
+def get_embedding_model() -> CachedQueryEmbeddings:
+    """Returns the query embedding model, wrapped in the embedding cache, creating it on first use."""
+    global _embedding_model
+    if _embedding_model is None:
+        with _clients_lock:
+            if _embedding_model is None:
+                from langchain_openai.embeddings import OpenAIEmbeddings
+
+                # Query embeddings are cached in memory and on disk, keyed by model and normalized query text
+                embedding_cache = EmbeddingCache(
+                    EMBEDDING_CACHE_PATH,
+                    max_memory_entries=int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "1024")),
+                    max_disk_bytes=int(os.getenv("EMBEDDING_CACHE_MAX_BYTES", str(64 * 1024 * 1024))),
+                )
+                _embedding_model = CachedQueryEmbeddings(
+                    OpenAIEmbeddings(api_key=OPENAI_API_KEY, model='text-embedding-3-small'),
+                    embedding_cache,
+                    model_name='text-embedding-3-small',
+                )
+    return _embedding_model
+
+# Retrieved FAQ texts are reused for paraphrased questions whose embeddings are close enough
+faq_result_cache = SemanticCache(
+    threshold=float(os.getenv("FAQ_SEMANTIC_CACHE_THRESHOLD", "0.9")),
+    capacity=int(os.getenv("FAQ_SEMANTIC_CACHE_CAPACITY", "512")),
+    ttl_seconds=float(os.getenv("FAQ_SEMANTIC_CACHE_TTL_SECONDS", "3600")),
+)
+
+# More candidates than top_k are fetched so MMR has room to skip redundant chunks
+FAQ_CANDIDATE_MULTIPLIER = int(os.getenv("FAQ_CANDIDATE_MULTIPLIER", "3"))
+FAQ_CONTEXT_MAX_TOKENS = int(os.getenv("FAQ_CONTEXT_MAX_TOKENS", str(DEFAULT_CONTEXT_MAX_TOKENS)))
+FAQ_MMR_LAMBDA = float(os.getenv("FAQ_MMR_LAMBDA", str(DEFAULT_MMR_LAMBDA)))
+
+# Storefront automation borrows headless Chrome sessions from a bounded pool (see browser_pool.py)
+BROWSER_POOL_MAX_DRIVERS = int(os.getenv("BROWSER_POOL_MAX_DRIVERS", "2"))
+BROWSER_POOL_MAX_USES = int(os.getenv("BROWSER_POOL_MAX_USES", "50"))
+BROWSER_POOL_IDLE_SECONDS = float(os.getenv("BROWSER_POOL_IDLE_SECONDS", "300"))
+BROWSER_HEADLESS = os.getenv("BROWSER_HEADLESS", "true").lower() in ("1", "true", "yes")
+
+# Lightweight mode skips images, fonts and tracking hosts and returns from page loads once the
+# DOM is ready (see page_load.py). Waits poll for the element they need for at most BROWSER_STEP_TIMEOUT seconds.
+BROWSER_LIGHTWEIGHT = os.getenv("BROWSER_LIGHTWEIGHT", "true").lower() in ("1", "true", "yes")
+BROWSER_BLOCKED_HOSTS = tuple(
+    host.strip() for host in os.getenv("BROWSER_BLOCKED_HOSTS", ",".join(DEFAULT_BLOCKED_HOSTS)).split(",") if host.strip()
+)
+BROWSER_STEP_TIMEOUT = float(os.getenv("BROWSER_STEP_TIMEOUT", "10"))
+
+# Every chat session (thread_id) gets its own Chrome profile, and so its own storefront cart,
+# cloned from a minimal template (build one with `python -m backend.sales_agent.browser_profiles template`)
+BROWSER_PROFILE_ROOT = os.getenv("BROWSER_PROFILE_ROOT", str(CACHE_DIR / "browser_profiles"))
+BROWSER_PROFILE_TEMPLATE = os.getenv("BROWSER_PROFILE_TEMPLATE", str(CACHE_DIR / "browser_profile_template"))
+BROWSER_PROFILE_TTL_SECONDS = float(os.getenv("BROWSER_PROFILE_TTL_SECONDS", str(24 * 3600)))
+
+_profile_manager = None
+
+def get_cart_browser_pool() -> BrowserPool:
+    """Returns the browser pool used by the cart tools."""
+    return get_browser_pool(
+        max_drivers=BROWSER_POOL_MAX_DRIVERS,
+        max_uses=BROWSER_POOL_MAX_USES,
+        idle_timeout=BROWSER_POOL_IDLE_SECONDS,
+        driver_factory=chrome_driver_factory(BROWSER_HEADLESS, BROWSER_LIGHTWEIGHT, BROWSER_BLOCKED_HOSTS),
+    )
+
+def get_profile_manager() -> ProfileManager:
+    """Returns the manager of per-session Chrome profiles, creating it on first use."""
+    global _profile_manager
+    if _profile_manager is None:
+        with _clients_lock:
+            if _profile_manager is None:
+                _profile_manager = ProfileManager(
+                    BROWSER_PROFILE_ROOT,
+                    template_dir=BROWSER_PROFILE_TEMPLATE,
+                    ttl_seconds=BROWSER_PROFILE_TTL_SECONDS,
+                    in_use=lambda profile_dir: get_cart_browser_pool().has_session(profile_dir),
+                )
+    return _profile_manager
+
+# Opt-in: with CART_HTTP_ENABLED=true, cart operations go over HTTP first (see cart_client.py)
+# and fall back to the browser flow. Off by default until the storefront endpoints the client
+# calls are confirmed against the live store.
+CART_HTTP_ENABLED = os.getenv("CART_HTTP_ENABLED", "false").lower() in ("1", "true", "yes")
+
+def _session_id(config: RunnableConfig) -> str:
+    """Returns the chat session (LangGraph thread_id) of `config`."""
+    return str(config.get("configurable", {}).get("thread_id") or "default")
+
+def _cart_profile(config: RunnableConfig) -> str:
+    """Returns the Chrome profile holding the cart of the chat session in `config`."""
+    return get_profile_manager().profile_for(_session_id(config))
+
+# Browser work (cart fallbacks, opening checkout) runs as background jobs (see jobs.py), so a
+# turn returns a job handle instead of blocking on Chrome. Completion is reported next turn.
+BACKGROUND_JOBS_ENABLED = os.getenv("BACKGROUND_JOBS_ENABLED", "true").lower() in ("1", "true", "yes")
+BACKGROUND_JOB_WORKERS = int(os.getenv("BACKGROUND_JOB_WORKERS", str(BROWSER_POOL_MAX_DRIVERS)))
+BACKGROUND_JOB_MAX_PENDING = int(os.getenv("BACKGROUND_JOB_MAX_PENDING", "32"))
+
+def get_cart_job_manager() -> JobManager:
+    """Returns the job manager running the cart tools' browser work."""
+    return get_job_manager(max_workers=BACKGROUND_JOB_WORKERS, max_pending=BACKGROUND_JOB_MAX_PENDING)
+
+def _run_in_background(config: RunnableConfig, name: str, description: str, func):
+    """
+    Runs `func` as a background job of the chat session and returns its handle.
+
+    Runs it inline, returning its result, when background jobs are disabled or the queue is full.
+    """
+    if not BACKGROUND_JOBS_ENABLED:
+        return func()
+    try:
+        job = get_cart_job_manager().submit(_session_id(config), name, func, description)
+    except JobQueueFullError as e:
+        logger.warning(f"Running {name} inline: {e}")
+        return func()
+    return {
+        "status": "queued",
+        "job_id": job.job_id,
+        "message": f"{description} is running in the background; the customer can keep chatting meanwhile.",
+    }
+
+def finished_job_updates(config: RunnableConfig) -> List[Dict[str, Any]]:
+    """Returns the session's background jobs that finished since the last call."""
+    if not BACKGROUND_JOBS_ENABLED:
+        return []
+    return [job.as_dict() for job in get_cart_job_manager().pop_finished(_session_id(config))]
+
+# Optional in-process columnar catalog for filter-only product lookups (see catalog_engine.py)
+CATALOG_ENGINE_ENABLED = os.getenv("CATALOG_ENGINE", "false").lower() in ("1", "true", "yes")
+CATALOG_ENGINE_REFRESH_SECONDS = float(os.getenv("CATALOG_ENGINE_REFRESH_SECONDS", "1.0"))
+
+_catalog_engine = None
+
+def get_catalog_engine():
+    """Returns the shared CatalogEngine, loading the catalog on first use."""
+    global _catalog_engine
+    if _catalog_engine is None:
+        # Parallel tool calls may ask for it at the same time
+        with _clients_lock:
+            if _catalog_engine is None:
+                from backend.sales_agent.catalog_engine import CatalogEngine
+                _catalog_engine = CatalogEngine(db_manager, refresh_interval=CATALOG_ENGINE_REFRESH_SECONDS)
+    return _catalog_engine
 
 @tool
 def retrieve_faq_context_from_vectorstore(query_text: str, top_k: int = 3) -> str:
     """Retrieve FAQ Context from the Tershine washing guide vector store based on the query text."""
     # Embed the query text
-    query_embedding = embedding_model.embed_query(query_text)
+    query_embedding = get_embedding_model().embed_query(query_text)
+
+    # Paraphrases of a recent question reuse its retrieved context
+    cached_texts = faq_result_cache.lookup(query_embedding, partition=top_k)
+    if cached_texts is not None:
+        return cached_texts
 
-    pinecone_results = pinecone_index.query(
+    pinecone_results = get_faq_index().query(
         vector=query_embedding,
-        top_k=top_k,
-        include_metadata=True
+        top_k=top_k * FAQ_CANDIDATE_MULTIPLIER,
+        include_metadata=True,
+        include_values=True
     )
 
-    # Retrieve text and calculate similarity for the top result
-    retrieved_texts = " ".join([result['metadata']['content'] for result in pinecone_results['matches']])
-        
+    # Deduplicate, rerank for diversity and pack into the context token budget
+    retrieved_texts = assemble_context(
+        query_embedding,
+        pinecone_results['matches'],
+        k=top_k,
+        max_tokens=FAQ_CONTEXT_MAX_TOKENS,
+        lambda_mult=FAQ_MMR_LAMBDA,
+    )
+
+    faq_result_cache.store(query_embedding, retrieved_texts, partition=top_k)
     return retrieved_texts
 
-@tool
-def add_product_to_cart(product_name: str):
+def _sync_cookies_to_browser(driver, cart_client: HttpCartClient) -> None:
+    """Copies the HTTP session's cookies into the browser so both act on the same cart."""
+    cookies = cart_client.export_cookies()
+    if not cookies:
+        return
+    # Selenium only accepts cookies for the domain that is currently loaded
+    driver.get(cart_client.endpoints.base_url)
+    for cookie in cookies:
+        try:
+            driver.add_cookie(cookie)
+        except Exception as e:
+            logger.warning(f"Could not copy cookie {cookie['name']} into the browser: {e}")
+
+def _known_product_url(product_name: str) -> Optional[ProductUrl]:
+    try:
+        with db_manager.get_connection() as conn:
+            return lookup_product_url(conn, product_name)
+    except sqlite3.OperationalError as e:
+        logger.warning(f"Product URL lookup unavailable: {e}")
+        return None
+
+def _remember_product_url(product_name: str, url: str, store_product_id: Optional[str] = None) -> None:
+    try:
+        with db_manager.get_connection() as conn:
+            remember_product_url(conn, product_name, url, store_product_id)
+            conn.commit()
+    except sqlite3.OperationalError as e:
+        logger.warning(f"Could not record the URL of {product_name}: {e}")
+
+def _forget_product_url(product_name: str) -> None:
+    logger.info(f"Forgetting stale storefront URL of {product_name}")
+    try:
+        with db_manager.get_connection() as conn:
+            forget_product_url(conn, product_name)
+            conn.commit()
+    except sqlite3.OperationalError as e:
+        logger.warning(f"Could not forget the URL of {product_name}: {e}")
+
+def _add_to_cart_over_http(
+    cart_client: HttpCartClient,
+    product_name: str,
+    known: Optional[ProductUrl],
+    quantity: int = 1,
+) -> Tuple[str, str]:
+    """Adds a product over HTTP, skipping the storefront search when its store id is known."""
+    if known is not None and known.store_product_id:
+        try:
+            return cart_client.add_to_cart(product_name, quantity, product_id=known.store_product_id)
+        except CartClientError as e:
+            if e.status != 404:
+                raise
+            _forget_product_url(product_name)
+
+    product = cart_client.find_product(product_name)
+    if product.get("id") is None:
+        raise CartClientError(f"Storefront search result for {product_name!r} has no id")
+    # Only an exact name match is trusted enough to be remembered
+    if product.get("url") and str(product.get("name", "")).strip().lower() == product_name.strip().lower():
+        _remember_product_url(product_name, cart_client.endpoints.url(product["url"]), product["id"])
+    return cart_client.add_to_cart(product_name, quantity, product_id=product["id"])
+
+def _open_product_page(
+    driver,
+    product_name: str,
+    cart_client: HttpCartClient,
+    known: Optional[ProductUrl] = None,
+    timer: Optional[StepTimer] = None,
+):
     """
-    Add a product to the cart.
-    This function uses a persistent Chrome profile to ensure the cart state is saved.
-    It adds the product and then retrieves any free shipping information (if available),
-    but it does not proceed to checkout.
+    Opens a product page in the current tab and returns its action area.
+
+    The page is opened directly when its URL is known; otherwise the storefront is
+    searched and the result whose name matches exactly (else the first) is opened.
     """
-    chrome_options = Options()
-    profile_path = "profile"  # replace with your desired persistent profile path
-    chrome_options.add_argument(f"--user-data-dir={profile_path}")
-    driver = webdriver.Chrome(options=chrome_options)
-    try:
-        driver.get("https://tershine.com/")
+    # Selenium is imported on demand; most sessions never drive a browser
+    from selenium.common.exceptions import TimeoutException
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+
+    timer = timer or StepTimer("open product page")
+    if known is not None:
+        try:
+            with timer.step("product_page"):
+                driver.get(known.url)
+                return wait_until(driver, EC.presence_of_element_located((By.CSS_SELECTOR, "div.action")), BROWSER_STEP_TIMEOUT)
+        except TimeoutException:
+            _forget_product_url(product_name)
+
+    with timer.step("home_page"):
+        driver.get(cart_client.endpoints.base_url)
         # Locate and use the search box
-        clickable_search_box = WebDriverWait(driver, 10).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "input.input"))
+        clickable_search_box = wait_until(
+            driver, EC.element_to_be_clickable((By.CSS_SELECTOR, "input.input")), BROWSER_STEP_TIMEOUT
         )
+    with timer.step("search"):
         clickable_search_box.clear()
         clickable_search_box.send_keys(product_name)
-        # Wait for search results and click the first result
-        search_results = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "ul.search-result"))
+        # Wait for search results and pick the exact match, else the first result
+        search_results = wait_until(
+            driver, EC.presence_of_element_located((By.CSS_SELECTOR, "ul.search-result")), BROWSER_STEP_TIMEOUT
         )
-        first_link = WebDriverWait(search_results, 10).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "li a"))
+        first_link = wait_until(
+            search_results, EC.element_to_be_clickable((By.CSS_SELECTOR, "li a")), BROWSER_STEP_TIMEOUT
         )
-        first_link.click()
-        # Wait for product page to load and click buy button
-        product_page = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "div.action"))
+        wanted = product_name.strip().lower()
+        exact_link = next(
+            (link for link in search_results.find_elements(By.CSS_SELECTOR, "li a") if link.text.strip().lower() == wanted),
+            None,
         )
-        buy_button = WebDriverWait(product_page, 10).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "button.button.buy"))
+    with timer.step("product_page"):
+        (exact_link or first_link).click()
+        # Wait for product page to load
+        product_page = wait_until(
+            driver, EC.presence_of_element_located((By.CSS_SELECTOR, "div.action")), BROWSER_STEP_TIMEOUT
         )
-        buy_button.click()
-        # Wait for cart pop-up and try to capture free shipping info
-        cart_pop_up = WebDriverWait(driver, 10).until(
-            EC.presence_of_element_located((By.CSS_SELECTOR, "section.section.footer"))
+    if exact_link is not None:
+        _remember_product_url(product_name, driver.current_url)
+    return product_page
+
+def _click_buy(driver, product_page, timer: Optional[StepTimer] = None) -> None:
+    """Clicks the buy button and waits for the cart pop-up."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+
+    timer = timer or StepTimer("buy")
+    with timer.step("buy"):
+        buy_button = wait_until(
+            product_page, EC.element_to_be_clickable((By.CSS_SELECTOR, "button.button.buy")), BROWSER_STEP_TIMEOUT
         )
+        buy_button.click()
+        wait_until(driver, EC.presence_of_element_located((By.CSS_SELECTOR, "section.section.footer")), BROWSER_STEP_TIMEOUT)
+
+def _read_free_shipping(driver, timer: Optional[StepTimer] = None) -> str:
+    """Reads the free shipping information from the cart pop-up, if available."""
+    from selenium.webdriver.common.by import By
+    from selenium.webdriver.support import expected_conditions as EC
+
+    timer = timer or StepTimer("free shipping")
+    with timer.step("free_shipping"):
         try:
-            free_shipping_info = WebDriverWait(cart_pop_up, 5).until(
-                EC.presence_of_element_located((By.CSS_SELECTOR, "div.shipping-information__remaining"))
+            cart_pop_up = driver.find_element(By.CSS_SELECTOR, "section.section.footer")
+            # The pop-up is already open, so the text is either there or not coming
+            free_shipping_info = wait_until(
+                cart_pop_up,
+                EC.presence_of_element_located((By.CSS_SELECTOR, "div.shipping-information__remaining")),
+                min(BROWSER_STEP_TIMEOUT, 5),
             )
-            free_shipping_texts = free_shipping_info.text
+            return free_shipping_info.text
         except Exception:
-            free_shipping_texts = "No free shipping information available."
-        # Instead of clicking checkout here, simply return shipping details and current URL.
-        cart_url = driver.current_url  # Alternatively, you could set this to a dedicated cart page URL if available.
-        return free_shipping_texts, cart_url
+            return "No free shipping information available."
+
+def _add_to_cart_in_browser(
+    driver,
+    product_name: str,
+    cart_client: HttpCartClient,
+    known: Optional[ProductUrl] = None,
+    timer: Optional[StepTimer] = None,
+) -> Tuple[str, str]:
+    """Adds a product through the storefront UI and returns the free shipping information and current URL."""
+    product_page = _open_product_page(driver, product_name, cart_client, known, timer)
+    _click_buy(driver, product_page, timer=timer)
+    # Instead of clicking checkout here, simply return shipping details and current URL.
+    return _read_free_shipping(driver, timer), driver.current_url
+
+@tool
+def add_product_to_cart(product_name: str, *, config: RunnableConfig) -> Dict[str, Any]:
+    """
+    Add a product to the cart.
+    This function uses the chat session's persistent storefront session to ensure the cart state is saved.
+    It adds the product and then retrieves any free shipping information (if available),
+    but it does not proceed to checkout.
+
+    Returns:
+        Dict[str, Any]: {"status": "success", "product_name", "free_shipping", "cart_url"} once the
+        product is in the cart, or {"status": "queued", "job_id", "message"} while the browser
+        adds it in the background (the job's result then has the "success" shape).
+    """
+    profile_dir = _cart_profile(config)
+    cart_client = get_cart_client(profile_dir)
+    # Known product pages (see product_urls) skip the storefront search
+    known = _known_product_url(product_name)
+    if CART_HTTP_ENABLED:
+        try:
+            free_shipping, cart_url = _add_to_cart_over_http(cart_client, product_name, known)
+            return _cart_addition(product_name, free_shipping, cart_url)
+        except CartClientError as e:
+            logger.warning(f"HTTP add-to-cart failed, falling back to the browser: {e}")
+
+    def add_in_browser() -> Dict[str, Any]:
+        free_shipping, cart_url = _add_product_in_browser(profile_dir, cart_client, product_name)
+        return _cart_addition(product_name, free_shipping, cart_url)
+
+    return _run_in_background(config, "add_product_to_cart", f"Adding {product_name} to the cart", add_in_browser)
+
+def _cart_addition(product_name: str, free_shipping: str, cart_url: str) -> Dict[str, Any]:
+    return {"status": "success", "product_name": product_name, "free_shipping": free_shipping, "cart_url": cart_url}
+
+def _add_product_in_browser(profile_dir: str, cart_client: HttpCartClient, product_name: str) -> Tuple[str, str]:
+    """Adds a product in a pooled browser session on the session's profile, keeping the HTTP jar in sync."""
+    # Sessions are borrowed from the pool, so Chrome is launched once and not leaked
+    timer = StepTimer(f"Browser add-to-cart of {product_name}")
+    try:
+        with ExitStack() as stack:
+            with timer.step("borrow_browser"):
+                driver = stack.enter_context(get_cart_browser_pool().session(profile_dir=profile_dir))
+            with timer.step("sync_cookies"):
+                _sync_cookies_to_browser(driver, cart_client)
+            result = _add_to_cart_in_browser(driver, product_name, cart_client, _known_product_url(product_name), timer)
+            # Keep the HTTP jar on the cart the browser just changed
+            cart_client.import_cookies(driver.get_cookies())
+            return result
     finally:
-        # Optionally keep the driver open if you want to preserve session state.
-        pass
+        timer.log()
+
+def _error_summary(error: Exception) -> str:
+    message = str(error).strip()
+    return message.splitlines()[0] if message else type(error).__name__
+
+MAX_CART_BATCH_ITEMS = 20
+# The storefront does not allow more than one unit of a product in a cart; larger orders
+# go through the store's customer service (see schemas.sql)
+MAX_CART_QUANTITY = 1
 
 @tool
-def get_available_categories() -> Dict[str, List[str]]:
-    """Returns a list of available product categories."""
-    with db_manager.get_connection() as conn:
-        cursor = conn.cursor()
+def add_products_to_cart(items: List[Dict[str, Any]], *, config: RunnableConfig) -> Dict[str, Any]:
+    """
+    Add several products to the cart in one go. Prefer this over repeated add_product_to_cart
+    calls when the customer wants more than one product.
+
+    Arguments:
+        items (List[Dict[str, Any]]): Products to add, each {"product_name": str, "quantity": int}. At most 20.
+            The store only allows one unit of each product; items asking for more are rejected
+            and the customer should contact the store for larger orders.
+
+    Returns:
+        Dict[str, Any]: Per-item results, plus the free shipping information and cart URL after all additions.
+
+    Example:
+        add_products_to_cart([{"product_name": "Spraymunstycke 500 ml", "quantity": 1}, {"product_name": "Purify", "quantity": 1}])
+    """
+    if not items:
+        return {"status": "error", "message": "No products given."}
+    if len(items) > MAX_CART_BATCH_ITEMS:
+        return {"status": "error", "message": f"At most {MAX_CART_BATCH_ITEMS} products can be added at once."}
+
+    profile_dir = _cart_profile(config)
+    cart_client = get_cart_client(profile_dir)
+    results: List[Dict[str, Any]] = []
+    for item in items:
+        name = str(item.get("product_name") or item.get("ProductName") or "").strip()
+        quantity = item.get("quantity") or item.get("Quantity") or 1
+        result = {"product_name": name, "quantity": quantity, "status": "pending"}
+        try:
+            quantity = int(quantity)
+        except (TypeError, ValueError):
+            result.update(status="error", error=f"Invalid quantity: {quantity!r}")
+        else:
+            result["quantity"] = quantity
+            if not 1 <= quantity <= MAX_CART_QUANTITY:
+                result.update(
+                    status="error",
+                    error=f"The store allows at most {MAX_CART_QUANTITY} of a product per cart; "
+                    "larger orders have to go through the store's customer service.",
+                )
+        results.append(result)
+
+    free_shipping = "No free shipping information available."
+    cart_url = cart_client.endpoints.url(cart_client.endpoints.checkout_path)
+    for result in results:
+        if result["status"] != "pending":
+            continue
+        if not result["product_name"]:
+            result.update(status="error", error="Missing product_name")
+        elif CART_HTTP_ENABLED:
+            try:
+                free_shipping, cart_url = _add_to_cart_over_http(
+                    cart_client, result["product_name"], _known_product_url(result["product_name"]), result["quantity"]
+                )
+                result["status"] = "added"
+            except CartClientError as e:
+                logger.warning(f"HTTP add-to-cart of {result['product_name']} failed, using the browser: {e}")
+
+    remaining = [result for result in results if result["status"] == "pending"]
+    job_id = None
+    if remaining:
+        # Works on copies: with background jobs the tool returns before the browser is done
+        browser_items = [dict(result) for result in remaining]
+
+        def add_remaining() -> Dict[str, Any]:
+            cart = _add_items_in_browser(profile_dir, cart_client, browser_items)
+            outcome = {"status": _batch_status(browser_items), "items": browser_items}
+            if cart is not None:
+                outcome["free_shipping"], outcome["cart_url"] = cart
+            return outcome
+
+        outcome = _run_in_background(
+            config, "add_products_to_cart", f"Adding {len(remaining)} product(s) to the cart", add_remaining
+        )
+        job_id = outcome.get("job_id")
+        for result, browser_result in zip(remaining, browser_items):
+            if job_id is not None:
+                result.update(status="queued", job_id=job_id)
+            else:
+                result.update(browser_result)
+        free_shipping = outcome.get("free_shipping", free_shipping)
+        cart_url = outcome.get("cart_url", cart_url)
+
+    return {
+        "status": "queued" if job_id is not None else _batch_status(results),
+        "items": results,
+        "free_shipping": free_shipping,
+        "cart_url": cart_url,
+    }
+
+def _batch_status(results: List[Dict[str, Any]]) -> str:
+    added = sum(result["status"] == "added" for result in results)
+    return "success" if added == len(results) else "partial" if added else "error"
+
+def _add_items_in_browser(
+    profile_dir: str,
+    cart_client: HttpCartClient,
+    items: List[Dict[str, Any]],
+) -> Optional[Tuple[str, str]]:
+    """
+    Adds items in one browser session and tab, updating each item's status in place.
+
+    Returns:
+        Optional[Tuple[str, str]]: The free shipping information and current URL after the
+        last addition, or None if nothing was added.
+    """
+    cart = None
+    timer = StepTimer(f"Browser add-to-cart of {len(items)} product(s)")
+    try:
+        with ExitStack() as stack:
+            with timer.step("borrow_browser"):
+                driver = stack.enter_context(get_cart_browser_pool().session(profile_dir=profile_dir))
+            with timer.step("sync_cookies"):
+                _sync_cookies_to_browser(driver, cart_client)
+            added_in_browser = False
+            for item in items:
+                try:
+                    product_page = _open_product_page(
+                        driver, item["product_name"], cart_client, _known_product_url(item["product_name"]), timer
+                    )
+                    _click_buy(driver, product_page, timer)
+                    item["status"] = "added"
+                    added_in_browser = True
+                except Exception as e:
+                    item.update(status="error", error=_error_summary(e))
+            if added_in_browser:
+                # The pop-up after the last addition reflects the whole cart
+                cart = _read_free_shipping(driver, timer), driver.current_url
+            cart_client.import_cookies(driver.get_cookies())
+    except Exception as e:
+        # Report what was added so far instead of losing it with the browser error
+        logger.error(f"Browser add-to-cart failed: {e}")
+        for item in items:
+            if item["status"] == "pending":
+                item.update(status="error", error=_error_summary(e))
+    finally:
+        timer.log()
+    return cart
+
+def _category_stats(cursor: sqlite3.Cursor) -> List[sqlite3.Row]:
+    """
+    Returns the in-stock ProductCount, PriceSum, MinPrice and MaxPrice of every category.
+
+    Reads the trigger-maintained catalog_category_stats table, or aggregates the products
+    table when the database predates that migration.
+    """
+    try:
+        cursor.execute("SELECT Category, ProductCount, PriceSum, MinPrice, MaxPrice FROM catalog_category_stats")
+    except sqlite3.OperationalError as e:
+        logger.warning(f"Catalog summary table unavailable, aggregating products instead: {e}")
         cursor.execute(
             """
-            SELECT DISTINCT Category 
+            SELECT
+                Category,
+                COUNT(*) AS ProductCount,
+                SUM(Price) AS PriceSum,
+                MIN(Price) AS MinPrice,
+                MAX(Price) AS MaxPrice
             FROM products
             WHERE Quantity > 0
-            """)
-        categories = cursor.fetchall()
+            GROUP BY Category
+            """
+        )
+    return cursor.fetchall()
+
+@tool
+def get_available_categories() -> Dict[str, List[str]]:
+    """Returns a list of available product categories."""
+    if CATALOG_ENGINE_ENABLED:
+        return {"categories": [category["name"] for category in get_catalog_engine().category_counts()]}
+
+    with db_manager.get_connection() as conn:
+        categories = _category_stats(conn.cursor())
         return {"categories": [category["Category"] for category in categories]}
 
+MAX_PAGE_SIZE = 50
+
+# Relative bm25 weights for the ProductName, Description and Category columns of products_fts
+FTS_COLUMN_WEIGHTS = (10.0, 1.0, 5.0)
+
+def _fts_match_expression(query: str) -> Optional[str]:
+    """Builds an FTS5 MATCH expression requiring every query word, each as a prefix."""
+    terms = re.findall(r"\w+", query.lower())
+    if not terms:
+        return None
+    return " ".join(f'"{term}"*' for term in terms)
+
+def _fetch_page(cursor: sqlite3.Cursor, sql: str, params: List[Any], limit: int, offset: int) -> Tuple[List[sqlite3.Row], int]:
+    """
+    Runs a query that selects `COUNT(*) OVER () AS TotalMatches` and returns one page of rows
+    together with the total number of matches.
+    """
+    cursor.execute(f"{sql} LIMIT ? OFFSET ?", [*params, limit, offset])
+    rows = cursor.fetchall()
+    if rows:
+        return rows, rows[0]["TotalMatches"]
+    if not offset:
+        return rows, 0
+    # Paged past the end: the window count is not available without a row.
+    cursor.execute(f"SELECT COUNT(*) FROM ({sql})", params)
+    return rows, cursor.fetchone()[0]
+
+def _find_products(
+    cursor: sqlite3.Cursor,
+    query: Optional[str],
+    category: Optional[str],
+    min_price: Optional[float],
+    max_price: Optional[float],
+    limit: int = DEFAULT_PAGE_SIZE,
+    offset: int = 0,
+) -> Tuple[List[sqlite3.Row], int]:
+    """
+    Returns one page of in-stock products matching the search filters and the total match count.
+
+    Text queries go through the products_fts index and come back ranked by bm25,
+    best match first. A substring scan is used only when the index is not available
+    or the query has no word the tokenizer can index; an empty index result stays empty.
+    """
+    filters = ["p.Quantity > 0"]
+    params: List[Any] = []
+    if category:
+        filters.append("p.Category = ?")
+        params.append(category)
+    if min_price:
+        filters.append("p.Price >= ?")
+        params.append(min_price)
+    if max_price:
+        filters.append("p.Price <= ?")
+        params.append(max_price)
+
+    if not query:
+        return _fetch_page(
+            cursor,
+            f"""
+            SELECT p.*, COUNT(*) OVER () AS TotalMatches
+            FROM products p
+            WHERE {' AND '.join(filters)}
+            ORDER BY p.ProductId
+            """,
+            params,
+            limit,
+            offset,
+        )
+
+    match_expression = _fts_match_expression(query)
+    if match_expression:
+        weights = ", ".join(str(weight) for weight in FTS_COLUMN_WEIGHTS)
+        try:
+            products, total = _fetch_page(
+                cursor,
+                # bm25() cannot be evaluated next to a window function, so the
+                # ranking is materialized first.
+                f"""
+                WITH ranked AS MATERIALIZED (
+                    SELECT rowid AS ProductId, bm25(products_fts, {weights}) AS Rank
+                    FROM products_fts
+                    WHERE products_fts MATCH ?
+                )
+                SELECT p.*, COUNT(*) OVER () AS TotalMatches
+                FROM ranked r
+                JOIN products p ON p.ProductId = r.ProductId
+                WHERE {' AND '.join(filters)}
+                ORDER BY r.Rank, p.ProductId
+                """,
+                [match_expression, *params],
+                limit,
+                offset,
+            )
+            return products, total
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Full-text search unavailable, falling back to LIKE: {e}")
+
+    search_term = f"%{query.lower()}%"
+    return _fetch_page(
+        cursor,
+        f"""
+        SELECT p.*, COUNT(*) OVER () AS TotalMatches
+        FROM products p
+        WHERE {' AND '.join(filters)}
+        AND (LOWER(p.ProductName) LIKE ? OR LOWER(p.Description) LIKE ?)
+        ORDER BY p.ProductId
+        """,
+        [*params, search_term, search_term],
+        limit,
+        offset,
+    )
+
+def _page_bounds(limit: Optional[int], offset: Optional[int]) -> Tuple[int, int]:
+    """Clamps tool-supplied paging arguments to sane values."""
+    limit = DEFAULT_PAGE_SIZE if limit is None else min(max(int(limit), 1), MAX_PAGE_SIZE)
+    return limit, max(int(offset or 0), 0)
+
 @tool
-def search_products(query: Optional[str] = None, category: Optional[str] = None, min_price: Optional[float] = None, max_price: Optional[float] = None) -> Dict[str, Any]:
+def search_products(
+    query: Optional[str] = None,
+    category: Optional[str] = None,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None,
+    limit: int = DEFAULT_PAGE_SIZE,
+    offset: int = 0,
+    fields: Optional[List[str]] = None,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+) -> Dict[str, Any]:
     """
-    Searches for products based on various criteria.
+    Searches for products based on various criteria. Results are paginated: use `offset`
+    with the returned `next_offset` to see further matches.
 
     Arguments:
         query (Optional[str]): The query to search for which can be product name or description.
         category (Optional[str]): Filter by product category.
         min_price (Optional[float]): The minimum price filter.
         max_price (Optional[float]): The maximum price filter.
+        limit (int): Maximum number of products to return (at most 50).
+        offset (int): Number of matching products to skip.
+        fields (Optional[List[str]]): Product fields to return, e.g. ["name", "price"]. All fields when omitted.
+        max_tokens (int): Output size budget; long descriptions are shortened and extra products left for the next page.
 
     Returns:
         Dict[str, Any]: Search results with products and metadata
@@ -135,65 +795,21 @@ def search_products(query: Optional[str] = None, category: Optional[str] = None,
     Example: 
         search_products(query="banana", category="fruits", max_price=5.00)
     """
-    with db_manager.get_connection() as conn:
-        cursor = conn.cursor()
-
-        query_parts = ["SELECT * FROM products WHERE Quantity > 0"]
-        params = []
+    limit, offset = _page_bounds(limit, offset)
 
-        if query:
-            query_parts.append(
-            """
-            AND (
-                LOWER(ProductName) LIKE ?
-                OR 
-                LOWER(Description) LIKE ?
-            )
-            """)
-            search_term = f"%{query.lower()}%"
-            params.extend([search_term, search_term])
-
-        if category:
-            query_parts.append(f"AND Category = ?")
-            params.append(category)
-        if min_price:
-            query_parts.append(f"AND Price >= ?")
-            params.append(min_price)
-        if max_price:
-            query_parts.append(f"AND Price <= ?")
-            params.append(max_price)
-
-        query_string = " ".join(query_parts)
-        cursor.execute(query_string, params)
-        products = cursor.fetchall()
-
-        # Get available categories for metadata
-        cursor.execute(
-            """
-            SELECT DISTINCT Category, COUNT(*) as count 
-            FROM products 
-            WHERE Quantity > 0 
-            GROUP BY Category
-            """
+    if not query and CATALOG_ENGINE_ENABLED:
+        # Filter-only searches are answered from the in-process catalog without a DB round trip
+        engine = get_catalog_engine()
+        products, total = engine.search_page(
+            category=category, min_price=min_price, max_price=max_price, limit=limit, offset=offset
         )
-        categories = cursor.fetchall()
-
-        # Get price range for metadata
-        cursor.execute(
-            """
-            SELECT 
-                MIN(Price) as min_price,
-                MAX(Price) as max_price,
-                AVG(Price) as avg_price
-            FROM products
-            WHERE Quantity > 0
-        """
-        )
-        price_stats = cursor.fetchone()
-
-        return {
-            "status": "success",
-            "products": [
+        categories = engine.category_counts()
+        price_range = engine.price_range()
+    else:
+        with db_manager.get_connection() as conn:
+            cursor = conn.cursor()
+            rows, total = _find_products(cursor, query, category, min_price, max_price, limit, offset)
+            products = [
                 {
                     "product_id": str(product["ProductId"]),
                     "name": product["ProductName"],
@@ -202,21 +818,34 @@ def search_products(query: Optional[str] = None, category: Optional[str] = None,
                     "price": product["Price"],
                     "stock": product["Quantity"]
                 }
-                for product in products
-            ],
-            "metadata": {
-                "total_results": len(products),
-                "categories": [
-                    {"name": cat["Category"], "product_count": cat["count"]}
-                    for cat in categories
-                ],
-                "price_range": {
-                    "min": float(price_stats["min_price"]),
-                    "max": float(price_stats["max_price"]),
-                    "average": round(float(price_stats["avg_price"]), 2)
-                }
+                for product in rows
+            ]
+
+            # Catalog metadata is read from the trigger-maintained summary table
+            # instead of aggregating the products table on every search
+            stats = _category_stats(cursor)
+            categories = [
+                {"name": cat["Category"], "product_count": cat["ProductCount"]}
+                for cat in stats
+            ]
+
+            product_count = sum(cat["ProductCount"] for cat in stats)
+            price_range = {
+                "min": float(min((cat["MinPrice"] for cat in stats), default=0) or 0),
+                "max": float(max((cat["MaxPrice"] for cat in stats), default=0) or 0),
+                "average": round(sum(cat["PriceSum"] for cat in stats) / product_count, 2) if product_count else 0.0,
             }
-        }
+
+    metadata = {"categories": categories, "price_range": price_range}
+    products, _ = fit_to_budget(
+        [project(product, fields, always=("product_id",)) for product in products],
+        max_tokens - estimate_tokens(metadata),
+    )
+    return {
+        "status": "success",
+        "products": products,
+        "metadata": {**page_metadata(total, offset, len(products)), **metadata},
+    }
 
 # @tool
 # def create_order(products: List[Dict[str, Any]], *, config: RunnableConfig) -> Dict[str, str]:
@@ -322,16 +951,23 @@ def search_products(query: Optional[str] = None, category: Optional[str] = None,
 #             }
 
 # ---------------------------------------------------------------------
-# Revised create_order: creates the DB order then reopens the browser session
-# to load the cart (using the same persistent profile) and clicks through to checkout.
+# Revised create_order: reopens the browser session in a background job to load the cart
+# (using the same persistent profile) on the checkout page.
 @tool
 def create_order(config: RunnableConfig) -> Dict[str, Any]:
     """
-    Create a new order by first processing the products in the database,
-    and then reopening the browser session (with the persistent cart)
-    to click the checkout button.
-    
-    Returns a chrome browser with the persistent cart in the checkout page and changes order status to pending.
+    Start checkout by opening the customer's cart on the store's checkout page in a Chrome window.
+    This does not place the order: the customer completes the order in that window.
+
+    The window is opened by a background job, so the tool returns before it is open. Tell the
+    customer the checkout page is being opened, not that the order is placed, and call
+    check_job_status with the job_id to learn whether it opened.
+
+    Returns:
+        Dict[str, Any]: {"status": "queued", "job_id", "message"} while the job runs. The job's
+        result, or this tool's result when background jobs are disabled, is
+        {"status": "pending", "message"} once the checkout page is open, or
+        {"status": "error", "error_message"} if it could not be opened.
     """
     configuration = config.get("configurable", {})
     if not configuration:
@@ -340,38 +976,97 @@ def create_order(config: RunnableConfig) -> Dict[str, Any]:
     if not customer_id:
         raise ValueError("No Customer ID configured.")
     
-    # Reopen the browser with the persistent session so the cart is intact
-    chrome_options = Options()
-    profile_path = "profile"  # ensure this matches the profile used in add_product_to_cart
-    chrome_options.add_argument(f"--user-data-dir={profile_path}")
-    chrome_options.add_experimental_option("detach", True)  # Keep Chrome open
-    driver = webdriver.Chrome(options=chrome_options)
-    try:
-        # Navigate to the cart page (or the main site if cart state is preserved)
-        driver.get("https://tershine.com/sv/checkout")
+    profile_path = _cart_profile(config)  # the same profile add_product_to_cart used for this session
 
-        WebDriverWait(driver, 20).until(EC.url_contains("checkout"))
-        
-        checkout_url = driver.current_url
-        # Instead of closing, return a message and keep Chrome open
-        return {
-            "status": "pending",
-            "message": "The checkout page is now open in your Chrome session. Please complete your order manually.",
-        }
-
-    except Exception as ex:
-        return {
-            "status": "error",
-            "error_message": str(ex),
-        }
+    def open_checkout() -> Dict[str, Any]:
+        from selenium import webdriver
+        from selenium.webdriver.chrome.options import Options
+        from selenium.webdriver.support.ui import WebDriverWait
+        from selenium.webdriver.support import expected_conditions as EC
+
+        # The detached window outlives this job, so keep the profile from being collected under it
+        get_profile_manager().pin(profile_path)
+        # The pooled headless session holds the profile lock; quit it before opening a visible window
+        get_cart_browser_pool().close_profile(profile_path)
+
+        # Reopen the browser with the persistent session so the cart is intact
+        chrome_options = Options()
+        chrome_options.add_argument(f"--user-data-dir={profile_path}")
+        chrome_options.add_experimental_option("detach", True)  # Keep Chrome open
+        driver = webdriver.Chrome(options=chrome_options)
+        try:
+            # Items added over HTTP live in the session's cookie jar; hand it to the browser
+            cart_client = get_cart_client(profile_path)
+            _sync_cookies_to_browser(driver, cart_client)
+
+            # Navigate to the cart page (or the main site if cart state is preserved)
+            driver.get(cart_client.endpoints.url(cart_client.endpoints.checkout_path))
+
+            WebDriverWait(driver, 20).until(EC.url_contains("checkout"))
+
+            checkout_url = driver.current_url
+            # Instead of closing, return a message and keep Chrome open
+            return {
+                "status": "pending",
+                "message": "The checkout page is now open in your Chrome session. Please complete your order manually.",
+            }
+
+        except Exception as ex:
+            return {
+                "status": "error",
+                "error_message": str(ex),
+            }
+
+    # Launching Chrome takes seconds; cart jobs queued before this one finish first
+    return _run_in_background(config, "create_order", "Opening the checkout page", open_checkout)
+
+@tool
+def check_job_status(job_id: Optional[str] = None, *, config: RunnableConfig) -> Dict[str, Any]:
+    """
+    Checks on background jobs, such as cart additions or opening the checkout page, started in this chat.
+
+    Arguments:
+        job_id (Optional[str]): The job_id a tool returned. All of this chat's jobs when omitted.
+
+    Returns:
+        Dict[str, Any]: The job's status ("queued", "running", "succeeded" or "failed") and its result or error.
+    """
+    if not BACKGROUND_JOBS_ENABLED:
+        return {"status": "error", "message": "Background jobs are disabled; tools run to completion."}
+    manager = get_cart_job_manager()
+    if job_id is None:
+        return {"jobs": [job.as_dict() for job in manager.jobs_for(_session_id(config))]}
+    job = manager.get(job_id, session_id=_session_id(config))
+    if job is None:
+        return {"status": "error", "message": f"No job {job_id} in this chat."}
+    if job.done:
+        # Reported now, so the next turn does not announce it again
+        manager.mark_reported(job)
+    return job.as_dict()
+
+# Separator for the GROUP_CONCAT product list; split again in Python so long lists can be shortened
+ORDER_ITEM_SEPARATOR = "\x1f"
 
 @tool
-def check_order_status(order_id: Union[str, None], *, config: RunnableConfig) -> Dict[str, Union[str, None]]:
+def check_order_status(
+    order_id: Union[str, None],
+    limit: int = DEFAULT_PAGE_SIZE,
+    offset: int = 0,
+    fields: Optional[List[str]] = None,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    *,
+    config: RunnableConfig,
+) -> Dict[str, Any]:
     """
     Checks the status of a specific order or all customer orders.
+    The order history is paginated, newest first: use `offset` with the returned `next_offset` to see older orders.
 
     Arguments:
-        order_id (Union[str, None]): The ID of the order to check. If None, all customer orders will be returned.
+        order_id (Union[str, None]): The ID of the order to check. If None, the customer's orders will be returned.
+        limit (int): Maximum number of orders to return when listing orders (at most 50).
+        offset (int): Number of orders to skip when listing orders.
+        fields (Optional[List[str]]): Order fields to return, e.g. ["status", "total_amount"]. All fields when omitted.
+        max_tokens (int): Output size budget; long product lists are shortened and extra orders left for the next page.
     """
     configuration = config.get("configurable", {})
     
@@ -383,6 +1078,8 @@ def check_order_status(order_id: Union[str, None], *, config: RunnableConfig) ->
     if not customer_id:
         raise ValueError("No Customer ID configured.")
 
+    limit, offset = _page_bounds(limit, offset)
+
     with db_manager.get_connection() as conn:
         cursor = conn.cursor()
 
@@ -394,7 +1091,7 @@ def check_order_status(order_id: Union[str, None], *, config: RunnableConfig) ->
                     o.OrderId,
                     o.OrderDate,
                     o.Status,
-                    GROUP_CONCAT(p.ProductName || ' (x' || od.Quantity || ')') as Products,
+                    GROUP_CONCAT(p.ProductName || ' (x' || od.Quantity || ')', ?) as Products,
                     SUM(od.Quantity * od.UnitPrice) as TotalAmount
                 FROM orders o
                 JOIN orders_details od ON o.OrderId = od.OrderId
@@ -402,7 +1099,7 @@ def check_order_status(order_id: Union[str, None], *, config: RunnableConfig) ->
                 WHERE o.OrderId = ? AND o.CustomerId = ?
                 GROUP BY o.OrderId
             """,
-                (order_id, customer_id),
+                (ORDER_ITEM_SEPARATOR, order_id, customer_id),
             )
 
             order = cursor.fetchone()
@@ -414,47 +1111,73 @@ def check_order_status(order_id: Union[str, None], *, config: RunnableConfig) ->
                     "order_id": str(order_id),
                 }
 
-            return {
+            result = {
                 "status": "success",
                 "order_id": str(order["OrderId"]),
                 "order_date": order["OrderDate"],
                 "order_status": order["Status"],
-                "products": order["Products"],
+                "products": ", ".join(order["Products"].split(ORDER_ITEM_SEPARATOR)),
                 "total_amount": float(order["TotalAmount"]),
                 "customer_id": str(customer_id),
             }
+            if estimate_tokens(result) > max_tokens:
+                # Keep as many line items as fit and summarize the rest.
+                items = order["Products"].split(ORDER_ITEM_SEPARATOR)
+                budget = max_tokens - estimate_tokens({**result, "products": ""})
+                kept = []
+                for item in items:
+                    if kept and estimate_tokens(", ".join(kept + [item])) > budget:
+                        break
+                    kept.append(item)
+                result["products"] = ", ".join(kept)
+                if len(kept) < len(items):
+                    result["products"] += f" (+{len(items) - len(kept)} more)"
+            return project(result, fields, always=("status", "order_id"))
         
         else:
-            # Query all customer orders
-            cursor.execute(
+            # Query the customer's orders, one page at a time
+            orders, total = _fetch_page(
+                cursor,
                 """
                 SELECT
                     o.OrderId,
                     o.OrderDate,
                     o.Status,
                     COUNT(od.OrderDetailId) as ItemCount,
-                    SUM(od.Quantity * od.UnitPrice) as TotalAmount
+                    SUM(od.Quantity * od.UnitPrice) as TotalAmount,
+                    COUNT(*) OVER () AS TotalMatches
                 FROM orders o
                 JOIN orders_details od ON o.OrderId = od.OrderId
                 WHERE o.CustomerId = ?
                 GROUP BY o.OrderId
-                ORDER BY o.OrderDate DESC
+                ORDER BY o.OrderDate DESC, o.OrderId DESC
             """,
-                (customer_id,),
+                [customer_id],
+                limit,
+                offset,
             )
 
-            orders = cursor.fetchall()
+            orders, _ = fit_to_budget(
+                [
+                    project(
+                        {
+                            "order_id": str(order["OrderId"]),
+                            "order_date": order["OrderDate"],
+                            "status": order["Status"],
+                            "item_count": order["ItemCount"],
+                            "total_amount": float(order["TotalAmount"]),
+                        },
+                        fields,
+                        always=("order_id",),
+                    )
+                    for order in orders
+                ],
+                max_tokens,
+                text_fields=(),
+            )
             return {
                 "status": "success",
                 "customer_id": str(customer_id),
-                "orders": [
-                    {
-                        "order_id": str(order["OrderId"]),
-                        "order_date": order["OrderDate"],
-                        "status": order["Status"],
-                        "item_count": order["ItemCount"],
-                        "total_amount": float(order["TotalAmount"]),
-                    }
-                    for order in orders
-                ],
-            }
\ No newline at end of file
+                "orders": orders,
+                "metadata": page_metadata(total, offset, len(orders)),
+            }
@@ -1,22 +1,37 @@
+from typing import Optional
+
 from langchain_core.messages import ToolMessage
 from langchain_core.runnables import RunnableLambda
 from langgraph.prebuilt import ToolNode
 
+def tool_error_message(error: Exception) -> str:
+    return f"Error: {repr(error)}\n please fix your mistakes."
+
 def handle_tool_error(state) -> dict:
     error = state.get("error")
     tool_calls = state["messages"][-1].tool_calls
     return {
         "messages": [
             ToolMessage(
-                content=f"Error: {repr(error)}\n please fix your mistakes.",
+                content=tool_error_message(error),
                 tool_call_id=tc["id"],
             )
             for tc in tool_calls
         ]
     }
 
-def create_tool_node_with_fallback(tools: list) -> dict:
-    return ToolNode(tools).with_fallbacks(
+def create_tool_node_with_fallback(tools: list, max_concurrency: Optional[int] = None) -> dict:
+    """
+    Creates a tool node for the given tools.
+
+    ToolNode already runs the tool calls of one AI message in parallel; `max_concurrency`
+    caps how many run at once. A failing call gets its own error ToolMessage, so it does
+    not discard the results of the other calls; the fallback covers errors of the node itself.
+    """
+    node = ToolNode(tools, handle_tool_errors=tool_error_message)
+    if max_concurrency is not None:
+        node = node.with_config(max_concurrency=max_concurrency)
+    return node.with_fallbacks(
         [RunnableLambda(handle_tool_error)], exception_key="error"
     )
 
@@ -0,0 +1,10 @@
+import os
+
+# graph.py copies these into os.environ at import time; the tests never reach the services
+for name, value in {
+    "OPENAI_API_KEY": "test",
+    "LANGFUSE_SECRET_KEY": "test",
+    "LANGFUSE_PUBLIC_KEY": "test",
+    "LANGFUSE_HOST": "http://localhost",
+}.items():
+    os.environ.setdefault(name, value)
@@ -0,0 +1,94 @@
+from http.server import ThreadingHTTPServer
+import json
+import threading
+
+import pytest
+
+from backend.database.product_urls import ProductUrl
+from backend.sales_agent import tools
+from backend.sales_agent.cart_client import NO_FREE_SHIPPING_INFO, CartClientError, HttpCartClient, StoreEndpoints
+from experimental import stand_in_store
+
+
+@pytest.fixture
+def store():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), stand_in_store.StoreHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield StoreEndpoints(base_url=f"http://127.0.0.1:{server.server_address[1]}")
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def product_urls(monkeypatch):
+    # Keeps the tools away from the shipped store.db
+    calls = []
+    monkeypatch.setattr(tools, "_remember_product_url", lambda *args: calls.append(("remember", *args)))
+    monkeypatch.setattr(tools, "_forget_product_url", lambda *args: calls.append(("forget", *args)))
+    return calls
+
+
+def test_add_to_cart_returns_shipping_and_checkout_url(store, tmp_path):
+    product = stand_in_store.products[0]
+    client = HttpCartClient(store, cookie_path=str(tmp_path / "cookies.json"))
+
+    free_shipping, cart_url = client.add_to_cart(product["name"])
+
+    assert free_shipping.endswith("left to free shipping") or free_shipping == "You have free shipping"
+    assert free_shipping != NO_FREE_SHIPPING_INFO
+    assert cart_url == store.url(store.checkout_path)
+    # The cart cookie is persisted, so the next client of the session keeps the same cart
+    cookies = json.loads((tmp_path / "cookies.json").read_text(encoding="utf-8"))
+    assert [cookie["name"] for cookie in cookies] == ["cart_session"]
+    same_session = HttpCartClient(store, cookie_path=str(tmp_path / "cookies.json"))
+    same_session.add_to_cart(product["name"], product_id=product["id"])
+    session = cookies[0]["value"]
+    assert stand_in_store.carts[session] == {product["id"]: 2}
+
+
+def test_unknown_product_raises_client_error(store):
+    client = HttpCartClient(store)
+
+    with pytest.raises(CartClientError) as error:
+        client.add_to_cart("no such product anywhere")
+    assert error.value.status is None
+
+    with pytest.raises(CartClientError) as error:
+        client.add_to_cart("stale", product_id="0")
+    assert error.value.status == 404
+
+
+def test_unreachable_store_raises_client_error(store):
+    client = HttpCartClient(StoreEndpoints(base_url="http://127.0.0.1:9"), timeout=1.0)
+
+    with pytest.raises(CartClientError):
+        client.add_to_cart(stand_in_store.products[0]["name"])
+
+
+def test_tool_result_shape_over_http(store, product_urls):
+    product = stand_in_store.products[0]
+    client = HttpCartClient(store)
+
+    free_shipping, cart_url = tools._add_to_cart_over_http(client, product["name"], None)
+    result = tools._cart_addition(product["name"], free_shipping, cart_url)
+
+    assert result == {
+        "status": "success",
+        "product_name": product["name"],
+        "free_shipping": free_shipping,
+        "cart_url": store.url(store.checkout_path),
+    }
+    # An exact search hit is remembered with its store id
+    assert product_urls == [("remember", product["name"], store.url(product["url"]), product["id"])]
+
+
+def test_stale_product_url_is_forgotten_and_searched_again(store, product_urls):
+    product = stand_in_store.products[0]
+    stale = ProductUrl(product["name"], store.url("/sv/product/0"), "0", "test")
+
+    free_shipping, _ = tools._add_to_cart_over_http(HttpCartClient(store), product["name"], stale)
+
+    assert free_shipping != NO_FREE_SHIPPING_INFO
+    assert product_urls[0] == ("forget", product["name"])
+    assert product_urls[1][0] == "remember"
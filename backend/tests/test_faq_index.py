@@ -0,0 +1,120 @@
+import json
+import threading
+
+import numpy as np
+import pytest
+
+from backend.sales_agent.faq_index import (
+    CURRENT_FILE,
+    METADATA_FILE,
+    VECTORS_FILE,
+    LocalFaqIndex,
+    resolve_replica,
+    write_faq_index,
+)
+
+DIMENSION = 8
+
+
+def replica(generation, count=16):
+    rng = np.random.default_rng(generation)
+    ids = [f"g{generation}-{i}" for i in range(count)]
+    vectors = rng.normal(size=(count, DIMENSION)).astype(np.float32)
+    metadata = [{"generation": generation, "text": f"answer {i}"} for i in range(count)]
+    return ids, vectors, metadata
+
+
+def generations(directory):
+    return sorted(path.name for path in directory.glob("gen-*"))
+
+
+def test_query_finds_exported_vector(tmp_path):
+    ids, vectors, metadata = replica(1)
+    write_faq_index(str(tmp_path), ids, vectors, metadata)
+
+    index = LocalFaqIndex(str(tmp_path))
+    result = index.query(vectors[3].tolist(), top_k=2, include_metadata=True)
+
+    assert len(index) == len(ids)
+    assert result["matches"][0]["id"] == ids[3]
+    assert result["matches"][0]["score"] == pytest.approx(1.0, abs=1e-5)
+    assert result["matches"][0]["metadata"] == metadata[3]
+
+
+def test_republish_switches_current_and_keeps_open_readers(tmp_path):
+    write_faq_index(str(tmp_path), *replica(1))
+    first = LocalFaqIndex(str(tmp_path))
+
+    ids, vectors, metadata = replica(2, count=4)
+    write_faq_index(str(tmp_path), ids, vectors, metadata)
+    second = LocalFaqIndex(str(tmp_path))
+
+    # The previous generation stays for the reader still using it
+    assert len(generations(tmp_path)) == 2
+    assert resolve_replica(str(tmp_path)) == second.directory != first.directory
+    assert {match["metadata"]["generation"] for match in first.query(vectors[0].tolist(), 16, True)["matches"]} == {1}
+    assert second.query(vectors[0].tolist(), 1)["matches"][0]["id"] == ids[0]
+    assert len(second) == 4
+
+    write_faq_index(str(tmp_path), *replica(3))
+    assert len(generations(tmp_path)) == 2
+    assert not first.directory.exists()
+
+
+def test_reader_never_mixes_generations(tmp_path):
+    write_faq_index(str(tmp_path), *replica(0))
+    stop = threading.Event()
+    errors = []
+
+    def republish():
+        generation = 1
+        while not stop.is_set():
+            write_faq_index(str(tmp_path), *replica(generation, count=8 + generation % 8))
+            generation += 1
+
+    writer = threading.Thread(target=republish)
+    writer.start()
+    try:
+        for _ in range(200):
+            index = LocalFaqIndex(str(tmp_path))
+            prefixes = {vector_id.split("-")[0] for vector_id in index.ids}
+            generation_numbers = {entry["generation"] for entry in index.metadata}
+            if len(prefixes) != 1 or generation_numbers != {int(next(iter(prefixes))[1:])}:
+                errors.append((prefixes, generation_numbers))
+            if index.vectors.shape != (len(index.ids), DIMENSION):
+                errors.append(index.vectors.shape)
+    finally:
+        stop.set()
+        writer.join()
+    assert not errors
+
+
+def test_empty_export(tmp_path):
+    write_faq_index(str(tmp_path), [], np.zeros((0, DIMENSION), dtype=np.float32), [])
+
+    index = LocalFaqIndex(str(tmp_path))
+
+    assert len(index) == 0
+    assert index.query([1.0] * DIMENSION, top_k=3) == {"matches": []}
+    assert index.query_batch([[1.0] * DIMENSION] * 2) == [{"matches": []}, {"matches": []}]
+
+
+def test_mismatched_export_is_rejected(tmp_path):
+    ids, vectors, metadata = replica(1)
+
+    with pytest.raises(ValueError):
+        write_faq_index(str(tmp_path), ids, vectors[:-1], metadata)
+    assert not (tmp_path / CURRENT_FILE).exists()
+
+
+def test_legacy_flat_replica_loads(tmp_path):
+    ids, vectors, metadata = replica(1, count=4)
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    normalized.astype(np.float32).tofile(tmp_path / VECTORS_FILE)
+    sidecar = {"count": 4, "dimension": DIMENSION, "normalized": True, "ids": ids, "metadata": metadata}
+    (tmp_path / METADATA_FILE).write_text(json.dumps(sidecar), encoding="utf-8")
+
+    index = LocalFaqIndex(str(tmp_path))
+
+    assert index.directory == tmp_path
+    assert index.query(vectors[2].tolist(), top_k=1)["matches"][0]["id"] == ids[2]
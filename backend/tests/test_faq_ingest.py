@@ -0,0 +1,116 @@
+from types import SimpleNamespace
+
+import pytest
+
+from backend.sales_agent.faq_ingest import FaqIngestionPipeline, chunk_document
+
+
+class FakeIndex:
+    """Records the vectors of one namespace the way Pinecone would hold them."""
+
+    def __init__(self):
+        self.vectors = {}
+        self.upserted = []
+        self.deleted = []
+
+    def upsert(self, vectors, namespace=""):
+        for vector in vectors:
+            self.vectors[vector["id"]] = vector
+            self.upserted.append(vector["id"])
+
+    def delete(self, ids=None, delete_all=False, namespace=""):
+        if delete_all:
+            self.vectors.clear()
+            return
+        for vector_id in ids:
+            self.vectors.pop(vector_id, None)
+            self.deleted.append(vector_id)
+
+    def describe_index_stats(self):
+        return SimpleNamespace(namespaces={"": {"vector_count": len(self.vectors)}} if self.vectors else {})
+
+
+class FakeEmbeddings:
+    def __init__(self):
+        self.texts = []
+
+    def embed_documents(self, texts):
+        self.texts.extend(texts)
+        return [[float(len(text)), 1.0] for text in texts]
+
+
+def paragraphs(topic, count=12):
+    return "\n\n".join(
+        f"{topic} step {i}: rinse the surface, apply the product evenly and let it work for {i + 2} minutes "
+        f"before wiping it off with a clean microfiber towel."
+        for i in range(count)
+    )
+
+
+DOCUMENTS = [("wheels.md", paragraphs("Wheels")), ("glass.md", paragraphs("Glass"))]
+
+
+def chunk_ids(source, text):
+    return {chunk.chunk_id for chunk in chunk_document(source, text)}
+
+
+@pytest.fixture
+def index():
+    return FakeIndex()
+
+
+@pytest.fixture
+def make_pipeline(tmp_path, index):
+    pipelines = []
+
+    def make():
+        pipeline = FaqIngestionPipeline(index, FakeEmbeddings(), str(tmp_path / "faq_ingest.db"), upsert_workers=2)
+        pipelines.append(pipeline)
+        return pipeline
+
+    yield make
+    for pipeline in pipelines:
+        pipeline.manifest.close()
+
+
+def test_unchanged_documents_are_not_upserted_again(make_pipeline, index):
+    first = make_pipeline().run(DOCUMENTS)
+    assert first.upserted == len(index.vectors) > 2
+    index.upserted.clear()
+
+    pipeline = make_pipeline()
+    stats = pipeline.run(DOCUMENTS)
+
+    assert (stats.embedded, stats.upserted, stats.deleted) == (0, 0, 0)
+    assert stats.unchanged == first.upserted
+    assert pipeline.embeddings.texts == []
+    assert index.upserted == []
+
+
+def test_changed_document_replaces_only_its_chunks(make_pipeline, index):
+    make_pipeline().run(DOCUMENTS)
+    index.upserted.clear()
+    edited = paragraphs("Glass").replace("Glass step 7:", "Glass step 7 (use the glass cleaner):")
+    old_ids, new_ids = chunk_ids("glass.md", DOCUMENTS[1][1]), chunk_ids("glass.md", edited)
+    assert old_ids != new_ids
+
+    stats = make_pipeline().run([DOCUMENTS[0], ("glass.md", edited)])
+
+    assert set(index.upserted) == new_ids - old_ids
+    assert set(index.deleted) == old_ids - new_ids
+    assert set(index.vectors) == chunk_ids(*DOCUMENTS[0]) | new_ids
+    assert stats.upserted == len(new_ids - old_ids)
+
+
+def test_empty_manifest_with_existing_vectors_requires_rebuild(make_pipeline, index):
+    index.upsert([{"id": "legacy-1", "values": [1.0, 0.0], "metadata": {"content": "old"}}])
+
+    with pytest.raises(RuntimeError, match="--rebuild"):
+        make_pipeline().run(DOCUMENTS)
+    assert set(index.vectors) == {"legacy-1"}
+
+    stats = make_pipeline().run(DOCUMENTS, rebuild=True)
+
+    assert "legacy-1" not in index.vectors
+    assert set(index.vectors) == chunk_ids(*DOCUMENTS[0]) | chunk_ids(*DOCUMENTS[1])
+    assert stats.upserted == len(index.vectors)
@@ -0,0 +1,56 @@
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableLambda
+
+from backend.sales_agent.graph import ASSISTANT_CACHE_KEY_FIELDS
+from backend.sales_agent.llm_cache import CachedChatRunnable, ResponseCache
+
+
+def make_runnable(tmp_path):
+    calls = []
+
+    def answer(input):
+        calls.append(input["user_info"])
+        return AIMessage(content=f"Your account is {input['user_info']}")
+
+    cache = ResponseCache(str(tmp_path / "responses.db"))
+    runnable = CachedChatRunnable(RunnableLambda(answer), cache, "test", key_fields=ASSISTANT_CACHE_KEY_FIELDS)
+    return runnable, cache, calls
+
+
+def request(customer_id):
+    return {"messages": [HumanMessage(content="What is my account?")], "summary": "None", "user_info": customer_id}
+
+
+def test_same_customer_hits_cache(tmp_path):
+    runnable, cache, calls = make_runnable(tmp_path)
+
+    first = runnable.invoke(request("1"))
+    second = runnable.invoke(request("1"))
+
+    assert calls == ["1"]
+    assert second.content == first.content
+    assert second.response_metadata["cache_hit"]
+    assert cache.stats().memory_hits == 1
+
+
+def test_second_customer_misses_cache(tmp_path):
+    runnable, cache, calls = make_runnable(tmp_path)
+
+    runnable.invoke(request("1"))
+    second = runnable.invoke(request("2"))
+
+    assert calls == ["1", "2"]
+    assert second.content == "Your account is 2"
+    assert cache.stats().misses == 2
+
+
+def test_second_customer_misses_disk_cache(tmp_path):
+    runnable, _, _ = make_runnable(tmp_path)
+    runnable.invoke(request("1"))
+
+    # A fresh process only shares the SQLite tier
+    other_process, cache, calls = make_runnable(tmp_path)
+    assert other_process.invoke(request("2")).content == "Your account is 2"
+    assert other_process.invoke(request("1")).content == "Your account is 1"
+    assert calls == ["2"]
+    assert cache.stats().disk_hits == 1
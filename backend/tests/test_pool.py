@@ -0,0 +1,57 @@
+import sqlite3
+
+from backend.database.config import DatabaseConfig
+from backend.database.db_manager import DatabaseManager
+
+
+def make_database(tmp_path):
+    db_path = tmp_path / "store.db"
+    conn = sqlite3.connect(db_path)
+    conn.execute("CREATE TABLE products (ProductId INTEGER PRIMARY KEY, ProductName TEXT)")
+    conn.execute("INSERT INTO products (ProductName) VALUES ('Shampoo')")
+    conn.commit()
+    conn.close()
+    return db_path
+
+
+def journal_mode(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute("PRAGMA journal_mode").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_reads_leave_journal_mode_alone(tmp_path):
+    db_path = make_database(tmp_path)
+    manager = DatabaseManager(DatabaseConfig(db_name="store.db", db_path=str(db_path)))
+
+    with manager.get_connection() as conn:
+        assert conn.execute("SELECT ProductName FROM products").fetchone()[0] == "Shampoo"
+    manager.close()
+
+    assert journal_mode(db_path) == "delete"
+    assert sorted(path.name for path in tmp_path.iterdir()) == ["store.db"]
+
+
+def test_create_database_switches_to_wal(tmp_path):
+    db_path = tmp_path / "store.db"
+    manager = DatabaseManager(DatabaseConfig(db_name="store.db", db_path=str(db_path)))
+
+    assert manager.create_database()
+    manager.close()
+
+    assert journal_mode(db_path) == "wal"
+
+
+def test_shared_pool_survives_other_manager_closing(tmp_path):
+    db_path = make_database(tmp_path)
+    config = DatabaseConfig(db_name="store.db", db_path=str(db_path))
+    first, second = DatabaseManager(config), DatabaseManager(config)
+    assert first.pool is second.pool
+
+    first.close()
+    with second.get_connection() as conn:
+        assert conn.execute("SELECT COUNT(*) FROM products").fetchone()[0] == 1
+    second.close()
+    assert second.pool is not None
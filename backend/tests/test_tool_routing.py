@@ -0,0 +1,77 @@
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+
+from backend.sales_agent.graph import INTERRUPT_BEFORE, State, route_tools
+from backend.sales_agent.utils import create_tool_node_with_fallback
+
+calls = []
+
+
+@tool
+def search_products(query: str) -> str:
+    """Stands in for the safe search_products tool."""
+    calls.append("search_products")
+    return f"found {query}"
+
+
+@tool
+def create_order() -> str:
+    """Stands in for the sensitive create_order tool."""
+    calls.append("create_order")
+    return "checkout opened"
+
+
+def tool_call(name, args, call_id):
+    return {"name": name, "args": args, "id": call_id, "type": "tool_call"}
+
+
+MIXED_BATCH = AIMessage(
+    content="",
+    tool_calls=[tool_call("search_products", {"query": "wax"}, "call_1"), tool_call("create_order", {}, "call_2")],
+)
+
+
+def assistant(state):
+    if isinstance(state["messages"][-1], ToolMessage):
+        return {"messages": [AIMessage(content="Done")]}
+    return {"messages": [MIXED_BATCH]}
+
+
+def build_graph():
+    # The tool routing of backend/sales_agent/graph.py around a scripted assistant
+    builder = StateGraph(State)
+    builder.add_node("assistant", assistant)
+    builder.add_node("safe_tools", create_tool_node_with_fallback([search_products], 4))
+    builder.add_node("sensitive_tools", create_tool_node_with_fallback([search_products, create_order], 4))
+    builder.add_edge(START, "assistant")
+    builder.add_conditional_edges("assistant", route_tools, ["safe_tools", "sensitive_tools", END])
+    builder.add_edge("safe_tools", "assistant")
+    builder.add_edge("sensitive_tools", "assistant")
+    return builder.compile(checkpointer=MemorySaver(), interrupt_before=INTERRUPT_BEFORE)
+
+
+def test_safe_batch_goes_to_safe_tools():
+    message = AIMessage(content="", tool_calls=[tool_call("search_products", {"query": "wax"}, "call_1")])
+
+    assert route_tools({"messages": [message]}) == "safe_tools"
+
+
+def test_mixed_batch_interrupts_before_any_call_runs():
+    calls.clear()
+    graph = build_graph()
+    config = {"configurable": {"thread_id": "mixed"}}
+
+    graph.invoke({"messages": [HumanMessage(content="Find wax and check out")]}, config)
+
+    assert graph.get_state(config).next == ("sensitive_tools",)
+    assert calls == []
+
+    # Approving resumes the whole batch, safe call included
+    result = graph.invoke(None, config)
+
+    assert sorted(calls) == ["create_order", "search_products"]
+    tool_messages = [message for message in result["messages"] if isinstance(message, ToolMessage)]
+    assert sorted(message.tool_call_id for message in tool_messages) == ["call_1", "call_2"]
+    assert result["messages"][-1].content == "Done"
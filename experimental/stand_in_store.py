@@ -0,0 +1,86 @@
+"""
+Local stand-in for the storefront's JSON cart endpoints, for trying the HTTP cart client
+(backend/sales_agent/cart_client.py) without touching the real store.
+
+Run it and point the agent at it:
+    python experimental/stand_in_store.py --port 8765
+    CART_HTTP_ENABLED=true STORE_BASE_URL=http://127.0.0.1:8765 streamlit run frontend/app.py
+"""
+import argparse
+from http.cookies import SimpleCookie
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+from pathlib import Path
+import threading
+from urllib.parse import parse_qs, urlparse
+import uuid
+
+PRODUCTS_PATH = Path(__file__).resolve().parents[1] / "backend" / "database" / "db" / "products.json"
+FREE_SHIPPING_THRESHOLD = 499
+
+products = [
+    {"id": str(i), "name": p["product_name"], "price": p["price"], "url": f"/sv/product/{i}"}
+    for i, p in enumerate(json.loads(PRODUCTS_PATH.read_text(encoding="utf-8")), start=1)
+]
+products_by_id = {p["id"]: p for p in products}
+carts = {}
+carts_lock = threading.Lock()
+
+
+class StoreHandler(BaseHTTPRequestHandler):
+    def _session(self):
+        cookie = SimpleCookie(self.headers.get("Cookie", ""))
+        if "cart_session" in cookie:
+            return cookie["cart_session"].value, False
+        return uuid.uuid4().hex, True
+
+    def _reply(self, status, body, session=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        if session:
+            self.send_header("Set-Cookie", f"cart_session={session}; Path=/")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/api/search":
+            return self._reply(404, {"error": "not found"})
+        query = parse_qs(url.query).get("q", [""])[0].lower()
+        hits = [p for p in products if query in p["name"].lower()][:10]
+        self._reply(200, {"products": hits})
+
+    def do_POST(self):
+        if urlparse(self.path).path != "/api/cart/add":
+            return self._reply(404, {"error": "not found"})
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        product = products_by_id.get(str(body.get("productId")))
+        if product is None:
+            return self._reply(404, {"error": "unknown product"})
+        session, new = self._session()
+        with carts_lock:
+            cart = carts.setdefault(session, {})
+            cart[product["id"]] = cart.get(product["id"], 0) + int(body.get("quantity", 1))
+            items = [{"id": pid, "name": products_by_id[pid]["name"], "quantity": q} for pid, q in cart.items()]
+            total = sum(products_by_id[pid]["price"] * q for pid, q in cart.items())
+        remaining = max(FREE_SHIPPING_THRESHOLD - total, 0)
+        text = f"{remaining} kr left to free shipping" if remaining else "You have free shipping"
+        self._reply(200, {"items": items, "shipping": {"remaining_text": text}}, session if new else None)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    server = ThreadingHTTPServer(("127.0.0.1", args.port), StoreHandler)
+    print(f"Stand-in store on http://127.0.0.1:{args.port}")
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
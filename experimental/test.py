@@ -1,71 +1,102 @@
+"""
+Manual walk-through of the add-to-cart browser flow with per-step timings.
+
+It uses the page-load helpers from the backend package, so run it as a module from the
+repository root:
+    python -m experimental.test
+"""
+import logging
 import time
 from selenium import webdriver
 from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 
+from backend.sales_agent.page_load import StepTimer, apply_lightweight_options, block_asset_urls, wait_until
+
+logging.basicConfig(level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s")
+
+# Skip images, fonts and tracking scripts, and stop waiting for a page once its DOM is ready
+LIGHTWEIGHT = True
+STEP_TIMEOUT = 10
+
 # Set a persistent profile directory (change this to your desired directory)
 profile_path = "path/to/persistent/profile"  # Replace with your actual directory
 
 # Configure Chrome options to use the persistent profile
 chrome_options = Options()
 chrome_options.add_argument(f"--user-data-dir={profile_path}")
+if LIGHTWEIGHT:
+    apply_lightweight_options(chrome_options)
+
+timer = StepTimer("Add to cart")
 
 # Initialize Chrome driver with the persistent profile
-driver = webdriver.Chrome(options=chrome_options)
+with timer.step("launch"):
+    driver = webdriver.Chrome(options=chrome_options)
+    if LIGHTWEIGHT:
+        block_asset_urls(driver)
 
 try:
     # Navigate to the main page
-    driver.get("https://sovfabriken.se/")
-    
-    # Wait for and access the search box, then enter the product name
-    clickable_search_box = WebDriverWait(driver, 10).until(
-        EC.element_to_be_clickable((By.CSS_SELECTOR, "input.input"))
-    )
-    clickable_search_box.clear()
-    clickable_search_box.send_keys("Dissolve - Kallavfettning 1 L")
-    
-    # Wait for the search results and click the first link
-    search_results = WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.CSS_SELECTOR, "ul.search-result"))
-    )
-    first_link = WebDriverWait(search_results, 10).until(
-        EC.element_to_be_clickable((By.CSS_SELECTOR, "li a"))
-    )
-    first_link.click()
-    
-    # Wait for product page to load and click the buy button
-    product_page = WebDriverWait(driver, 10).until(
-        EC.presence_of_element_located((By.CSS_SELECTOR, "div.action"))
-    )
-    buy_button = WebDriverWait(product_page, 10).until(
-        EC.element_to_be_clickable((By.CSS_SELECTOR, "button.button.buy"))
-    )
-    buy_button.click()
-    
-    # Wait for cart pop up to load
-    cart_pop_up = WebDriverWait(driver, 10).until(
-        EC.element_to_be_clickable((By.CSS_SELECTOR, "section.section.footer"))
-    )
-    
-    # Optionally, check for free shipping information
-    try:
-        free_shipping_info = WebDriverWait(cart_pop_up, 10).until(
-            EC.element_to_be_clickable((By.CSS_SELECTOR, "div.shipping-information__remaining"))
+    with timer.step("home_page"):
+        driver.get("https://sovfabriken.se/")
+
+        # Wait for and access the search box, then enter the product name
+        clickable_search_box = wait_until(
+            driver, EC.element_to_be_clickable((By.CSS_SELECTOR, "input.input")), STEP_TIMEOUT
         )
-        free_shipping_texts = free_shipping_info.text
-    except:
-        free_shipping_texts = "Eligible for free shipping"
-    
+    with timer.step("search"):
+        clickable_search_box.clear()
+        clickable_search_box.send_keys("Dissolve - Kallavfettning 1 L")
+
+        # Wait for the search results and click the first link
+        search_results = wait_until(
+            driver, EC.presence_of_element_located((By.CSS_SELECTOR, "ul.search-result")), STEP_TIMEOUT
+        )
+        first_link = wait_until(
+            search_results, EC.element_to_be_clickable((By.CSS_SELECTOR, "li a")), STEP_TIMEOUT
+        )
+    with timer.step("product_page"):
+        first_link.click()
+
+        # Wait for product page to load
+        product_page = wait_until(
+            driver, EC.presence_of_element_located((By.CSS_SELECTOR, "div.action")), STEP_TIMEOUT
+        )
+    with timer.step("buy"):
+        buy_button = wait_until(
+            product_page, EC.element_to_be_clickable((By.CSS_SELECTOR, "button.button.buy")), STEP_TIMEOUT
+        )
+        buy_button.click()
+
+        # Wait for cart pop up to load
+        cart_pop_up = wait_until(
+            driver, EC.element_to_be_clickable((By.CSS_SELECTOR, "section.section.footer")), STEP_TIMEOUT
+        )
+
+    # Optionally, check for free shipping information
+    with timer.step("free_shipping"):
+        try:
+            free_shipping_info = wait_until(
+                cart_pop_up,
+                EC.element_to_be_clickable((By.CSS_SELECTOR, "div.shipping-information__remaining")),
+                STEP_TIMEOUT,
+            )
+            free_shipping_texts = free_shipping_info.text
+        except:
+            free_shipping_texts = "Eligible for free shipping"
+
     # Proceed to checkout
-    checkout_products = WebDriverWait(cart_pop_up, 10).until(
-        EC.element_to_be_clickable((By.CSS_SELECTOR, "a.button.is-fullwidth.buy"))
-    )
-    checkout_products.click()
-    
+    with timer.step("checkout"):
+        checkout_products = wait_until(
+            cart_pop_up, EC.element_to_be_clickable((By.CSS_SELECTOR, "a.button.is-fullwidth.buy")), STEP_TIMEOUT
+        )
+        checkout_products.click()
+
     # At this point the payment page is loaded. You can print its URL:
     print("Payment URL:", driver.current_url)
+    timer.log()
     
     # The browser stays open with your persistent session. You can access the payment URL again later
     while True:
@@ -2,7 +2,7 @@ import streamlit as st
 import json
 from langchain_core.messages import AIMessage, HumanMessage
 from langchain_core.messages.tool import ToolMessage
-from backend.sales_agent.graph import graph  # Adjust your import based on your project structure
+from backend.sales_agent.graph import get_graph  # The graph is built on first use, not at import
 
 def display_chat_history():
     if not st.session_state.messages:
@@ -41,22 +41,23 @@ def handle_tool_approval(snapshot, event):
     if (isinstance(last_message, AIMessage)
         and hasattr(last_message, "tool_calls")
         and last_message.tool_calls):
-        tool_call = last_message.tool_calls[0]
+        # Parallel tool calls are approved or denied together
         with st.chat_message("assistant"):
-            st.markdown("#### 🔧 Proposed Action")
-            with st.expander("View Function Details", expanded=True):
-                st.info(f"Function: **{tool_call['name']}**")
-                try:
-                    args_formatted = json.dumps(tool_call["args"], indent=2)
-                    st.code(f"Arguments:\n{args_formatted}", language="json")
-                except:
-                    st.code(f"Arguments:\n{tool_call['args']}")
+            st.markdown("#### 🔧 Proposed Action" if len(last_message.tool_calls) == 1 else "#### 🔧 Proposed Actions")
+            for tool_call in last_message.tool_calls:
+                with st.expander("View Function Details", expanded=True):
+                    st.info(f"Function: **{tool_call['name']}**")
+                    try:
+                        args_formatted = json.dumps(tool_call["args"], indent=2)
+                        st.code(f"Arguments:\n{args_formatted}", language="json")
+                    except:
+                        st.code(f"Arguments:\n{tool_call['args']}")
     col1, col2 = st.columns(2)
     with col1:
         if st.button("✅ Approve"):
             with st.spinner("Processing..."):
                 try:
-                    result = graph.invoke(None, st.session_state.config)
+                    result = get_graph().invoke(None, st.session_state.config)
                     process_events(result)
                     st.session_state.pending_approval = None
                     st.rerun()
@@ -71,13 +72,14 @@ def handle_tool_approval(snapshot, event):
             if reason and submit:
                 with st.spinner("Processing..."):
                     try:
-                        result = graph.invoke(
+                        result = get_graph().invoke(
                             {
                                 "messages": [
                                     ToolMessage(
-                                        tool_call_id=last_message.tool_calls[0]["id"],
+                                        tool_call_id=tool_call["id"],
                                         content=f"API call denied by user. Reasoning: '{reason}'. Continue assisting.",
                                     )
+                                    for tool_call in last_message.tool_calls
                                 ]
                             },
                             st.session_state.config,
@@ -103,8 +105,9 @@ def client_main():
         try:
             with st.spinner("Thinking..."):
                 events = list(
-                    graph.stream(
-                        {"messages": st.session_state.messages},
+                    get_graph().stream(
+                        # The graph's checkpoint holds the conversation; send only the new message
+                        {"messages": [human_message]},
                         st.session_state.config,
                         stream_mode="values",
                     )
@@ -112,7 +115,7 @@ def client_main():
                 last_event = events[-1]
                 tool_call = process_events(last_event)
                 if tool_call:
-                    snapshot = graph.get_state(st.session_state.config)
+                    snapshot = get_graph().get_state(st.session_state.config)
                     if snapshot.next:
                         for event in events:
                             st.session_state.pending_approval = (snapshot, event)